@@ -7,8 +7,18 @@
 - Output a CSV with clean_text and essential metadata for later modeling.
 """
 
-import os, re, string, json, argparse, warnings
+import os, io, time, argparse, warnings, itertools
 import pandas as pd
+import jsonl_io
+import nlp_clean
+import nlp_cache
+import nlp_state
+import nlp_stopwords
+import table_io
+try:
+    import resource
+except ImportError:   # Windows
+    resource = None
 
 warnings.filterwarnings("ignore", category=FutureWarning)
 
@@ -43,29 +53,9 @@ load_env()
 
 # ---------- NLP Utilities ----------
 
-def ensure_nltk():
-    import nltk
-    try:
-        nltk.data.find("tokenizers/punkt")
-    except LookupError:
-        nltk.download("punkt")
-    try:
-        nltk.data.find("corpora/stopwords")
-    except LookupError:
-        nltk.download("stopwords")
-
 def build_stopwords():
-    from nltk.corpus import stopwords
-    sw = set()
-    # English & Indonesian
-    try:
-        sw |= set(stopwords.words("english"))
-    except:
-        pass
-    try:
-        sw |= set(stopwords.words("indonesian"))
-    except:
-        pass
+    # English & Indonesian (NLTK, dibekukan di stopwords_nltk.txt → tanpa import / download NLTK)
+    sw = nlp_stopwords.load()
     # Technical/common words to de-emphasize topics
     sw |= {
         "error","issue","bug","fix","fixed","problem","invalid","message","crash",
@@ -77,57 +67,72 @@ def build_stopwords():
         sw.add(ch)
     return sw
 
-def clean_text(text, sw):
-    if not isinstance(text, str):
-        return ""
-    text = text.lower()
-    # remove URLs, git hashes, explicit bug ids, keep short path markers minimally
-    text = re.sub(r"http\S+", " ", text)
-    text = re.sub(r"[a-f0-9]{7,40}", " ", text)           # git hashes and similar
-    text = re.sub(r"bug\s*#?\s*\d+", " ", text)           # explicit Bug IDs
-    text = re.sub(r"[^\w\s\./-]+", " ", text)             # keep / . - to preserve short paths
-    tokens = re.split(r"\s+", text)
-
-    def ok(tok):
-        if not tok: return False
-        if tok in sw: return False
-        if tok.isdigit(): return False
-        if len(tok) < 3: return False
-        # overly long path-ish tokens → drop
-        if tok.count(".") > 3 or tok.count("/") > 3: return False
-        return True
-
-    tokens = [t.strip(string.punctuation) for t in tokens]
-    tokens = [t for t in tokens if ok(t)]
-    return " ".join(tokens)
-
-
-
 # ---------- IO ----------
 
-def load_jsonl(path):
-    rows = []
-    with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            line=line.strip()
-            if not line:
-                continue
-            rows.append(json.loads(line))
+BASE_COLS = [
+    "id",
+    "summary",
+    "creator",
+    "assigned_to",
+    "status",
+    "resolution",
+    "creation_time",
+    "last_change_time",
+    # new fields from your example
+    "product",
+    "component",
+    "keywords",
+    "depends_on",
+    "dupe_of",
+    "commit_messages",
+    "commit_refs",
+    "files_changed",
+    "url",
+]
+
+# Save a compact modeling table
+OUT_COLS = [
+    "id",
+    "clean_text",
+    "summary",
+    "product",
+    "component",
+    "creator",
+    "assigned_to",
+    "status",
+    "resolution",
+    "creation_time",
+    "last_change_time",
+    "keywords",
+    "depends_on",
+    "dupe_of",
+    "commit_messages",
+    "commit_refs",
+    "files_changed",
+    "url",
+]
+
+LIST_COLS = ["keywords", "depends_on", "commit_messages", "commit_refs", "files_changed"]
+
+# tipe kolom bugs_clean untuk Parquet (schema tetap antar chunk, list native)
+OUT_KINDS = {c: "str" for c in OUT_COLS}
+OUT_KINDS.update({"id": "int", "dupe_of": "int"})
+OUT_KINDS.update({c: "list" for c in LIST_COLS})
+
+def load_jsonl(path, fields=None):
+    # path boleh JSONL biasa, .jsonl.gz/.jsonl.zst, atau dataset terpartisi (dir + manifest.json)
+    # fields → hanya kolom itu yang di-decode (kolom lain tidak pernah dibangun)
+    rows = list(jsonl_io.iter_records(path, fields=fields, strict=True))
     return pd.DataFrame(rows)
 
-
-def flatten_value(val):
-    """
-    Bugzilla new structure has list fields (commit_messages, commit_refs, files_changed, keywords, depends_on).
-    This helper will make them joinable.
-    """
-    if val is None:
-        return ""
-    if isinstance(val, list):
-        # convert every item to str, then join
-        return " ".join(str(x) for x in val if x is not None)
-    # for non-list, just cast to str
-    return str(val)
+def iter_jsonl_chunks(path, chunk_rows, fields=None):
+    """Seperti load_jsonl tapi yield DataFrame per chunk_rows record (RAM tidak tergantung ukuran input)."""
+    it = jsonl_io.iter_records(path, fields=fields, strict=True)
+    while True:
+        rows = list(itertools.islice(it, chunk_rows))
+        if not rows:
+            return
+        yield pd.DataFrame(rows)
 
 
 def list_to_semicolon(val):
@@ -138,12 +143,189 @@ def list_to_semicolon(val):
         return ";".join(str(x) for x in val)
     return val
 
+def mem_mb():
+    """(RSS sekarang, peak RSS proses) dalam MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 if resource else 0.0
+    try:
+        with open("/proc/self/statm") as f:
+            rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1 << 20)
+    except Exception:
+        rss = peak
+    return rss, peak
+
+
+def clean_frame(df, text_cols, sw, workers=None, pool=None, native_lists=False, cache=None):
+    """
+    DataFrame bug mentah → tabel bugs_clean (kolom OUT_COLS). df diubah in-place (tanpa copy).
+    native_lists=True (output Parquet) → kolom list tidak di-join ';'.
+    cache = nlp_cache.CellCache → sel kolom yang di-cache tidak di-clean ulang (hasil sama).
+    """
+    # Ensure key cols exist
+    for col in BASE_COLS:
+        if col not in df.columns:
+            df[col] = None
+
+    # teks mentah per kolom (bukan per baris), lalu clean per batch di beberapa proses
+    if cache is not None:
+        df["clean_text"] = nlp_cache.clean_rows(df, text_cols, cache, workers=workers, pool=pool)
+    else:
+        raw_texts = nlp_clean.raw_texts(df, text_cols)
+        df["clean_text"] = nlp_clean.clean_texts(raw_texts, sw, workers=workers, pool=pool)
+        del raw_texts
+
+    # convert list-ish cols so CSV tetap enak dibaca
+    for col in ([] if native_lists else LIST_COLS):
+        if col in df.columns:
+            df[col] = df[col].apply(list_to_semicolon)
+
+    for c in OUT_COLS:
+        if c not in df.columns:
+            df[c] = None
+    return df[OUT_COLS]
+
+def run_stream(args, fields, text_cols, sw, out_path, cache=None):
+    """
+    Mode streaming: baca chunk_rows record → clean → append ke CSV / Parquet, chunk berikutnya.
+    Ditulis ke file .tmp lalu rename, jadi bugs_clean tidak pernah setengah jadi.
+    """
+    tmp_path = table_io.tmp_path(out_path)
+    native = table_io.fmt_of(out_path) == "parquet"
+    writer = table_io.TableWriter(tmp_path, OUT_KINDS)
+    total, t_start = 0, time.time()
+    pool = nlp_clean.make_pool(sw, args.workers)
+    try:
+        for k, df in enumerate(iter_jsonl_chunks(args.input, args.chunk_rows, fields=fields)):
+            t0 = time.time()
+            out = clean_frame(df, text_cols, sw, workers=args.workers, pool=pool, native_lists=native, cache=cache)
+            writer.write(out)
+            total += len(out)
+            rss, peak = mem_mb()
+            print(f"[NLP] chunk {k}: rows={len(out)} total={total} {time.time() - t0:.1f}s "
+                  f"rss={rss:.0f}MB peak={peak:.0f}MB")
+            del df, out
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    writer.close(columns=OUT_COLS)
+    os.replace(tmp_path, out_path)
+    print(f"[NLP] Stream done: rows={total} in {time.time() - t_start:.1f}s")
+
+
+def run_full(args, fields, text_cols, sw, out_path, cache=None):
+    if args.chunk_rows > 0:
+        print(f"[NLP] Streaming: {args.input} (chunk_rows={args.chunk_rows})")
+        run_stream(args, fields, text_cols, sw, out_path, cache)
+    else:
+        print(f"[NLP] Loading: {args.input}")
+        df = load_jsonl(args.input, fields=fields)
+        out = clean_frame(df, text_cols, sw, workers=args.workers,
+                          native_lists=table_io.fmt_of(out_path) == "parquet", cache=cache)
+        table_io.write_table(out, out_path, OUT_KINDS)
+
+def merge_clean_parquet(out_path, new, deleted):
+    """merge_clean_csv untuk bugs_clean.parquet: susun ulang baris lewat take() di tabel Arrow."""
+    pa, pq = table_io.arrow()
+    old = pq.read_table(out_path, memory_map=True)
+    new = table_io.to_arrow(new, OUT_KINDS).select(old.schema.names).cast(old.schema)
+    new_pos = {}
+    for j, i in enumerate(new.column("id").to_pylist()):
+        new_pos[str(i)] = old.num_rows + j   # duplikat id: yang terakhir menang
+    drop, replaced = set(deleted), set()
+    idx = []
+    for k, i in enumerate(old.column("id").to_pylist()):
+        i = str(i)
+        if i in drop:
+            continue
+        if i in new_pos:
+            replaced.add(i)
+            idx.append(new_pos[i])
+        else:
+            idx.append(k)
+    added = [p for i, p in new_pos.items() if i not in replaced]
+    merged = pa.concat_tables([old, new]).take(idx + sorted(added))
+    tmp_path = table_io.tmp_path(out_path)
+    pq.write_table(merged, tmp_path, compression=table_io.COMPRESSION)
+    os.replace(tmp_path, out_path)
+    return len(replaced), len(added)
+
+def merge_clean_csv(out_path, new, deleted, chunk_rows=100_000):
+    """
+    Gabung hasil clean baru ke bugs_clean.csv lama (dibaca per chunk, sebagai teks):
+    baris id yang berubah diganti di tempat, id yang hilang dari input dibuang, id baru di-append
+    di akhir. Baris lain ditulis ulang apa adanya. Return (replaced, added).
+    """
+    # lewat to_csv → read_csv teks supaya format nilai sama dengan yang ditulis run penuh
+    new = pd.read_csv(io.StringIO(new.to_csv(index=False)), dtype=str, keep_default_na=False)
+    new = new.drop_duplicates("id", keep="last").set_index("id", drop=False)
+    drop = set(deleted)
+    tmp_path = table_io.tmp_path(out_path)
+    replaced, first = set(), True
+    for chunk in pd.read_csv(out_path, dtype=str, keep_default_na=False, chunksize=chunk_rows):
+        ids = chunk["id"]
+        rep = ids.isin(new.index)
+        if rep.any():
+            replaced.update(ids[rep])
+            chunk.loc[rep, OUT_COLS] = new.loc[ids[rep], OUT_COLS].values
+        if drop:
+            chunk = chunk[~ids.isin(drop)]
+        chunk.to_csv(tmp_path, mode="w" if first else "a", header=first, index=False)
+        first = False
+    added = new[~new.index.isin(replaced)]
+    added.to_csv(tmp_path, mode="w" if first else "a", header=first, index=False)
+    os.replace(tmp_path, out_path)
+    return len(replaced), len(added)
+
+def run_incremental(args, fields, text_cols, sw, out_path, cache=None):
+    """
+    Hanya bug baru / berubah (fingerprint id + last_change_time atau hash isi) yang di-clean,
+    lalu di-merge ke bugs_clean.csv. Config beda (stopword, text cols, versi cleaner) → rebuild penuh.
+    """
+    conf = nlp_state.make_config(nlp_clean.CLEANER_VERSION, nlp_clean.stopwords_digest(sw),
+                                 text_cols, args.incremental_key, OUT_COLS, table_io.fmt_of(out_path))
+    st = nlp_state.NlpState(nlp_state.state_path(out_path))
+    try:
+        old = st.config()
+        if args.rebuild or old != conf or not os.path.exists(out_path):
+            if args.rebuild:
+                reason = "--rebuild"
+            elif old is None or not os.path.exists(out_path):
+                reason = "no previous state"
+            else:
+                reason = "config changed: " + ", ".join(k for k in conf if old.get(k) != conf[k])
+            print(f"[NLP] Incremental: full rebuild ({reason})")
+            run_full(args, fields, text_cols, sw, out_path, cache)
+            n = st.scan(jsonl_io.iter_records(args.input, fields=fields, strict=True),
+                        args.incremental_key, collect=False)
+            st.save(conf)
+            print(f"[NLP] Incremental: state saved for {n} bugs")
+            return
+
+        t0 = time.time()
+        changed, deleted = st.scan(jsonl_io.iter_records(args.input, fields=fields, strict=True),
+                                   args.incremental_key)
+        print(f"[NLP] Incremental: changed/new={len(changed)} deleted={len(deleted)} "
+              f"(scan {time.time() - t0:.1f}s, key={args.incremental_key})")
+        if changed or deleted:
+            native = table_io.fmt_of(out_path) == "parquet"
+            if changed:
+                new = clean_frame(pd.DataFrame(changed), text_cols, sw, workers=args.workers,
+                                  native_lists=native, cache=cache)
+            else:
+                new = pd.DataFrame(columns=OUT_COLS)
+            if native:
+                replaced, added = merge_clean_parquet(out_path, new, deleted)
+            else:
+                replaced, added = merge_clean_csv(out_path, new, deleted, args.chunk_rows or 100_000)
+            print(f"[NLP] Incremental: replaced={replaced} added={added} removed={len(deleted)}")
+        st.save(conf)
+    finally:
+        st.close()
 
 
 def main():
     parser = argparse.ArgumentParser(description="NLP preprocessing for EasyFix bug reports")
     # DEFAULT_DATASOURCE diambil dari .env atau fallback
-    parser.add_argument("--input", type=str, default=os.getenv("DATASOURCE", "datasource/bugs2.jsonl"), help="Path to Bugzilla JSONL")
+    parser.add_argument("--input", type=str, default=os.getenv("DATASOURCE", "datasource/bugs2.jsonl"), help="Path to Bugzilla JSONL / partitioned dataset dir")
     parser.add_argument("--outdir", type=str, default=os.getenv("PATH_NLP_OUT", "out_nlp"), help="Output directory")
     parser.add_argument(
         "--text-cols",
@@ -151,110 +333,48 @@ def main():
         default=os.getenv("NLP_TEXT_COLS", "summary,product,component,commit_messages,files_changed"),
         help="Comma-separated text columns to merge & clean"
     )
+    parser.add_argument("--workers", type=int, default=nlp_clean.WORKERS, help="Processes for text cleaning (1 = in-process)")
+    parser.add_argument("--chunk-rows", type=int, default=int(os.getenv("NLP_CHUNK_ROWS", "0")),
+                        help="Streaming: records per chunk, appended to CSV (0 = load all in memory)")
+    parser.add_argument("--incremental", action="store_true",
+                        default=os.getenv("NLP_INCREMENTAL", "0") not in ("0","false","False"),
+                        help="Only clean new/changed bugs and merge them into the existing bugs_clean.csv")
+    parser.add_argument("--incremental-key", choices=nlp_state.KEYS, default=os.getenv("NLP_INCREMENTAL_KEY", "hash"),
+                        help="Change detection: hash of the input fields used, or last_change_time (lct)")
+    parser.add_argument("--rebuild", action="store_true", help="Incremental: force a full rebuild")
+    parser.add_argument("--token-cache", action="store_true",
+                        default=os.getenv("NLP_CACHE", "0") not in ("0","false","False"),
+                        help="Cache cleaned text per cell of NLP_CACHE_COLS (same output, hit rates reported)")
+    parser.add_argument("--token-cache-db", type=str, default=os.getenv("NLP_CACHE_DB", ""),
+                        help="Token cache: persistent sqlite store reused across runs (empty = in-process only)")
     args = parser.parse_args()
 
     os.makedirs(args.outdir, exist_ok=True)
 
-    print(f"[NLP] Loading: {args.input}")
-    df = load_jsonl(args.input)
-
-    base_cols = [
-        "id",
-        "summary",
-        "creator",
-        "assigned_to",
-        "status",
-        "resolution",
-        "creation_time",
-        "last_change_time",
-        # new fields from your example
-        "product",
-        "component",
-        "keywords",
-        "depends_on",
-        "dupe_of",
-        "commit_messages",
-        "commit_refs",
-        "files_changed",
-        "url",
-    ]
-    
-    # Ensure key cols exist
-    for col in base_cols:
-        if col not in df.columns:
-            df[col] = None
-
-    ensure_nltk()
-    sw = build_stopwords()
-
     text_cols = [c.strip() for c in args.text_cols.split(",") if c.strip()]
     if not text_cols:
         text_cols = ["summary"]
+    # decode hanya kolom yang dipakai (base + text cols), field lain di JSONL dilewati
+    fields = BASE_COLS + [c for c in text_cols if c not in BASE_COLS]
 
-    clean_texts = []
-    for _, row in df.iterrows():
-        chunks = []
-        for c in text_cols:
-            if c not in df.columns:
-                continue
-            val = row.get(c)
-            if val is None:
-                continue
-            # handle list vs string
-            if isinstance(val, str):
-                if val.strip():
-                    chunks.append(val)
-            elif isinstance(val, list):
-                flat = flatten_value(val)
-                if flat.strip():
-                    chunks.append(flat)
-            else:
-                flat = str(val)
-                if flat.strip():
-                    chunks.append(flat)
-
-        # fallback: at least summary
-        if not chunks and isinstance(row.get("summary"), str):
-            chunks = [row.get("summary")]
-
-        raw = " ".join(chunks)
-        clean_texts.append(clean_text(raw, sw))
-
-    out = df.copy()
-    out["clean_text"] = clean_texts
+    sw = build_stopwords()
 
-    # convert list-ish cols so CSV tetap enak dibaca
-    for col in ["keywords", "depends_on", "commit_messages", "commit_refs", "files_changed"]:
-        if col in out.columns:
-            out[col] = out[col].apply(list_to_semicolon)
-
-    # Save a compact modeling table
-    cols = [
-        "id",
-        "clean_text",
-        "summary",
-        "product",
-        "component",
-        "creator",
-        "assigned_to",
-        "status",
-        "resolution",
-        "creation_time",
-        "last_change_time",
-        "keywords",
-        "depends_on",
-        "dupe_of",
-        "commit_messages",
-        "commit_refs",
-        "files_changed",
-        "url",
-    ]
-    for c in cols:
-        if c not in out.columns:
-            out[c] = None
-
-    out_path = os.path.join(args.outdir, "bugs_clean.csv")
-    out[cols].to_csv(out_path, index=False)
+    # bugs_clean.csv / bugs_clean.parquet (TABLE_FORMAT)
+    out_path = table_io.table_path(os.path.join(args.outdir, "bugs_clean.csv"))
+    cache = None
+    if args.token_cache:
+        cache_cols = [c.strip() for c in nlp_cache.CACHE_COLS.split(",") if c.strip()]
+        cache = nlp_cache.CellCache(sw, cols=cache_cols, db_path=args.token_cache_db or None)
+    try:
+        if args.incremental:
+            run_incremental(args, fields, text_cols, sw, out_path, cache)
+        else:
+            nlp_state.drop_state(out_path)
+            run_full(args, fields, text_cols, sw, out_path, cache)
+    finally:
+        if cache is not None:
+            print(cache.report())
+            cache.close()
     print(f"[NLP] Wrote {out_path}")
 
 if __name__ == "__main__":
@@ -2,7 +2,7 @@
 # -*- coding: utf-8 -*-
 """
 02_lda_topics.py  (cleaned)
-- Read CSV from 01_nlp_preprocess.py (bugs_clean.csv)
+- Read CSV / Parquet from 01_nlp_preprocess.py (bugs_clean.csv / bugs_clean.parquet, lihat table_io.py)
 - Train LDA (sklearn)
 - Export:
     1) topics.csv
@@ -13,15 +13,15 @@
     6) commit_commit_relations.csv
 """
 
-import os, argparse, warnings, sys, datetime, importlib.util, re
+import os, argparse, warnings, sys, re
 from typing import List, Set
 
 import numpy as np
 import pandas as pd
-from sklearn.feature_extraction.text import CountVectorizer
-from sklearn.decomposition import LatentDirichletAllocation
-from sklearn.model_selection import train_test_split
-from sklearn.neighbors import NearestNeighbors
+# sklearn (~2s import) di-import di fungsi yang memakainya
+
+import table_io
+import pipeline_log
 
 warnings.filterwarnings("ignore", category=FutureWarning)
 
@@ -63,22 +63,10 @@ DEFAULT_SIM_THRESHOLD = 0.60
 DEFAULT_DUP_THRESHOLD = 0.80
 
 
-# -------- load main.py ------
-def get_main_module():
-    """Dynamically load main.py so we can reuse its log_write()."""
-    here = os.path.dirname(os.path.abspath(__file__))
-    main_path = os.path.join(here, "main.py")
-    if not os.path.exists(main_path):
-        return None
-    spec = importlib.util.spec_from_file_location("main_module", main_path)
-    main_mod = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(main_mod)
-    return main_mod
-
-
 # ---------------------------- Core training ---------------------------- #
 
 def _build_vectorizer():
+    from sklearn.feature_extraction.text import CountVectorizer
     # clean_text sudah dipreproses; tokenisasi per kata
     return CountVectorizer(
         max_df=0.5,
@@ -88,6 +76,7 @@ def _build_vectorizer():
 
 
 def _fit_lda(X, n_components=10, max_iter=12, random_state=42):
+    from sklearn.decomposition import LatentDirichletAllocation
     lda = LatentDirichletAllocation(
         n_components=n_components,
         max_iter=max_iter,
@@ -101,6 +90,7 @@ def _fit_lda(X, n_components=10, max_iter=12, random_state=42):
 
 def _choose_k_auto(X, base_k=10, max_iter=12, random_state=42):
     """pilih K dengan perplexity di holdout"""
+    from sklearn.model_selection import train_test_split
     X_train, X_val = train_test_split(X, test_size=0.2, random_state=random_state, shuffle=True)
     ks = list(range(max(3, base_k - 4), base_k + 5))
     best_k, best_ppx, best_model = None, float("inf"), None
@@ -135,7 +125,7 @@ def export_topics_sklearn(lda_model, vocab, outdir, topn=12):
         top_idx = topic_vec.argsort()[:-topn-1:-1]
         terms = [str(vocab[i]) for i in top_idx]
         rows.append({"topic_id": k, "terms": ", ".join(terms)})
-    pd.DataFrame(rows).to_csv(os.path.join(outdir, "topics.csv"), index=False)
+    table_io.write_table(pd.DataFrame(rows), table_io.table_path(os.path.join(outdir, "topics.csv")))
 
 
 def export_bug_table(df, topic_mat, outdir):
@@ -144,12 +134,15 @@ def export_bug_table(df, topic_mat, outdir):
     out = df.copy()
     out["dominant_topic"] = dom_topic
     out["topic_score"] = np.round(dom_score, 4)
-    out.to_csv(os.path.join(outdir, "bugs_with_topics.csv"), index=False)
+    table_io.write_table(out, table_io.table_path(os.path.join(outdir, "bugs_with_topics.csv")))
 
 
 # ---------------------------- Relation helpers ---------------------------- #
 
 def _split_semicolon(val) -> List[str]:
+    # Parquet: kolom list native (list / array) → item langsung, tanpa split ';'
+    if isinstance(val, (list, tuple, np.ndarray)):
+        return [str(x).strip() for x in val if x is not None and str(x).strip()]
     if pd.isna(val) or val is None:
         return []
     if isinstance(val, float):
@@ -167,6 +160,7 @@ def export_bug_bug_relations(df: pd.DataFrame,
     (1) LDA-based similarity (similar / duplicate)
     (2) Explicit deps dari kolom 'depends_on' -> relation 'depends_on'
     """
+    from sklearn.neighbors import NearestNeighbors
     topic_mat = np.asarray(topic_mat, dtype=np.float32)
     radius = 1.0 - float(sim_th)  # cosine distance radius
     nbrs = NearestNeighbors(metric="cosine", radius=radius, algorithm="brute", n_jobs=-1)
@@ -175,22 +169,18 @@ def export_bug_bug_relations(df: pd.DataFrame,
     G.data = 1.0 - G.data  # distance -> similarity
 
     ids = df["id"].to_numpy() if "id" in df.columns else np.arange(len(df))
-    out_path = os.path.join(outdir, "bug_bug_relations.csv")
-    with open(out_path, "w", encoding="utf-8") as f:
-        f.write("bug_id_source,bug_id_target,score,relation,source\n")
+    out_path = table_io.table_path(os.path.join(outdir, "bug_bug_relations.csv"))
+    w = table_io.RowWriter(out_path, ["bug_id_source", "bug_id_target", "score", "relation", "source"],
+                           ["int", "int", "float", "str", "str"],
+                           csv_fmt={"score": lambda s: f"{s:.4f}"}, batch_rows=chunk_flush)
 
-    buf = []
     rows, cols = G.nonzero()
     data = G.data
     for i, j, s in zip(rows, cols, data):
         if j <= i:
             continue
         relation = "duplicate" if s >= dup_th else "similar"
-        buf.append(f"{int(ids[i])},{int(ids[j])},{s:.4f},{relation},lda_radius")
-        if len(buf) >= chunk_flush:
-            with open(out_path, "a", encoding="utf-8") as f:
-                f.write("\n".join(buf) + "\n")
-            buf.clear()
+        w.add(int(ids[i]), int(ids[j]), s, relation, "lda_radius")
 
     # explicit depends_on dari file NLP
     if "depends_on" in df.columns:
@@ -203,19 +193,15 @@ def export_bug_bug_relations(df: pd.DataFrame,
                     dep_id = int(dep)
                 except ValueError:
                     continue
-                buf.append(f"{int(src_id)},{dep_id},1.0000,depends_on,bugzilla_field")
+                w.add(int(src_id), dep_id, 1.0, "depends_on", "bugzilla_field")
 
-    if buf:
-        with open(out_path, "a", encoding="utf-8") as f:
-            f.write("\n".join(buf) + "\n")
+    w.close()
 
 
 def export_bug_developer_relations(df: pd.DataFrame, outdir: str):
-    out_path = os.path.join(outdir, "bug_developer_relations.csv")
-    with open(out_path, "w", encoding="utf-8") as f:
-        f.write("bug_id,developer_id,role,source\n")
+    out_path = table_io.table_path(os.path.join(outdir, "bug_developer_relations.csv"))
+    w = table_io.RowWriter(out_path, ["bug_id", "developer_id", "role", "source"], ["int", "str", "str", "str"])
 
-    rows = []
     for _, row in df.iterrows():
         bug_id = int(row["id"]) if "id" in row and not pd.isna(row["id"]) else None
         if bug_id is None:
@@ -223,15 +209,13 @@ def export_bug_developer_relations(df: pd.DataFrame, outdir: str):
 
         creator = row.get("creator")
         if isinstance(creator, str) and creator.strip():
-            rows.append(f"{bug_id},{creator.strip()},creator,bug_fields")
+            w.add(bug_id, creator.strip(), "creator", "bug_fields")
 
         assigned = row.get("assigned_to")
         if isinstance(assigned, str) and assigned.strip():
-            rows.append(f"{bug_id},{assigned.strip()},assigned_to,bug_fields")
+            w.add(bug_id, assigned.strip(), "assigned_to", "bug_fields")
 
-    if rows:
-        with open(out_path, "a", encoding="utf-8") as f:
-            f.write("\n".join(rows) + "\n")
+    w.close()
 
 
 _commit_rev_regex = re.compile(r"/rev/([0-9a-fA-F]+)$")
@@ -257,11 +241,9 @@ def export_bug_commit_relations(df: pd.DataFrame, outdir: str):
       - commit_messages (dibikin pseudo id)
       - files_changed (dibikin pseudo id)
     """
-    out_path = os.path.join(outdir, "bug_commit_relations.csv")
-    with open(out_path, "w", encoding="utf-8") as f:
-        f.write("bug_id,commit_id,source,raw_value\n")
+    out_path = table_io.table_path(os.path.join(outdir, "bug_commit_relations.csv"))
+    w = table_io.RowWriter(out_path, ["bug_id", "commit_id", "source", "raw_value"], ["int", "str", "str", "str"])
 
-    rows = []
     for _, row in df.iterrows():
         bug_id = int(row["id"]) if "id" in row and not pd.isna(row["id"]) else None
         if bug_id is None:
@@ -271,21 +253,19 @@ def export_bug_commit_relations(df: pd.DataFrame, outdir: str):
         for c in _split_semicolon(row.get("commit_refs")):
             cid = _normalize_commit_id(c)
             if cid:
-                rows.append(f"{bug_id},{cid},commit_refs,{c}")
+                w.add(bug_id, cid, "commit_refs", c)
 
         # 2) commit_messages
         for m in _split_semicolon(row.get("commit_messages")):
             cid = "msg_" + _normalize_commit_id(m[:50])
-            rows.append(f"{bug_id},{cid},commit_messages,{m}")
+            w.add(bug_id, cid, "commit_messages", m)
 
         # 3) files_changed
         for file_path in _split_semicolon(row.get("files_changed")):
             cid = "file_" + _normalize_commit_id(file_path)
-            rows.append(f"{bug_id},{cid},files_changed,{file_path}")
+            w.add(bug_id, cid, "files_changed", file_path)
 
-    if rows:
-        with open(out_path, "a", encoding="utf-8") as f:
-            f.write("\n".join(rows) + "\n")
+    w.close()
 
 
 def export_commit_commit_relations(df: pd.DataFrame, outdir: str):
@@ -293,11 +273,10 @@ def export_commit_commit_relations(df: pd.DataFrame, outdir: str):
     commit-commit co-occurs:
     kalau 2 commit muncul di 1 bug yang sama → relasi
     """
-    out_path = os.path.join(outdir, "commit_commit_relations.csv")
-    with open(out_path, "w", encoding="utf-8") as f:
-        f.write("commit_id_source,commit_id_target,relation,score,source\n")
+    out_path = table_io.table_path(os.path.join(outdir, "commit_commit_relations.csv"))
+    w = table_io.RowWriter(out_path, ["commit_id_source", "commit_id_target", "relation", "score", "source"],
+                           ["str", "str", "str", "float", "str"])
 
-    buf = []
     for _, row in df.iterrows():
         commits: Set[str] = set()
         for src_col in ("commit_refs", "commit_messages", "files_changed"):
@@ -316,11 +295,9 @@ def export_commit_commit_relations(df: pd.DataFrame, outdir: str):
             for j in range(i + 1, len(commits)):
                 c1 = commits[i]
                 c2 = commits[j]
-                buf.append(f"{c1},{c2},co_occurs,1.0,bug_row")
+                w.add(c1, c2, "co_occurs", 1.0, "bug_row")
 
-    if buf:
-        with open(out_path, "a", encoding="utf-8") as f:
-            f.write("\n".join(buf) + "\n")
+    w.close()
 
 
 # ---------------------------- CLI ---------------------------- #
@@ -344,30 +321,18 @@ def main():
     os.makedirs(args.outdir, exist_ok=True)
 
     # --- init logging ---
-    main_mod = get_main_module()
-    log_fh = None
-    log_write = print  # fallback
-
-    if main_mod and hasattr(main_mod, "log_write"):
-        log_write = main_mod.log_write
-        if args.log_path:
-            try:
-                log_fh = open(args.log_path, "a", encoding="utf-8")
-            except Exception as e:
-                print(f"[WARN] Could not open log file: {e}")
-        else:
-            # fallback kalau dipanggil langsung
-            date_str = datetime.datetime.now().strftime("%Y-%m-%d")
-            log_path = os.path.join(os.getcwd(), f"log_{date_str}.txt")
-            try:
-                log_fh = open(log_path, "a", encoding="utf-8")
-            except Exception as e:
-                print(f"[WARN] Could not open default log: {e}")
+    log_write = pipeline_log.log_write
+    # fallback kalau dipanggil langsung: log_YYYY-MM-DD.txt di CWD
+    log_fh = pipeline_log.open_log(args.log_path or pipeline_log.default_log_path(os.getcwd()))
 
     log_write(log_fh, f"[LDA] === Starting LDA ===")
     log_write(log_fh, f"[LDA] input={args.input} outdir={args.outdir} num_topics={args.num_topics}")
 
-    df = pd.read_csv(args.input)
+    in_path = table_io.find_table(args.input)
+    if in_path is None:
+        log_write(log_fh, f"[LDA][ERROR] Input not found: {args.input}")
+        sys.exit(1)
+    df = table_io.read_table(in_path)
     if "clean_text" not in df.columns:
         log_write(log_fh, "[LDA][ERROR] Missing 'clean_text' column")
         sys.exit(1)
@@ -11,11 +11,13 @@ Usage:
 Notes:
 - If --labels_json is provided, it should contain: {"0": "Label for topic 0", "1": "...", ...}
 - If labels are not provided, script auto-generates labels from clean terms with simple heuristics.
+- Input / output .csv atau .parquet (TABLE_FORMAT, lihat table_io.py); path .csv otomatis
+  diarahkan ke .parquet yang ada.
 """
 
 import os, argparse, json
 
-import pandas as pd
+import table_io
 
 DEFAULT_NOISE = {
     # generic words
@@ -109,7 +111,10 @@ def main():
     os.makedirs(args.outdir, exist_ok=True)
 
     # Load topics
-    topics = pd.read_csv(args.topics)
+    topics_path = table_io.find_table(args.topics)
+    if topics_path is None:
+        raise FileNotFoundError(args.topics)
+    topics = table_io.read_table(topics_path)
     if "topic_id" not in topics.columns or "terms" not in topics.columns:
         raise ValueError("topics.csv must contain columns: topic_id, terms")
 
@@ -127,12 +132,15 @@ def main():
             labels.append(auto_label_from_terms(row["clean_terms"]))
     topics["topic_label"] = labels
 
-    out_topics = os.path.join(args.outdir, "topics_cleaned.csv")
-    topics.to_csv(out_topics, index=False)
+    out_topics = table_io.table_path(os.path.join(args.outdir, "topics_cleaned.csv"))
+    table_io.write_table(topics, out_topics)
     print(f"[CLEAN] Wrote {out_topics}")
 
     # Load bugs and merge labels
-    bugs = pd.read_csv(args.bugs)
+    bugs_path = table_io.find_table(args.bugs)
+    if bugs_path is None:
+        raise FileNotFoundError(args.bugs)
+    bugs = table_io.read_table(bugs_path)
     if "dominant_topic" not in bugs.columns:
         raise ValueError("bugs_with_topics.csv must contain 'dominant_topic' column")
 
@@ -144,8 +152,8 @@ def main():
     )
     merged["topic_label"] = merged["topic_label"].fillna("Unknown")
 
-    out_bugs = os.path.join(args.outdir, "bugs_with_labels.csv")
-    merged.to_csv(out_bugs, index=False)
+    out_bugs = table_io.table_path(os.path.join(args.outdir, "bugs_with_labels.csv"))
+    table_io.write_table(merged, out_bugs)
     print(f"[CLEAN] Wrote {out_bugs}")
 
     # Summary
@@ -5,23 +5,12 @@
 - Store hasil LDA ke Neo4j
 - Skip kalau data sudah ada di Neo4j
 - Robust baca CSV (bug-commit & commit-commit) kalau ada koma di tengah
+- Relasi .parquet (TABLE_FORMAT=parquet) dibaca bertipe per kolom, tanpa parser longgar
 """
 
-import os, sys, argparse, importlib.util, csv
-import datetime
-import pandas as pd
-
-
-# ---------- helper ambil log dari main.py ----------
-def get_main_module():
-    here = os.path.dirname(os.path.abspath(__file__))
-    main_path = os.path.join(here, "main.py")
-    if not os.path.exists(main_path):
-        return None
-    spec = importlib.util.spec_from_file_location("main_module", main_path)
-    main_mod = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(main_mod)
-    return main_mod
+import os, sys, argparse, csv
+import table_io
+import pipeline_log
 
 
 # ---------- koneksi ----------
@@ -221,11 +210,42 @@ def read_commit_commit_csv_loose(path: str):
             })
     return rows
 
+
+def read_bug_commit_table(path: str):
+    """bug_commit_relations.parquet → rows sama seperti read_bug_commit_csv_loose."""
+    rows = []
+    for chunk in table_io.iter_table(path, columns=["bug_id", "commit_id", "source", "raw_value"]):
+        for bug_id, commit_id, source, raw in chunk.itertuples(index=False, name=None):
+            rows.append({
+                "bug_id": str(bug_id),
+                "commit_id": str(commit_id).strip(),
+                "source": str(source).strip(),
+                "raw_value": "" if raw is None else str(raw).strip(),
+            })
+    return rows
+
+
+def read_commit_commit_table(path: str):
+    """commit_commit_relations.parquet → rows sama seperti read_commit_commit_csv_loose."""
+    cols = ["commit_id_source", "commit_id_target", "relation", "score", "source"]
+    rows = []
+    for chunk in table_io.iter_table(path, columns=cols):
+        for c1, c2, relation, score, source in chunk.itertuples(index=False, name=None):
+            rows.append({
+                "c1": str(c1),
+                "c2": str(c2),
+                "relation": relation or "co_occurs",
+                "score": 1.0 if score is None or score != score else float(score),
+                "source": source or "bug_row",
+            })
+    return rows
+
 # ---------- importers (batched) ----------
 def import_bug_bug(session, path, log_write, log_fh, batch_size=1000):
     log_write(log_fh, f"[NEO4J] importing bug-bug from {path}")
     total = 0
-    for chunk in pd.read_csv(path, chunksize=batch_size):
+    cols = ["bug_id_source", "bug_id_target", "relation", "score", "source"]
+    for chunk in table_io.iter_table(path, batch_size, columns=cols):
         rows = []
         for _, r in chunk.iterrows():
             src = _to_int_or_str(r["bug_id_source"])
@@ -268,7 +288,8 @@ def import_bug_bug(session, path, log_write, log_fh, batch_size=1000):
 def import_bug_developer(session, path, log_write, log_fh, batch_size=1000):
     log_write(log_fh, f"[NEO4J] importing bug-developer from {path}")
     total = 0
-    for chunk in pd.read_csv(path, chunksize=batch_size):
+    cols = ["bug_id", "developer_id", "role", "source"]
+    for chunk in table_io.iter_table(path, batch_size, columns=cols):
         rows = []
         for _, r in chunk.iterrows():
             bug_id = _to_int_or_str(r["bug_id"])
@@ -312,8 +333,12 @@ def import_bug_commit(session, path, log_write, log_fh, batch_size=1000):
     Format ideal: bug_id,commit_id,source,raw_value
     Tapi kalau ada koma di raw_value → kolom 4+ kita gabung.
     """
-    log_write(log_fh, f"[NEO4J] importing bug-commit from {path} (loose parser)")
-    rows = read_bug_commit_csv_loose(path)   # <--- SELALU pakai ini
+    if table_io.fmt_of(path) == "parquet":
+        log_write(log_fh, f"[NEO4J] importing bug-commit from {path}")
+        rows = read_bug_commit_table(path)
+    else:
+        log_write(log_fh, f"[NEO4J] importing bug-commit from {path} (loose parser)")
+        rows = read_bug_commit_csv_loose(path)   # <--- SELALU pakai ini untuk CSV
     total = 0
 
     for i in range(0, len(rows), batch_size):
@@ -333,8 +358,12 @@ def import_bug_commit(session, path, log_write, log_fh, batch_size=1000):
 
 
 def import_commit_commit(session, path, log_write, log_fh, batch_size=1000):
-    log_write(log_fh, f"[NEO4J] importing commit-commit from {path} (loose parser)")
-    rows = read_commit_commit_csv_loose(path)
+    if table_io.fmt_of(path) == "parquet":
+        log_write(log_fh, f"[NEO4J] importing commit-commit from {path}")
+        rows = read_commit_commit_table(path)
+    else:
+        log_write(log_fh, f"[NEO4J] importing commit-commit from {path} (loose parser)")
+        rows = read_commit_commit_csv_loose(path)
     total = 0
 
     for i in range(0, len(rows), batch_size):
@@ -364,17 +393,8 @@ def main():
     parser.add_argument("--log_path", type=str, default=None)
     args = parser.parse_args()
 
-    main_mod = get_main_module()
-    log_fh = None
-    log_write = print
-    if main_mod and hasattr(main_mod, "log_write"):
-        log_write = main_mod.log_write
-
-    if args.log_path:
-        try:
-            log_fh = open(args.log_path, "a", encoding="utf-8")
-        except Exception:
-            log_fh = None
+    log_write = pipeline_log.log_write
+    log_fh = pipeline_log.open_log(args.log_path) if args.log_path else None
 
     db_name = args.neo4j_db or os.getenv("NEO4J_DB") or "neo4j"
     log_write(log_fh, "[NEO4J] === Store to database started ===")
@@ -401,37 +421,37 @@ def main():
     # imports
     with driver.session(database=db_name) as session:
         # 1) bug-bug
-        p = os.path.join(args.in_lda, "bug_bug_relations.csv")
+        p = table_io.find_table(os.path.join(args.in_lda, "bug_bug_relations.csv"))
         if neo4j_has_bug_bug(session):
             log_write(log_fh, "[NEO4J] bug-bug relations already exist — skip.")
-        elif os.path.exists(p):
+        elif p:
             import_bug_bug(session, p, log_write, log_fh)
         else:
             log_write(log_fh, "[NEO4J] bug_bug_relations.csv not found — skip.")
 
         # 2) bug-developer
-        p = os.path.join(args.in_lda, "bug_developer_relations.csv")
+        p = table_io.find_table(os.path.join(args.in_lda, "bug_developer_relations.csv"))
         if neo4j_has_bug_developer(session):
             log_write(log_fh, "[NEO4J] bug-developer relations already exist — skip.")
-        elif os.path.exists(p):
+        elif p:
             import_bug_developer(session, p, log_write, log_fh)
         else:
             log_write(log_fh, "[NEO4J] bug_developer_relations.csv not found — skip.")
 
         # 3) bug-commit
-        p = os.path.join(args.in_lda, "bug_commit_relations.csv")
+        p = table_io.find_table(os.path.join(args.in_lda, "bug_commit_relations.csv"))
         if neo4j_has_bug_commit(session):
             log_write(log_fh, "[NEO4J] bug-commit relations already exist — skip.")
-        elif os.path.exists(p):
+        elif p:
             import_bug_commit(session, p, log_write, log_fh)
         else:
             log_write(log_fh, "[NEO4J] bug_commit_relations.csv not found — skip.")
 
         # 4) commit-commit
-        p = os.path.join(args.in_lda, "commit_commit_relations.csv")
+        p = table_io.find_table(os.path.join(args.in_lda, "commit_commit_relations.csv"))
         if neo4j_has_commit_commit(session):
             log_write(log_fh, "[NEO4J] commit-commit relations already exist — skip.")
-        elif os.path.exists(p):
+        elif p:
             import_commit_commit(session, p, log_write, log_fh)
         else:
             log_write(log_fh, "[NEO4J] commit_commit_relations.csv not found — skip.")
@@ -0,0 +1,140 @@
+"""
+bench_jsonl_io.py
+Benchmark jsonl_io vs json stdlib per baris (kode lama) di file JSONL sintetis.
+
+  python bench_jsonl_io.py                 # file 1 GB di temp dir
+  python bench_jsonl_io.py --mb 200        # lebih kecil
+  python bench_jsonl_io.py --path datasource/bugs.jsonl   # file yang sudah ada (read saja)
+
+Yang diukur:
+- read  : json.loads per baris  vs  jsonl_io.iter_records
+- schema: decode terproyeksi ke kolom NLP (01_nlp_preprocess) / hanya id (resume)
+- write : json.dumps + write per baris  vs  JsonlWriter (bytes, batch)
+"""
+import os, sys, json, time, random, argparse, tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+import jsonl_io
+
+NLP_FIELDS = ("id", "summary", "creator", "assigned_to", "status", "resolution", "creation_time",
+              "last_change_time", "product", "component", "keywords", "depends_on", "dupe_of",
+              "commit_messages", "commit_refs", "files_changed", "url")
+
+
+def make_bug(i, rnd):
+    files = [f"dom/base/nsFile{rnd.randint(0, 9999)}.cpp" for _ in range(rnd.randint(0, 6))]
+    return {
+        "id": 1_000_000 + i,
+        "summary": f"Crash in nsDocShell::LoadURI when navigating — ünïcode #{i}",
+        "status": rnd.choice(["NEW", "RESOLVED", "VERIFIED"]),
+        "resolution": rnd.choice(["", "FIXED", "DUPLICATE"]),
+        "product": rnd.choice(["Core", "Firefox", "Toolkit"]),
+        "component": rnd.choice(["DOM: Core & HTML", "Layout", "Networking"]),
+        "creation_time": f"2024-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}T10:00:00Z",
+        "last_change_time": "2024-12-01T10:00:00Z",
+        "creator": "dev@example.org", "assigned_to": "nobody@mozilla.org",
+        "keywords": ["crash", "regression"][:rnd.randint(0, 2)],
+        "url": "",
+        "depends_on": [rnd.randint(1, 10 ** 6) for _ in range(rnd.randint(0, 3))],
+        "dupe_of": None,
+        "commit_messages": [f"Bug {1_000_000 + i} - part {k}: fix load path, r=reviewer" for k in range(rnd.randint(0, 4))],
+        "commit_refs": [f"https://hg.mozilla.org/integration/autoland/rev/{rnd.getrandbits(160):040x}"
+                        for _ in range(rnd.randint(0, 3))],
+        "files_changed": files,
+        "file_code": [{"path": p, "directory": p.rsplit("/", 1)[0], "filename": p.rsplit("/", 1)[1],
+                       "ext": "cpp", "raw_url": f"https://hg.mozilla.org/mozilla-central/raw-file/tip/{p}"}
+                      for p in files],
+    }
+
+def make_file(path, mb):
+    rnd = random.Random(7)
+    target = mb << 20
+    size, i = 0, 0
+    with jsonl_io.JsonlWriter(path, "w") as w:
+        while size < target:
+            line = json.dumps(make_bug(i, rnd), ensure_ascii=False) + "\n"
+            w.write_line(line)
+            size += len(line.encode("utf-8"))
+            i += 1
+    return i
+
+
+def timed(label, fn, size):
+    t0 = time.perf_counter()
+    n = fn()
+    dt = time.perf_counter() - t0
+    print(f"{label:<44} rows={n:>9}  {dt:7.2f}s  {size / dt / 1e6:7.1f} MB/s")
+    return dt
+
+def read_stdlib(path):
+    n = 0
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line: continue
+            json.loads(line); n += 1
+    return n
+
+def read_io(path, fields=None):
+    n = 0
+    for _ in jsonl_io.iter_records(path, fields=fields):
+        n += 1
+    return n
+
+def load_rows(path, limit):
+    rows = []
+    for r in jsonl_io.iter_records(path):
+        rows.append(r)
+        if len(rows) >= limit: break
+    return rows
+
+def write_stdlib(path, rows):
+    with open(path, "w", encoding="utf-8") as f:
+        for r in rows:
+            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+    return len(rows)
+
+def write_io(path, rows):
+    return jsonl_io.write_jsonl(path, rows)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark jsonl_io vs json stdlib")
+    ap.add_argument("--mb", type=int, default=1024, help="ukuran file sintetis (MB)")
+    ap.add_argument("--path", help="pakai file JSONL yang sudah ada (tidak dihapus)")
+    ap.add_argument("--write-rows", type=int, default=200_000, help="jumlah record untuk benchmark write")
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    path = args.path
+    if not path:
+        path = os.path.join(tmp, "bugs.jsonl")
+        t0 = time.perf_counter()
+        n = make_file(path, args.mb)
+        print(f"generated {n} bugs in {time.perf_counter() - t0:.1f}s")
+    size = os.path.getsize(path)
+    print(f"file={path} size={size / 1e6:.0f}MB backend={jsonl_io.BACKEND} "
+          f"msgspec={'yes' if jsonl_io.msgspec else 'no'}")
+
+    t_old = timed("read  json.loads per baris (lama)", lambda: read_stdlib(path), size)
+    t_new = timed(f"read  jsonl_io.iter_records ({jsonl_io.BACKEND})", lambda: read_io(path), size)
+    t_nlp = timed("read  schema NLP (01_nlp_preprocess)", lambda: read_io(path, NLP_FIELDS), size)
+    t_id = timed("read  schema id saja (resume)", lambda: read_io(path, ("id",)), size)
+    print(f"speedup read: {t_old / t_new:.1f}x   schema NLP: {t_old / t_nlp:.1f}x   id: {t_old / t_id:.1f}x")
+
+    rows = load_rows(path, args.write_rows)
+    w_size = sum(len(jsonl_io.encode_line(r)) for r in rows)
+    out_old, out_new = os.path.join(tmp, "w_old.jsonl"), os.path.join(tmp, "w_new.jsonl")
+    w_old = timed("write json.dumps + write per baris (lama)", lambda: write_stdlib(out_old, rows), w_size)
+    w_new = timed("write JsonlWriter (batch)", lambda: write_io(out_new, rows), w_size)
+    same = [json.loads(l) for l in open(out_old, encoding="utf-8")] == list(jsonl_io.iter_records(out_new))
+    print(f"speedup write: {w_old / w_new:.1f}x   same records: {same}")
+
+    for p in (out_old, out_new) + (() if args.path else (path,)):
+        os.remove(p)
+    os.rmdir(tmp)
+
+if __name__ == "__main__":
+    main()
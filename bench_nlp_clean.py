@@ -0,0 +1,144 @@
+"""
+bench_nlp_clean.py
+Benchmark cleaning teks 01_nlp_preprocess: loop lama (df.iterrows + clean_text per baris)
+vs nlp_clean (raw_texts per kolom + clean_texts batch multi-proses), plus cache sel / item nlp_cache
+(NLP_CACHE_COLS; cache kosong, cache terisi, cache dari store sqlite). Output dicek identik.
+
+  python bench_nlp_clean.py                  # 1M bug sintetis
+  python bench_nlp_clean.py --n 200000 --workers 4
+  python bench_nlp_clean.py --input datasource/bug_with_commit_messages.jsonl
+  python bench_nlp_clean.py --no-old            # lewati loop lama (lambat)
+  NLP_CACHE_COLS=product,component,files_changed python bench_nlp_clean.py --no-old
+"""
+import os, sys, time, random, argparse, tempfile, importlib.util
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+import pandas as pd
+import jsonl_io
+import nlp_clean
+import nlp_cache
+
+TEXT_COLS = ["summary", "product", "component", "commit_messages", "files_changed"]
+
+WORDS = ("crash when loading page with large table layout reflow scroll event listener memory leak "
+         "regression startup slow rendering font canvas webgl video audio network cache cookie "
+         "permission dialog menu toolbar bookmark history download update addon extension").split()
+
+def make_df(n, rnd):
+    rows = []
+    for i in range(n):
+        bid = 1_000_000 + i
+        words = " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(4, 14)))
+        rows.append({
+            "id": bid,
+            "summary": f"{words.capitalize()} (see https://example.org/b/{bid}?x=1) — Bug #{bid}",
+            "product": rnd.choice(["Core", "Firefox", "Toolkit", "DevTools"]),
+            "component": rnd.choice(["DOM: Core & HTML", "Layout", "Networking", "Graphics: WebRender"]),
+            "commit_messages": [f"Bug {bid} - part {k}: {rnd.choice(WORDS)} {rnd.choice(WORDS)} fix, "
+                                f"r=reviewer {rnd.getrandbits(48):012x}" for k in range(rnd.randint(0, 3))],
+            "files_changed": [f"dom/base/ns{rnd.choice(WORDS).capitalize()}{rnd.randint(0, 50)}.cpp"
+                              for _ in range(rnd.randint(0, 4))],
+        })
+    return pd.DataFrame(rows)
+
+def load_stopwords():
+    spec = importlib.util.spec_from_file_location("nlp01", os.path.join(HERE, "01_nlp_preprocess.py"))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    try:
+        return mod.build_stopwords(), "nltk"
+    except (ImportError, LookupError):
+        # tanpa corpus NLTK: hanya bagian stopword non-NLTK (cukup untuk perbandingan)
+        sw = {"error","issue","bug","fix","fixed","problem","invalid","message","crash",
+              "firefox","mozilla","general","component","please","thanks",
+              "step","steps","reproduce","expected","actual"} | set("abcdefghijklmnopqrstuvwxyz")
+        return sw, "builtin"
+
+def old_clean(df, text_cols, sw):
+    """Loop lama 01_nlp_preprocess.main."""
+    clean_texts = []
+    for _, row in df.iterrows():
+        chunks = []
+        for c in text_cols:
+            if c not in df.columns:
+                continue
+            val = row.get(c)
+            if val is None:
+                continue
+            if isinstance(val, str):
+                if val.strip():
+                    chunks.append(val)
+            elif isinstance(val, list):
+                flat = nlp_clean.flatten_value(val)
+                if flat.strip():
+                    chunks.append(flat)
+            else:
+                flat = str(val)
+                if flat.strip():
+                    chunks.append(flat)
+        if not chunks and isinstance(row.get("summary"), str):
+            chunks = [row.get("summary")]
+        clean_texts.append(nlp_clean.clean_text(" ".join(chunks), sw))
+    return clean_texts
+
+def new_clean(df, text_cols, sw, workers):
+    return nlp_clean.clean_texts(nlp_clean.raw_texts(df, text_cols), sw, workers=workers)
+
+def cached_clean(df, text_cols, cache, workers):
+    t0 = time.perf_counter()
+    out = nlp_cache.clean_rows(df, text_cols, cache, workers=workers)
+    return out, time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark nlp_clean vs loop iterrows lama")
+    ap.add_argument("--n", type=int, default=1_000_000, help="jumlah bug sintetis")
+    ap.add_argument("--input", help="pakai JSONL / dataset yang sudah ada")
+    ap.add_argument("--workers", type=int, default=nlp_clean.WORKERS)
+    ap.add_argument("--no-old", action="store_true", help="lewati loop iterrows lama")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    if args.input:
+        df = pd.DataFrame(list(jsonl_io.iter_records(args.input, fields=["id"] + TEXT_COLS)))
+    else:
+        df = make_df(args.n, random.Random(11))
+    sw, sw_src = load_stopwords()
+    print(f"rows={len(df)} load={time.perf_counter() - t0:.1f}s stopwords={sw_src}({len(sw)}) "
+          f"workers={args.workers} cpus={os.cpu_count()}")
+
+    if not args.no_old:
+        t0 = time.perf_counter()
+        old = old_clean(df, TEXT_COLS, sw)
+        t_old = time.perf_counter() - t0
+        print(f"old  iterrows + clean_text   {t_old:8.2f}s  {len(df) / t_old:10.0f} rows/s")
+
+    t0 = time.perf_counter()
+    new = new_clean(df, TEXT_COLS, sw, args.workers)
+    t_new = time.perf_counter() - t0
+    print(f"new  nlp_clean.clean_texts   {t_new:8.2f}s  {len(df) / t_new:10.0f} rows/s")
+    if not args.no_old:
+        print(f"speedup: {t_old / t_new:.1f}x   identical: {old == new}")
+
+    # lru cold = cache kosong, lru warm = cache yang sama lagi (chunk berikutnya / run streaming),
+    # db warm = cache baru dari store sqlite yang diisi run sebelumnya
+    cols = [c.strip() for c in nlp_cache.CACHE_COLS.split(",") if c.strip()]
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "nlp_cache.sqlite")
+        cache = nlp_cache.CellCache(sw, cols=cols, db_path=db_path)
+        runs = [("lru cold", cache), ("lru warm", cache)]
+        for label, c in runs + [("db warm", None)]:
+            if c is None:
+                cache.close()
+                c = nlp_cache.CellCache(sw, cols=cols, db_path=db_path)
+            c.reset_stats()
+            out, t = cached_clean(df, TEXT_COLS, c, args.workers)
+            print(f"{label:9s} nlp_cache.clean_rows {t:8.2f}s  {len(df) / t:10.0f} rows/s  "
+                  f"vs new: {t_new / t:.2f}x   identical: {out == new}")
+            print(c.report())
+        c.close()
+
+if __name__ == "__main__":
+    main()
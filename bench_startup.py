@@ -0,0 +1,84 @@
+"""
+bench_startup.py
+Benchmark startup per stage: waktu load modul (tanpa menjalankan main()) dan import terberat
+dari `python -X importtime`, tiap stage di proses baru. 01 juga mengukur build_stopwords()
+(ensure_nltk + build_stopwords: stopword beku vs import NLTK).
+
+  python bench_startup.py
+  python bench_startup.py --repo /tmp/easyfix_old      # bandingkan dengan checkout lain
+  python bench_startup.py --top 5 --repeat 5
+"""
+import os, sys, time, argparse, subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+STAGES = ("main.py", "01_nlp_preprocess.py", "02_lda_topics.py",
+          "03_clean_topics.py", "03_store_to_database.py")
+
+# selalu di-import interpreter, bukan oleh stage
+STARTUP = {"site", "encodings", "zipimport", "codecs", "io", "abc", "_frozen_importlib_external"}
+
+# load file stage sebagai modul (bukan __main__) → main() tidak jalan
+PROBE = r"""
+import sys, time, importlib.util
+repo, stage, sw = sys.argv[1], sys.argv[2], sys.argv[3] == "1"
+sys.path.insert(0, repo)
+t0 = time.perf_counter()
+spec = importlib.util.spec_from_file_location("stage", f"{repo}/{stage}")
+mod = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(mod)
+t_load = time.perf_counter() - t0
+t_sw = -1.0
+if sw and hasattr(mod, "build_stopwords"):
+    t0 = time.perf_counter()
+    if hasattr(mod, "ensure_nltk"):     # versi lama: cek / download corpus NLTK dulu
+        mod.ensure_nltk()
+    mod.build_stopwords()
+    t_sw = time.perf_counter() - t0
+print(f"@@ {t_load:.4f} {t_sw:.4f}")
+"""
+
+def probe(repo, stage, stopwords=False):
+    """(load s, build_stopwords s atau None, {top-level import: kumulatif s})"""
+    r = subprocess.run([sys.executable, "-X", "importtime", "-c", PROBE, repo, stage,
+                        "1" if stopwords else "0"],
+                       cwd=repo, capture_output=True, text=True)
+    line = next((l for l in r.stdout.splitlines() if l.startswith("@@ ")), None)
+    if line is None:
+        raise RuntimeError(f"{stage} gagal di-load: {r.stderr.strip().splitlines()[-1:]}")
+    t_load, t_sw = map(float, line.split()[1:])
+    imports = {}
+    for l in r.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not l.startswith("import time:") or "cumulative" in l:
+            continue
+        _, cum, name = l[len("import time:"):].split("|")
+        if not name.startswith("  ") and name.strip() not in STARTUP:   # level teratas saja
+            name = name.strip()
+            imports[name] = imports.get(name, 0) + int(cum) / 1e6
+    return t_load, (t_sw if t_sw >= 0 else None), imports
+
+def bench_repo(repo, repeat, top):
+    print(f"\n{repo}")
+    print(f"  {'stage':26s}{'load s':>9s}{'stopwords s':>13s}  import terberat (s)")
+    for stage in STAGES:
+        if not os.path.exists(os.path.join(repo, stage)):
+            continue
+        runs = [probe(repo, stage, stopwords=stage.startswith("01_")) for _ in range(repeat)]
+        t_load, t_sw, imports = min(runs, key=lambda x: x[0])
+        heavy = sorted(imports.items(), key=lambda kv: -kv[1])[:top]
+        sw = f"{t_sw:13.2f}" if t_sw is not None else f"{'-':>13s}"
+        print(f"  {stage:26s}{t_load:9.2f}{sw}  " + ", ".join(f"{n} {t:.2f}" for n, t in heavy))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark startup per stage (-X importtime)")
+    ap.add_argument("--repo", action="append", default=[],
+                    help="checkout lain untuk dibandingkan (boleh berulang)")
+    ap.add_argument("--repeat", type=int, default=3, help="ambil run tercepat dari N")
+    ap.add_argument("--top", type=int, default=4, help="jumlah import terberat per stage")
+    args = ap.parse_args()
+    for repo in [HERE] + [os.path.abspath(p) for p in args.repo]:
+        bench_repo(repo, args.repeat, args.top)
+
+if __name__ == "__main__":
+    main()
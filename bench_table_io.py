@@ -0,0 +1,116 @@
+"""
+bench_table_io.py
+Benchmark format tabel antar stage (table_io): CSV vs Parquet untuk bugs_clean dan
+bug_commit_relations sintetis — ukuran di disk, load penuh, load terproyeksi (kolom yang
+dipakai consumer: 02 → id + clean_text, 03_store → bug_id + commit_id).
+
+  python bench_table_io.py                  # 500k bug
+  python bench_table_io.py --n 2000000 --outdir /tmp/bench_tables
+"""
+import os, sys, time, random, argparse, tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+import pandas as pd
+import table_io
+
+WORDS = ("crash loading page large table layout reflow scroll event listener memory leak "
+         "regression startup slow rendering font canvas webgl video audio network cache cookie "
+         "permission dialog menu toolbar bookmark history download update addon extension").split()
+
+def make_bugs(n, rnd):
+    rows = []
+    for i in range(n):
+        bid = 1_000_000 + i
+        rows.append({
+            "id": bid,
+            "clean_text": " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(6, 40))),
+            "summary": " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(4, 12))).capitalize(),
+            "product": rnd.choice(["Core", "Firefox", "Toolkit", "DevTools"]),
+            "component": rnd.choice(["DOM: Core & HTML", "Layout", "Networking", "Graphics: WebRender"]),
+            "creator": f"user{rnd.randint(0, 5000)}@example.org",
+            "assigned_to": f"dev{rnd.randint(0, 800)}@example.org",
+            "status": rnd.choice(["RESOLVED", "VERIFIED", "NEW"]),
+            "resolution": rnd.choice(["FIXED", "DUPLICATE", "WONTFIX"]),
+            "creation_time": f"2019-0{rnd.randint(1, 9)}-1{rnd.randint(0, 9)}T10:00:00Z",
+            "last_change_time": f"2021-0{rnd.randint(1, 9)}-2{rnd.randint(0, 8)}T12:30:00Z",
+            "keywords": rnd.sample(["regression", "crash", "perf", "testcase"], rnd.randint(0, 2)),
+            "depends_on": [str(bid - rnd.randint(1, 9999)) for _ in range(rnd.randint(0, 2))],
+            "dupe_of": None,
+            "commit_messages": [f"Bug {bid} - part {k}: fix {rnd.choice(WORDS)}, r=reviewer"
+                                for k in range(rnd.randint(0, 3))],
+            "commit_refs": [f"{rnd.getrandbits(160):040x}" for _ in range(rnd.randint(0, 2))],
+            "files_changed": [f"dom/base/ns{rnd.choice(WORDS).capitalize()}.cpp" for _ in range(rnd.randint(0, 4))],
+            "url": "",
+        })
+    return pd.DataFrame(rows)
+
+def csv_lists(df, list_cols):
+    """Bentuk CSV lama: kolom list di-join ';'."""
+    out = df.copy()
+    for c in list_cols:
+        out[c] = out[c].map(lambda v: ";".join(v))
+    return out
+
+def make_relations(bugs):
+    rows = []
+    for bid, msgs, refs in zip(bugs["id"], bugs["commit_messages"], bugs["commit_refs"]):
+        for r in refs:
+            rows.append((str(bid), r, "commit_refs", r))
+        for m in msgs:
+            rows.append((str(bid), "msg_" + m.replace(" ", "_")[:80], "commit_messages", m))
+    return pd.DataFrame(rows, columns=["bug_id", "commit_id", "source", "raw_value"])
+
+def timed(fn, repeat=3):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        res = fn()
+        t = time.perf_counter() - t0
+        best = t if best is None else min(best, t)
+    return best, res
+
+def bench(name, df_csv, df_pq, kinds, project, outdir):
+    csv_path = os.path.join(outdir, name + ".csv")
+    pq_path = os.path.join(outdir, name + ".parquet")
+    t_wc, _ = timed(lambda: table_io.write_table(df_csv, csv_path), 1)
+    t_wp, _ = timed(lambda: table_io.write_table(df_pq, pq_path, kinds), 1)
+    s_csv, s_pq = os.path.getsize(csv_path), os.path.getsize(pq_path)
+    print(f"\n{name}: rows={len(df_csv)}")
+    print(f"  {'':10s}{'disk MB':>10s}{'write s':>10s}{'load s':>10s}{'load ' + '+'.join(project) + ' s':>28s}")
+    for fmt, path, size, t_w in (("csv", csv_path, s_csv, t_wc), ("parquet", pq_path, s_pq, t_wp)):
+        t_full, _ = timed(lambda: table_io.read_table(path))
+        t_proj, _ = timed(lambda: table_io.read_table(path, columns=project))
+        print(f"  {fmt:10s}{size / 1e6:10.1f}{t_w:10.2f}{t_full:10.2f}{t_proj:28.2f}")
+    print(f"  parquet/csv disk: {s_pq / s_csv:.2f}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark CSV vs Parquet (table_io)")
+    ap.add_argument("--n", type=int, default=500_000, help="jumlah bug sintetis")
+    ap.add_argument("--outdir", help="folder file benchmark (default: temp, dihapus)")
+    args = ap.parse_args()
+    if not table_io.have_arrow():
+        print("pyarrow tidak terpasang (pip install pyarrow) → hanya CSV, benchmark dilewati")
+        return
+
+    t0 = time.perf_counter()
+    bugs = make_bugs(args.n, random.Random(7))
+    rels = make_relations(bugs)
+    list_cols = ["keywords", "depends_on", "commit_messages", "commit_refs", "files_changed"]
+    kinds = {c: "str" for c in bugs.columns}
+    kinds.update({"id": "int", "dupe_of": "int"})
+    kinds.update({c: "list" for c in list_cols})
+    print(f"bugs={len(bugs)} relations={len(rels)} gen={time.perf_counter() - t0:.1f}s "
+          f"compression={table_io.COMPRESSION}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        outdir = args.outdir or tmp
+        os.makedirs(outdir, exist_ok=True)
+        bench("bugs_clean", csv_lists(bugs, list_cols), bugs, kinds, ["id", "clean_text"], outdir)
+        bench("bug_commit_relations", rels, rels, {c: "str" for c in rels.columns},
+              ["bug_id", "commit_id"], outdir)
+
+if __name__ == "__main__":
+    main()
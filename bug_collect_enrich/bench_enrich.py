@@ -0,0 +1,232 @@
+"""
+bench_enrich.py
+Benchmark enrich_bugzilla_from_file terhadap mock Bugzilla lokal (tanpa network keluar).
+
+  python bug_collect_enrich/bench_enrich.py [--bugs 200] [--latency 0.05] [--workers 8] [--batch 20]
+  python bug_collect_enrich/bench_enrich.py --extract     # micro-benchmark extractor saja
+  python bug_collect_enrich/bench_enrich.py --resume 200000  # waktu start resume: scan penuh vs sidecar
+
+Mock meniru /rest/bug/{id}/comment (+ ?ids= untuk batch), /rest/bug/{id}/attachment dan
+/rest/bug/attachment/{aid} (data base64), dengan latency buatan per request.
+"""
+import os, sys, time, json, base64, argparse, tempfile, threading, re
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+import enrich_bugzilla_from_file as ez
+
+
+# ====== MOCK SERVER ======
+PATCH = (
+    "# HG changeset patch\n"
+    "Bug {bid} - Fix layout overflow in nsFoo, r=bar\n\n"
+    "diff --git a/layout/base/nsFoo.cpp b/layout/base/nsFoo.cpp\n"
+    "--- a/layout/base/nsFoo.cpp\n"
+    "+++ b/layout/base/nsFoo.cpp\n"
+    "@@ -1,3 +1,3 @@\n"
+    "-int x = 1;\n"
+    "+int x = 2;\n"
+)
+
+def comment_text(bid, i):
+    return (f"Pushed by dev@example.org:\n"
+            f"https://hg.mozilla.org/integration/autoland/rev/{bid:08x}{i:04x}abcdef\n"
+            f"Bug {bid} - part {i}: tidy up widget/gtk/nsWindow.cpp, r=reviewer\n")
+
+class MockBugzilla:
+    def __init__(self, latency, comments=4, attachments=2):
+        self.latency = latency
+        self.comments = comments
+        self.attachments = attachments
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def route(self, path, query):
+        with self.lock:
+            self.requests += 1
+        m = re.match(r"^/rest/bug/(\d+)/comment$", path)
+        if m:
+            ids = [int(m.group(1))] + [int(x) for x in query.get("ids", [])]
+            return {"bugs": {str(bid): {"comments": [{"text": comment_text(bid, i)} for i in range(self.comments)]}
+                             for bid in ids}}
+        m = re.match(r"^/rest/bug/(\d+)/attachment$", path)
+        if m:
+            bid = int(m.group(1))
+            return {"attachments": [{"id": bid * 10 + i, "file_name": f"p{i}.patch",
+                                     "content_type": "text/plain", "is_obsolete": 0}
+                                    for i in range(self.attachments)]}
+        m = re.match(r"^/rest/bug/attachment/(\d+)$", path)
+        if m:
+            aid = int(m.group(1))
+            data = base64.b64encode(PATCH.format(bid=aid // 10).encode()).decode()
+            return {"attachments": {str(aid): {"data": data}}}
+        return None
+
+    def serve(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                time.sleep(mock.latency)
+                u = urlparse(self.path)
+                payload = mock.route(u.path, parse_qs(u.query))
+                body = json.dumps(payload).encode() if payload is not None else b"{}"
+                self.send_response(200 if payload is not None else 404)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *a):
+                pass
+
+        srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=srv.serve_forever, daemon=True).start()
+        return srv
+
+
+# ====== EXTRACTOR MICRO-BENCH ======
+HUNK = (
+    "diff --git a/{d}/{f}.cpp b/{d}/{f}.cpp\n"
+    "--- a/{d}/{f}.cpp\n"
+    "+++ b/{d}/{f}.cpp\n"
+    "@@ -10,7 +10,9 @@ nsresult {f}::Init(nsIContent* aContent)\n"
+    "   if (!mFrame) {{\n"
+    "-    return NS_ERROR_FAILURE; // see {d}/{f}.h and gfx/2d/Helpers.hpp\n"
+    "+    MOZ_ASSERT(aContent, \"content required\");\n"
+    "+    auto size = mozilla::gfx::IntSize(mWidth, mHeight); // 0x{i:08x}\n"
+    "+    return NS_ERROR_NOT_AVAILABLE;\n"
+    "   }}\n"
+    "   mRefCnt.incr(this, \"{f}\", sizeof(*this));\n"
+)
+
+def make_patch(size):
+    head = PATCH.format(bid=123456)
+    parts, total, i = [head], len(head), 0
+    dirs = ("layout/base", "dom/events", "toolkit/components/extensions", "widget/gtk")
+    while total < size:
+        h = HUNK.format(d=dirs[i % len(dirs)], f=f"nsWidget{i}", i=i)
+        parts.append(h); total += len(h); i += 1
+    return "".join(parts)[:size]
+
+def bench_extract(sizes=(2_000, 50_000, 200_000), repeat=5):
+    print(f"{'size':>9} {'3 extractors':>14} {'extract_all':>12} {'speedup':>8}  identical")
+    for size in sizes:
+        texts = [make_patch(size), comment_text(123456, 1) * max(1, size // 150)]
+        for txt in texts:
+            t0 = time.perf_counter()
+            for _ in range(repeat):
+                old = (ez.extract_commit_messages(txt), ez.extract_commit_refs(txt), ez.extract_files_changed(txt))
+            t_old = (time.perf_counter() - t0) / repeat
+            t0 = time.perf_counter()
+            for _ in range(repeat):
+                new = ez.extract_all(txt)
+            t_new = (time.perf_counter() - t0) / repeat
+            kind = "patch" if txt.startswith("#") else "comment"
+            print(f"{len(txt):>9} {t_old * 1000:>12.2f}ms {t_new * 1000:>10.2f}ms {t_old / t_new:>7.1f}x  {old == new}  ({kind})")
+
+
+def bench_resume(rows, done_frac=0.9):
+    """Waktu sampai bug pending pertama: scan output + input penuh vs sidecar (.resume.json)."""
+    tmp = tempfile.mkdtemp()
+    in_path, out_path = os.path.join(tmp, "bugs.jsonl"), os.path.join(tmp, "out.jsonl")
+    filler = "x" * 1500
+    n_done = int(rows * done_frac)
+    with open(in_path, "w", encoding="utf-8") as fin, open(out_path, "w", encoding="utf-8") as fout:
+        for i in range(rows):
+            bug = {"id": 1000 + i, "summary": f"bug {i} {filler}", "product": "Core"}
+            fin.write(json.dumps(bug) + "\n")
+            if i < n_done:
+                fout.write(json.dumps(dict(bug, commit_messages=[filler])) + "\n")
+    ez.IN_PATH, ez.OUT_PATH, ez.RESUME = in_path, out_path, True
+    print(f"input={os.path.getsize(in_path) / 1e6:.0f}MB output={os.path.getsize(out_path) / 1e6:.0f}MB "
+          f"rows={rows} done={n_done}")
+
+    results = []
+    for label in ("full scan", "sidecar"):
+        t0 = time.perf_counter()
+        already, tracker = ez.load_resume_state()
+        bugs, _ = ez.iter_pending(already, tracker)
+        first = next(bugs)
+        dt = time.perf_counter() - t0
+        print(f"{label:<12} first pending id={first['id']}  {dt:7.3f}s")
+        results.append((dt, first["id"]))
+        # simulasi run sebelumnya selesai sampai n_done → sidecar ditulis
+        tracker = ez.resume_index.ResumeTracker(0)
+        for end, bug in ez.resume_index.iter_jsonl_offsets(in_path):
+            if bug["id"] >= 1000 + n_done: break
+            tracker.skip(end)
+        ez.resume_index.save_resume(out_path, in_path, tracker)
+    print(f"same first pending: {results[0][1] == results[1][1]}   speedup: {results[0][0] / results[1][0]:.0f}x")
+
+
+# ====== BENCH ======
+def run(label, workers, ordered, batch, mock, in_path, out_path):
+    for p in (out_path, ez.resume_index.sidecar_path(out_path)):
+        if os.path.exists(p):
+            os.remove(p)
+    ez.WORKERS, ez.ORDERED, ez.COMMENT_BATCH = workers, ordered, batch
+    mock.requests = 0
+    done, written, elapsed = ez.main()
+    print(f"{label:<32} bugs={done:>5} written={written:>5} requests={mock.requests:>6} "
+          f"{elapsed:7.2f}s  {done / elapsed:8.1f} bugs/s")
+    with open(out_path, "r", encoding="utf-8") as f:
+        return elapsed, f.read()
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark enrich_bugzilla_from_file vs mock Bugzilla")
+    ap.add_argument("--bugs", type=int, default=200)
+    ap.add_argument("--latency", type=float, default=0.05, help="detik per request")
+    ap.add_argument("--workers", type=int, default=8)
+    ap.add_argument("--batch", type=int, default=20, help="COMMENT_BATCH untuk mode batch")
+    ap.add_argument("--extract", action="store_true", help="hanya micro-benchmark extractor")
+    ap.add_argument("--resume", type=int, default=0, metavar="ROWS", help="hanya benchmark start resume")
+    args = ap.parse_args()
+
+    if args.extract:
+        bench_extract()
+        return
+    if args.resume:
+        bench_resume(args.resume)
+        return
+
+    mock = MockBugzilla(args.latency)
+    srv = mock.serve()
+    tmp = tempfile.mkdtemp()
+    in_path = os.path.join(tmp, "bugs.jsonl")
+    with open(in_path, "w", encoding="utf-8") as f:
+        for i in range(args.bugs):
+            f.write(json.dumps({"id": 1000 + i, "summary": f"bug {i}", "product": "Core",
+                                "component": "Layout", "creation_time": "2024-01-01T00:00:00Z"}) + "\n")
+
+    ez.BUGZILLA_BASE = f"http://127.0.0.1:{srv.server_port}"
+    ez.BUGZILLA_API_KEY = ""
+    ez.IN_PATH = in_path
+    ez.OUT_PATH = os.path.join(tmp, "out.jsonl")
+    ez.RESUME = False
+    ez.HTTP_CACHE = False
+    ez.SAVE_EVERY = 10 ** 9
+
+    t_seq, out_seq = run("sequential (workers=1)", 1, True, 1, mock, in_path, ez.OUT_PATH)
+    t_ord, out_ord = run(f"pool ordered (workers={args.workers})", args.workers, True, 1, mock, in_path, ez.OUT_PATH)
+    t_un, out_un = run(f"pool unordered (workers={args.workers})", args.workers, False, 1, mock, in_path, ez.OUT_PATH)
+    t_bat, out_bat = run(f"pool + comment batch={args.batch}", args.workers, True, args.batch, mock, in_path, ez.OUT_PATH)
+
+    print(f"ordered identical: {out_seq == out_ord}   "
+          f"unordered same set: {sorted(out_seq.splitlines()) == sorted(out_un.splitlines())}   "
+          f"batched identical: {out_seq == out_bat}")
+    print(f"speedup ordered: {t_seq / t_ord:.1f}x   unordered: {t_seq / t_un:.1f}x   batched: {t_seq / t_bat:.1f}x")
+
+    # resume setelah run selesai: sidecar → input langsung di-seek ke akhir, 0 bug diproses
+    ez.RESUME = True
+    done, _, _ = ez.main()
+    print(f"resume after complete run: processed={done}")
+    srv.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+commit_cache.py
+Cache commit -> daftar file (sqlite) untuk enrich_bug_file_code.
+
+- Key = (system, repo, node): ("github", "owner/repo", sha) / ("hg", "integration/autoland", node)
+- Hasil negatif (commit tidak ada / file list kosong) juga disimpan, dengan TTL sendiri
+  supaya backout / uplift yang sama dari banyak bug tidak di-resolve ulang
+- Eviction LRU berdasarkan jumlah entry (max_entries), TTL positif opsional (0 = selamanya,
+  changeset tidak berubah)
+"""
+import json, time, sqlite3, threading
+
+
+class CommitCache:
+    def __init__(self, path, max_entries=500_000, ttl=0, neg_ttl=7 * 86400):
+        self.path = path
+        self.max_entries = int(max_entries)
+        self.ttl = float(ttl)
+        self.neg_ttl = float(neg_ttl)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS commits (
+                system TEXT, repo TEXT, node TEXT, ok INTEGER, files TEXT, meta TEXT,
+                fetched REAL, accessed REAL, PRIMARY KEY (system, repo, node)
+            )""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS commits_accessed ON commits(accessed)")
+        self.count = self.conn.execute("SELECT count(*) FROM commits").fetchone()[0]
+        self.stats = {"hits": 0, "negative_hits": 0, "misses": 0, "stored": 0, "evicted": 0}
+
+    @staticmethod
+    def key(system, repo, node):
+        return system, repo.lower(), node.lower()
+
+    def get(self, system, repo, node):
+        """
+        Return dict {"ok", "files", "meta"} kalau ada & belum expired, selain itu None.
+        ok=False → hasil negatif yang tersimpan (files kosong).
+        """
+        key = self.key(system, repo, node)
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT ok, files, meta, fetched FROM commits WHERE system=? AND repo=? AND node=?", key
+            ).fetchone()
+            if row is not None:
+                ok, files, meta, fetched = row
+                ttl = self.ttl if ok else self.neg_ttl
+                if ttl and now - fetched >= ttl:
+                    row = None
+                else:
+                    self.conn.execute("UPDATE commits SET accessed=? WHERE system=? AND repo=? AND node=?",
+                                      (now,) + key)
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            self.stats["hits" if ok else "negative_hits"] += 1
+        return {"ok": bool(ok), "files": json.loads(files), "meta": json.loads(meta)}
+
+    def put(self, system, repo, node, files, meta=None):
+        """Simpan hasil resolve; files kosong = hasil negatif."""
+        key = self.key(system, repo, node)
+        now = time.time()
+        with self.lock:
+            old = self.conn.execute("SELECT 1 FROM commits WHERE system=? AND repo=? AND node=?", key).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO commits VALUES (?,?,?,?,?,?,?,?)",
+                key + (1 if files else 0, json.dumps(files or [], ensure_ascii=False),
+                       json.dumps(meta or {}, ensure_ascii=False), now, now))
+            if old is None:
+                self.count += 1
+            self.stats["stored"] += 1
+            if self.count > self.max_entries:
+                self._evict()
+            self.conn.commit()
+
+    def _evict(self):
+        # LRU: buang yang paling lama tidak diakses sampai ~90% max_entries
+        drop = self.count - int(self.max_entries * 0.9)
+        self.conn.execute(
+            "DELETE FROM commits WHERE rowid IN (SELECT rowid FROM commits ORDER BY accessed ASC LIMIT ?)",
+            (drop,))
+        self.count -= drop
+        self.stats["evicted"] += drop
+
+    def print_stats(self, printer=print):
+        st = self.stats
+        printer(f"[commit-cache] hits={st['hits']} negative_hits={st['negative_hits']} misses={st['misses']} "
+                f"stored={st['stored']} evicted={st['evicted']} entries={self.count}")
+
+    def close(self):
+        with self.lock:
+            self.conn.commit()
+            self.conn.close()
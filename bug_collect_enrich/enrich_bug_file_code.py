@@ -1,14 +1,36 @@
 import os, sys, json, re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, Any, List, Optional, Tuple
 import requests
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import http_client
+import jsonl_io
+import partitioned_jsonl
+from commit_cache import CommitCache
+
 
 BUGS_IN_PATH        = Path("bugs2.jsonl")
 BUGS_OUT_PATH       = Path("datasource/bugs.with_file_code.jsonl")
 PROGRESS_PATH       = Path("datasource/.progress.json")
 AUTOSAVE_EVERY      = 25
 
+# cache commit -> files lintas bug (termasuk hasil negatif); TTL dalam detik, 0 = tanpa expiry
+COMMIT_CACHE         = os.getenv("COMMIT_CACHE", "1") not in ("0","false","False")
+COMMIT_CACHE_PATH    = Path(os.getenv("COMMIT_CACHE_PATH", "datasource/.commit_cache.sqlite"))
+COMMIT_CACHE_MAX     = int(os.getenv("COMMIT_CACHE_MAX", "500000"))
+COMMIT_CACHE_TTL     = float(os.getenv("COMMIT_CACHE_TTL", "0"))
+COMMIT_CACHE_NEG_TTL = float(os.getenv("COMMIT_CACHE_NEG_TTL", str(7 * 86400)))
+GH_NEGATIVE_STATUS   = {404, 409, 422}   # repo/commit tidak ada → boleh di-cache negatif
+
+# resolve commit ref concurrent per window bug; rate per host (token bucket di http_client).
+# GitHub: 5000 request/jam, rate berikutnya diatur dari header X-RateLimit-Remaining/Reset
+FILECODE_WORKERS = int(os.getenv("FILECODE_WORKERS", "8"))
+FILECODE_WINDOW  = int(os.getenv("FILECODE_WINDOW", "200"))
+GITHUB_RPS       = float(os.getenv("GITHUB_RPS", str(5000 / 3600)))
+HG_RPS           = float(os.getenv("HG_RPS", "10"))
+
 GITHUB_API = "https://api.github.com"
 RAW_BASE   = "https://raw.githubusercontent.com"
 
@@ -41,7 +63,7 @@ def parse_hg_commit(u: str) -> Optional[Tuple[str,str,str]]:
 # ---------- GitHub ----------
 def gh_commit_files(owner: str, repo: str, sha: str) -> List[Dict[str, Any]]:
     url = f"{GITHUB_API}/repos/{owner}/{repo}/commits/{sha}"
-    r = requests.get(url, headers=gh_headers(), timeout=60)
+    r = http_client.get(url, headers=gh_headers(), timeout=60)
     r.raise_for_status()
     j = r.json()
     return j.get("files") or []
@@ -58,7 +80,7 @@ def normalize_hg_base_url(base_url: str) -> str:
 
 def hg_json_rev(base_url: str, node: str) -> Dict[str, Any]:
     url = f"{base_url}/json-rev/{node}"
-    r = requests.get(url, headers={"User-Agent": "bug-filecode/1.2"}, timeout=60)
+    r = http_client.get(url, headers={"User-Agent": "bug-filecode/1.2"}, timeout=60)
     r.raise_for_status()
     return r.json()
 
@@ -71,7 +93,53 @@ def hg_raw_rev_url(base_url: str, node: str) -> str:
 def hg_repo_url(base_name: str) -> str:
     return f"https://hg.mozilla.org/{base_name}"
 
-def hg_fetch_files_meta(base_url: str, base_name: str, node: str) -> Tuple[List[Dict[str, Any]], str, str, str]:
+DIFF_FILE_HEADER = b"+++ b/"
+DIFF_MAX_LINE    = 4096   # baris header lebih panjang dari ini dibuang (bukan path wajar)
+
+def iter_diff_paths(chunks, encoding: str = "utf-8", max_line: int = DIFF_MAX_LINE):
+    """
+    Parser header diff streaming: yield path dari baris '+++ b/<path>' (sama dengan
+    regex ^\+\+\+ b/(.+)$ di teks penuh). Header dicari dengan bytes.find per chunk,
+    isi hunk tidak di-parse per baris; yang dibawa ke chunk berikutnya hanya potongan
+    baris header (maks max_line byte), jadi memori tidak tergantung ukuran patch.
+    """
+    hlen = len(DIFF_FILE_HEADER)
+    marker = b"\n" + DIFF_FILE_HEADER
+    tail = b""          # potongan header yang terpotong chunk (selalu diawali awal baris)
+    line_start = True   # awal chunk berikutnya = awal baris
+    for chunk in chunks:
+        if not chunk:
+            continue
+        buf = tail + chunk if tail else chunk
+        at_start = bool(tail) or line_start
+        tail = b""
+        p = 0 if at_start and buf.startswith(DIFF_FILE_HEADER) else buf.find(marker)
+        if p > 0 or (p == 0 and not at_start):
+            p += 1
+        while p != -1:
+            nl = buf.find(b"\n", p)
+            if nl == -1:
+                if len(buf) - p <= max_line:
+                    tail = buf[p:]
+                break
+            if nl - p > hlen:
+                yield buf[p + hlen:nl].decode(encoding, errors="replace")
+            p = buf.find(marker, nl)
+            if p != -1:
+                p += 1
+        if not tail:
+            # awal header yang belum lengkap di ujung chunk, mis. b"\n++"
+            last = buf.rfind(b"\n")
+            frag = buf[last + 1:]
+            if frag and (last != -1 or at_start) and len(frag) < hlen and DIFF_FILE_HEADER.startswith(frag):
+                tail = frag
+            line_start = buf.endswith(b"\n")
+    if len(tail) > hlen:
+        yield tail[hlen:].decode(encoding, errors="replace")
+
+def hg_fetch_files_meta(base_url: str, base_name: str, node: str,
+                        errors: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], str, str, str]:
+    """errors (opsional) diisi kegagalan sementara (network / 5xx) → hasil kosong jangan di-cache."""
     base_url = normalize_hg_base_url(base_url)
     changeset_patch_url = hg_raw_rev_url(base_url, node)
 
@@ -91,23 +159,89 @@ def hg_fetch_files_meta(base_url: str, base_name: str, node: str) -> Tuple[List[
             if he.response is not None and he.response.status_code == 404:
                 continue
             # error lain → lanjut kandidat lain
+            if errors is not None:
+                errors.append(f"json-rev {nd}: {he}")
             continue
-        except requests.RequestException:
+        except requests.RequestException as rexc:
+            if errors is not None:
+                errors.append(f"json-rev {nd}: {rexc}")
             continue
 
     # Fallback: parse raw-rev untuk ambil file list
     try:
-        diff_resp = requests.get(changeset_patch_url, headers={"User-Agent": "bug-filecode/1.2"}, timeout=60)
-        if diff_resp.status_code == 200:
-            diff = diff_resp.text
-            files = [{"file": m.group(1)} for m in re.finditer(r"^\+\+\+ b/(.+)$", diff, re.M)]
-            if files:
-                return files, base_url, node, changeset_patch_url
-    except Exception:
-        pass
+        diff_resp = http_client.get(changeset_patch_url, headers={"User-Agent": "bug-filecode/1.2"},
+                                    timeout=60, stream=True)
+        try:
+            if diff_resp.status_code == 200:
+                chunks = diff_resp.iter_content(chunk_size=65536)
+                files = [{"file": p} for p in iter_diff_paths(chunks, diff_resp.encoding or "utf-8")]
+                if files:
+                    return files, base_url, node, changeset_patch_url
+            elif diff_resp.status_code != 404 and errors is not None:
+                errors.append(f"raw-rev: HTTP {diff_resp.status_code}")
+        finally:
+            diff_resp.close()
+    except Exception as e:
+        if errors is not None:
+            errors.append(f"raw-rev: {e}")
 
     return [], base_url, node, changeset_patch_url
 
+def setup_rate_limits():
+    http_client.set_host_rate(http_client.host_of(GITHUB_API), GITHUB_RPS)
+    http_client.set_host_rate("hg.mozilla.org", HG_RPS)
+
+# ---------- Commit cache ----------
+_commit_cache = None
+
+def get_commit_cache() -> Optional[CommitCache]:
+    global _commit_cache
+    if _commit_cache is None and COMMIT_CACHE:
+        COMMIT_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        _commit_cache = CommitCache(str(COMMIT_CACHE_PATH), max_entries=COMMIT_CACHE_MAX,
+                                    ttl=COMMIT_CACHE_TTL, neg_ttl=COMMIT_CACHE_NEG_TTL)
+    return _commit_cache
+
+def close_commit_cache():
+    global _commit_cache
+    if _commit_cache is not None:
+        _commit_cache.print_stats(log)
+        _commit_cache.close()
+        _commit_cache = None
+
+def resolve_github_commit(owner: str, repo: str, sha: str) -> List[Dict[str, Any]]:
+    """gh_commit_files lewat cache; hasil negatif tersimpan → [] tanpa request."""
+    cache = get_commit_cache()
+    repo_id = f"{owner}/{repo}"
+    if cache is not None:
+        hit = cache.get("github", repo_id, sha)
+        if hit is not None:
+            return hit["files"]
+    try:
+        files = gh_commit_files(owner, repo, sha)
+    except requests.HTTPError as he:
+        if cache is not None and he.response is not None and he.response.status_code in GH_NEGATIVE_STATUS:
+            cache.put("github", repo_id, sha, [], {"status": he.response.status_code})
+        raise
+    if cache is not None:
+        cache.put("github", repo_id, sha, files)
+    return files
+
+def resolve_hg_commit(base_url: str, base_name: str, node: str) -> Tuple[List[Dict[str, Any]], str, str, str]:
+    """hg_fetch_files_meta lewat cache; kosong karena error sementara tidak di-cache."""
+    cache = get_commit_cache()
+    if cache is not None:
+        hit = cache.get("hg", base_name, node)
+        if hit is not None:
+            meta = hit["meta"]
+            return hit["files"], meta.get("base_url", base_url), meta.get("node", node), meta.get("patch_url", "")
+    errors: List[str] = []
+    files, used_base_url, used_node, changeset_patch_url = hg_fetch_files_meta(base_url, base_name, node, errors)
+    if cache is not None and (files or not errors):
+        cache.put("hg", base_name, node, files,
+                  {"base_url": used_base_url, "node": used_node, "patch_url": changeset_patch_url})
+    return files, used_base_url, used_node, changeset_patch_url
+
 # ---------- Util struktur path ----------
 def split_path_info(path: str) -> Tuple[str, str, Optional[str]]:
     parts = path.split("/")
@@ -119,6 +253,9 @@ def split_path_info(path: str) -> Tuple[str, str, Optional[str]]:
     return directory, filename, ext
 
 # ---------- Progress ----------
+# Checkpoint = offset byte input + offset byte output (+ next_line untuk log / progress lama).
+# Output di-flush + fsync hanya saat checkpoint; saat resume, output dipotong ke out_offset
+# (record setelah checkpoint terakhir dikerjakan ulang) lalu input langsung di-seek.
 def load_progress() -> Dict[str, Any]:
     if PROGRESS_PATH.exists():
         try:
@@ -128,145 +265,249 @@ def load_progress() -> Dict[str, Any]:
     return {}
 
 def save_progress(state: Dict[str, Any]):
-    PROGRESS_PATH.write_text(json.dumps(state, ensure_ascii=False, indent=2), encoding="utf-8")
+    tmp = PROGRESS_PATH.with_suffix(PROGRESS_PATH.suffix + ".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, PROGRESS_PATH)
+
+def checkpoint(state: Dict[str, Any], f_out, in_offset: int, next_line: int):
+    f_out.flush()
+    os.fsync(f_out.fileno())
+    state["in_offset"] = in_offset
+    state["out_offset"] = f_out.tell()
+    state["next_line"] = next_line
+    save_progress(state)
+
+def resume_position(state: Dict[str, Any], f_in) -> Tuple[int, int]:
+    """Seek input ke posisi checkpoint; return (offset, nomor baris)."""
+    next_line = int(state.get("next_line", 0))
+    in_offset = state.get("in_offset")
+    if in_offset is not None and in_offset <= BUGS_IN_PATH.stat().st_size:
+        f_in.seek(in_offset)
+        return in_offset, next_line
+    # progress lama (hanya next_line): skip baris sekali, selanjutnya pakai offset
+    for i in range(next_line):
+        if not f_in.readline():
+            break
+    return f_in.tell(), next_line
+
+def iter_input(state: Dict[str, Any]):
+    """
+    Yield (baris, in_offset, nomor baris) mulai posisi checkpoint.
+    Input .jsonl.gz / .jsonl.zst / dataset terpartisi tidak bisa di-seek: offset None,
+    resume dengan skip next_line baris.
+    """
+    if BUGS_IN_PATH.is_dir() or BUGS_IN_PATH.suffix in (".gz", ".zst"):
+        i = int(state.get("next_line", 0))
+        lines = partitioned_jsonl.iter_lines(BUGS_IN_PATH)
+        for _ in zip(range(i), lines):
+            pass
+        for line in lines:
+            i += 1
+            yield line, None, i
+        return
+    with BUGS_IN_PATH.open("rb") as f_in:
+        in_offset, i = resume_position(state, f_in)
+        for line in f_in:
+            in_offset += len(line)
+            i += 1
+            yield line, in_offset, i
+
+def restore_output(state: Dict[str, Any]):
+    """Potong output ke out_offset checkpoint (buang record yang ditulis setelahnya)."""
+    out_offset = state.get("out_offset")
+    if out_offset is None or not BUGS_OUT_PATH.exists():
+        return
+    size = BUGS_OUT_PATH.stat().st_size
+    if size > out_offset:
+        os.truncate(BUGS_OUT_PATH, out_offset)
+        log(f"[INFO] Resume: output dipotong {size - out_offset} byte ke checkpoint {out_offset}")
+    elif size < out_offset:
+        log(f"[WARN] Output ({size} byte) lebih pendek dari checkpoint ({out_offset} byte)")
+
+# ---------- Resolver (concurrent per window) ----------
+def ref_key(cref: str) -> Optional[Tuple[str, ...]]:
+    parsed = parse_github_commit(cref)
+    if parsed:
+        return ("github",) + parsed
+    parsed = parse_hg_commit(cref)
+    if parsed:
+        return ("hg",) + parsed
+    return None
+
+def resolve_ref(key: Tuple[str, ...]):
+    """Return (hasil, exception) untuk satu commit ref; dipanggil dari thread pool."""
+    try:
+        if key[0] == "github":
+            return resolve_github_commit(*key[1:]), None
+        return resolve_hg_commit(*key[1:]), None
+    except requests.RequestException as e:
+        return None, e
+
+def resolve_window(pool: ThreadPoolExecutor, bugs: List[Dict[str, Any]]) -> Dict[Tuple[str, ...], Any]:
+    """Semua commit ref unik dari satu window bug di-resolve bersamaan (sekali per ref)."""
+    keys = []
+    seen = set()
+    for bug in bugs:
+        for cref in bug.get("commit_refs") or []:
+            key = ref_key(cref)
+            if key is not None and key not in seen:
+                seen.add(key)
+                keys.append(key)
+    return dict(zip(keys, pool.map(resolve_ref, keys)))
+
+def build_file_code(bug: Dict[str, Any], resolved: Dict[Tuple[str, ...], Any]) -> List[Dict[str, Any]]:
+    bug_id = bug.get("id")
+    commit_refs: List[str] = bug.get("commit_refs") or []
+
+
+    file_code: List[Dict[str, Any]] = []
+
+    for cref in commit_refs:
+        parsed = parse_github_commit(cref)
+        if not parsed:
+            continue
+        owner, repo, sha = parsed
+        repo_id   = f"{owner}/{repo}"
+        repo_url_ = gh_repo_url(owner, repo)
+
+        files, exc = resolved[("github", owner, repo, sha)]
+        if isinstance(exc, requests.HTTPError):
+            log(f"[ERROR] bug {bug_id}: gagal GitHub {repo_id}@{sha}: {exc}")
+            continue
+        if exc is not None:
+            log(f"[ERROR] bug {bug_id}: network GitHub {repo_id}@{sha}: {exc}")
+            continue
+
+        for finfo in files:
+            path = finfo.get("filename")
+            if not path:
+                continue
+            directory, filename, ext = split_path_info(path)
+            raw_url  = finfo.get("raw_url") or gh_raw_url(owner, repo, sha, path)
+            blob_url = finfo.get("blob_url")
+
+            file_code.append({
+                "system": "github",
+                "repo": repo_id,          
+                "repo_url": repo_url_,    
+                "rev": sha,              
+                "file_path": path,       
+                "dir": directory,        
+                "filename": filename,     
+                "ext": ext,              
+                "raw_url": raw_url,
+                "blob_url": blob_url,     
+                "status": finfo.get("status"),
+                "additions": finfo.get("additions"),
+                "deletions": finfo.get("deletions"),
+                "changes": finfo.get("changes"),
+            })
+
+    # Mercurial
+    for cref in commit_refs:
+        parsed = parse_hg_commit(cref)
+        if not parsed:
+            continue
+        base_url, base_name, node = parsed
+        repo_url_ = hg_repo_url(base_name)  
+
+
+        res, _ = resolved[("hg", base_url, base_name, node)]
+        files, used_base_url, used_node, changeset_patch_url = res or ([], base_url, node, "")
+        if not files:
+            log(f"[WARN] bug {bug_id}: tidak bisa dapat file list untuk {base_name}@{node}")
+            continue
+
+        for finfo in files:
+            if not isinstance(finfo, dict):
+                continue
+            path = finfo.get("file")
+            if not path:
+                continue
+            directory, filename, ext = split_path_info(path)
+            raw_url = hg_raw_file_url(used_base_url, used_node, path)
+
+            file_code.append({
+                "system": "hg",
+                "repo": base_name,            
+                "repo_url": repo_url_,        
+                "rev": used_node,             
+                "file_path": path,
+                "dir": directory,
+                "filename": filename,
+                "ext": ext,
+                "raw_url": raw_url,            
+                "changeset_patch_url": changeset_patch_url 
+            })
+    return file_code
 
 # ====================================================
 #                      MAIN
 # ====================================================
+def process_window(pool: ThreadPoolExecutor, window, f_out, state: Dict[str, Any], counts: Dict[str, int]):
+    """Resolve commit ref satu window secara concurrent, lalu tulis bug-nya urut input."""
+    resolved = resolve_window(pool, [bug for bug, _, _ in window])
+    for bug, in_offset, line_no in window:
+        file_code = build_file_code(bug, resolved)
+        if "files_changed" in bug:
+            del bug["files_changed"]
+        bug["file_code"] = file_code
+
+        f_out.write(jsonl_io.encode_line(bug))
+
+        counts["total"] += 1
+        counts["since_save"] += 1
+        if counts["since_save"] >= AUTOSAVE_EVERY:
+            checkpoint(state, f_out, in_offset, line_no)
+            log(f"[INFO] Autosave: next_line={state['next_line']} total={counts['total']}")
+            counts["since_save"] = 0
+
 def main():
     if not BUGS_IN_PATH.exists():
         log(f"[ERROR] Input tidak ditemukan: {BUGS_IN_PATH}")
         sys.exit(1)
 
     state = load_progress()
-    resume_line = int(state.get("next_line", 0))
-    processed_since_save = 0
-    total_processed = 0
+    counts = {"total": 0, "since_save": 0}
 
     BUGS_OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
     PROGRESS_PATH.parent.mkdir(parents=True, exist_ok=True)
+    restore_output(state)
+    setup_rate_limits()
+    get_commit_cache()   # dibuat sebelum thread pool jalan
 
-    with BUGS_IN_PATH.open("r", encoding="utf-8") as f_in, \
-         BUGS_OUT_PATH.open("a", encoding="utf-8") as f_out:
-
-        for i, raw in enumerate(f_in):
-            if i < resume_line:
-                continue
+    with BUGS_OUT_PATH.open("ab", buffering=1 << 20) as f_out, \
+         ThreadPoolExecutor(max_workers=max(1, FILECODE_WORKERS)) as pool:
 
-            raw = raw.strip()
+        in_offset, i = state.get("in_offset"), int(state.get("next_line", 0))
+        window = []
+        for line, in_offset, i in iter_input(state):
+            raw = line.strip()
             if not raw:
-                state["next_line"] = i + 1
                 continue
 
             try:
-                bug = json.loads(raw)
+                bug = jsonl_io.loads(raw)
             except Exception as e:
-                log(f"[WARN] skip line {i}: bukan JSON ({e})")
-                state["next_line"] = i + 1
+                log(f"[WARN] skip line {i - 1}: bukan JSON ({e})")
                 continue
 
-            bug_id = bug.get("id")
-            commit_refs: List[str] = bug.get("commit_refs") or []
-
-
-            file_code: List[Dict[str, Any]] = []
-
-            for cref in commit_refs:
-                parsed = parse_github_commit(cref)
-                if not parsed:
-                    continue
-                owner, repo, sha = parsed
-                repo_id   = f"{owner}/{repo}"
-                repo_url_ = gh_repo_url(owner, repo)
-
-                try:
-                    files = gh_commit_files(owner, repo, sha)
-                except requests.HTTPError as he:
-                    log(f"[ERROR] bug {bug_id}: gagal GitHub {repo_id}@{sha}: {he}")
-                    continue
-                except requests.RequestException as rexc:
-                    log(f"[ERROR] bug {bug_id}: network GitHub {repo_id}@{sha}: {rexc}")
-                    continue
-
-                for finfo in files:
-                    path = finfo.get("filename")
-                    if not path:
-                        continue
-                    directory, filename, ext = split_path_info(path)
-                    raw_url  = finfo.get("raw_url") or gh_raw_url(owner, repo, sha, path)
-                    blob_url = finfo.get("blob_url")
-
-                    file_code.append({
-                        "system": "github",
-                        "repo": repo_id,          
-                        "repo_url": repo_url_,    
-                        "rev": sha,              
-                        "file_path": path,       
-                        "dir": directory,        
-                        "filename": filename,     
-                        "ext": ext,              
-                        "raw_url": raw_url,
-                        "blob_url": blob_url,     
-                        "status": finfo.get("status"),
-                        "additions": finfo.get("additions"),
-                        "deletions": finfo.get("deletions"),
-                        "changes": finfo.get("changes"),
-                    })
-
-            # Mercurial
-            for cref in commit_refs:
-                parsed = parse_hg_commit(cref)
-                if not parsed:
-                    continue
-                base_url, base_name, node = parsed
-                repo_url_ = hg_repo_url(base_name)  
-
-
-                files, used_base_url, used_node, changeset_patch_url = hg_fetch_files_meta(base_url, base_name, node)
-                if not files:
-                    log(f"[WARN] bug {bug_id}: tidak bisa dapat file list untuk {base_name}@{node}")
-                    continue
-
-                for finfo in files:
-                    if not isinstance(finfo, dict):
-                        continue
-                    path = finfo.get("file")
-                    if not path:
-                        continue
-                    directory, filename, ext = split_path_info(path)
-                    raw_url = hg_raw_file_url(used_base_url, used_node, path)
-
-                    file_code.append({
-                        "system": "hg",
-                        "repo": base_name,            
-                        "repo_url": repo_url_,        
-                        "rev": used_node,             
-                        "file_path": path,
-                        "dir": directory,
-                        "filename": filename,
-                        "ext": ext,
-                        "raw_url": raw_url,            
-                        "changeset_patch_url": changeset_patch_url 
-                    })
-
-            if "files_changed" in bug:
-                del bug["files_changed"]
-            bug["file_code"] = file_code
-
-            f_out.write(json.dumps(bug, ensure_ascii=False) + "\n")
-            f_out.flush()
-
-            total_processed += 1
-            processed_since_save += 1
-            state["next_line"] = i + 1
-
-            if processed_since_save >= AUTOSAVE_EVERY:
-                save_progress(state)
-                log(f"[INFO] Autosave: next_line={state['next_line']} total={total_processed}")
-                processed_since_save = 0
-
-        save_progress(state)
-        log(f"[DONE] Selesai. next_line={state.get('next_line')} total={total_processed}")
+            window.append((bug, in_offset, i))
+            if len(window) >= FILECODE_WINDOW:
+                process_window(pool, window, f_out, state, counts)
+                window = []
+
+        if window:
+            process_window(pool, window, f_out, state, counts)
+        checkpoint(state, f_out, in_offset, i)
+        log(f"[DONE] Selesai. next_line={state.get('next_line')} total={counts['total']}")
+        http_client.print_host_stats(log)
+        close_commit_cache()
+    if partitioned_jsonl.partitioned():
+        partitioned_jsonl.export_jsonl(str(BUGS_OUT_PATH))
 
 if __name__ == "__main__":
     main()
@@ -1,6 +1,16 @@
-import os, re, json, time, requests
+import os, sys, re, json, time, requests
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime, timezone
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import http_client
+from http_cache import HttpCache
+import jsonl_io
+import partitioned_jsonl
+import resume_index
+
 # ========= KONFIGURASI TANPA ARGUMEN =========
 BUGZILLA_BASE    = os.getenv("BUGZILLA_BASE", "https://bugzilla.mozilla.org")
 BUGZILLA_API_KEY = os.getenv("BUGZILLA_API_KEY", "BlcgQ07cwYUdywCWCBqwQSuTH8Vq04yDEZ9XMzA7")
@@ -9,6 +19,9 @@ IN_PATH   = os.getenv("IN_PATH",  "datasource/bugs.jsonl")
 OUT_PATH  = os.getenv("OUT_PATH", "datasource/bug_new_commit_message.jsonl")
 SAVE_EVERY = int(os.getenv("SAVE_EVERY", "25"))
 RESUME     = os.getenv("RESUME", "1") not in ("0","false","False")
+WORKERS    = int(os.getenv("ENRICH_WORKERS", "8"))                          # bug in-flight bersamaan, 1 = sequential
+ORDERED    = os.getenv("ENRICH_ORDERED", "1") not in ("0","false","False")  # output urut sesuai input
+COMMENT_BATCH = int(os.getenv("COMMENT_BATCH", "20"))                      # bug per request comment, 1 = per-bug
 
 FETCH_COMMENTS        = os.getenv("FETCH_COMMENTS", "1") not in ("0","false","False")
 FETCH_ATTACHMENTS     = os.getenv("FETCH_ATTACHMENTS","1") not in ("0","false","False")
@@ -16,6 +29,13 @@ MAX_ATTACH_PER_BUG    = int(os.getenv("MAX_ATTACH_PER_BUG", "2"))
 MAX_ATTACH_BYTES      = int(os.getenv("MAX_ATTACH_BYTES", "200000"))
 FILTER_REQUIRE_COMMIT = os.getenv("FILTER_REQUIRE_COMMIT","1") not in ("0","false","False")
 
+# cache response di disk (ETag / If-Modified-Since); OFFLINE=1 → hanya dari cache
+HTTP_CACHE         = os.getenv("HTTP_CACHE", "1") not in ("0","false","False")
+HTTP_CACHE_PATH    = os.getenv("HTTP_CACHE_PATH", "datasource/.http_cache.sqlite")
+HTTP_CACHE_MAX_MB  = int(os.getenv("HTTP_CACHE_MAX_MB", "2048"))
+HTTP_CACHE_TTL     = float(os.getenv("HTTP_CACHE_TTL", "0"))
+HTTP_CACHE_OFFLINE = os.getenv("HTTP_CACHE_OFFLINE", "0") not in ("0","false","False")
+
 # ========= REGEX EKSTRAKSI =========
 HG_COMMIT_URL  = re.compile(r"https?://[\w\.\-]*hg\.mozilla\.org/\S*/rev/([0-9a-f]{8,40})", re.I)
 GH_COMMIT_URL  = re.compile(r"https?://github\.com/\S+?/commit/([0-9a-f]{7,40})", re.I)
@@ -49,15 +69,9 @@ LIKELY_PATH = re.compile(r"([A-Za-z0-9_\-./]+(?:%s))" % "|".join(re.escape(ext)
 
 # ========= I/O =========
 def load_input(path):
-    if path.lower().endswith(".jsonl"):
-        with open(path, "r", encoding="utf-8") as f:
-            for line in f:
-                line=line.strip()
-                if not line: continue
-                try:
-                    obj=json.loads(line)
-                    if isinstance(obj, dict): yield obj
-                except: pass
+    # JSONL biasa / .jsonl.gz / .jsonl.zst / dataset terpartisi (dir + manifest.json)
+    if partitioned_jsonl.is_jsonl(path):
+        yield from jsonl_io.iter_records(path)
     else:
         with open(path, "r", encoding="utf-8") as f:
             data=json.load(f)
@@ -75,53 +89,66 @@ def load_input(path):
 def iter_existing_ids(out_path):
     ids=set()
     if not os.path.isfile(out_path): return ids
-    with open(out_path, "r", encoding="utf-8") as f:
-        for line in f:
-            line=line.strip()
-            if not line: continue
-            try:
-                obj=json.loads(line)
-                bid=obj.get("id")
-                if isinstance(bid, int): ids.add(bid)
-            except: pass
+    # decode hanya field id (msgspec: field lain tidak di-parse jadi object)
+    for obj in jsonl_io.iter_records(out_path, fields=("id",)):
+        bid=obj.get("id")
+        if isinstance(bid, int): ids.add(bid)
     return ids
 
 def append_jsonl(path, rows):
     if not rows: return
-    with open(path, "a", encoding="utf-8") as f:
-        for r in rows:
-            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+    jsonl_io.write_jsonl(path, rows, mode="a")
 
 # ========= HTTP helper (retry + skip 400) =========
 RETRY_STATUS = {429, 502, 503, 504}
-def _safe_get(url, params=None, timeout=120, stream=False, max_retry=1):
+_cache = None
+
+def get_cache():
+    """HttpCache global; dibuat di main() sebelum thread pool (lazy init di sini tidak thread-safe)."""
+    global _cache
+    if _cache is None and HTTP_CACHE:
+        os.makedirs(os.path.dirname(HTTP_CACHE_PATH) or ".", exist_ok=True)
+        _cache = HttpCache(HTTP_CACHE_PATH, max_bytes=HTTP_CACHE_MAX_MB * 1024 * 1024,
+                           ttl=HTTP_CACHE_TTL, offline=HTTP_CACHE_OFFLINE)
+    return _cache
+
+def close_cache():
+    global _cache
+    if _cache is not None:
+        _cache.print_stats()
+        _cache.close()
+        _cache = None
+
+def _safe_get(url, params=None, timeout=120, stream=False, max_retry=1, max_body=None):
     """
-    GET dengan retry untuk 429/5xx; jika 400 -> return None (skip).
+    GET (session bersama http_client) dengan retry backoff untuk 429/5xx; jika 400 -> return None (skip).
     Exception jaringan -> return None (skip).
+    Kalau HTTP_CACHE aktif, lewat cache disk (revalidasi ETag/If-Modified-Since);
+    stream + max_body → body dipotong max_body byte.
     """
     params = params or {}
-    tries = 0
-    while True:
-        tries += 1
-        try:
-            r = requests.get(url, params=params, timeout=timeout, stream=stream)
-            # 400 → langsung skip (tanpa raise)
-            if r.status_code == 400:
-                return None
-            if r.status_code in RETRY_STATUS and tries <= max_retry + 1:
-                time.sleep(5)
-                continue
-            r.raise_for_status()
-            return r
-        except requests.exceptions.HTTPError as e:
-            # selain 400, kalau sudah melebihi retry—anggap gagal
-            if tries > max_retry + 1:
+    try:
+        cache = get_cache()
+        if cache is not None:
+            r = cache.get(url, params=params, timeout=timeout, max_body=max_body if stream else None,
+                          max_retries=max_retry + 1, retry_status=RETRY_STATUS)
+            if r is None:
+                # offline & belum ada di cache
                 return None
-            # untuk 429/5xx sudah ditangani di atas; lainnya tidak otomatis retry
-            return None
-        except requests.exceptions.RequestException:
-            # jaringan error — skip
+        else:
+            r = http_client.get(url, params=params, timeout=timeout, stream=stream,
+                                max_retries=max_retry + 1, retry_status=RETRY_STATUS)
+        # 400 → langsung skip (tanpa raise)
+        if r.status_code == 400:
             return None
+        r.raise_for_status()
+        return r
+    except requests.exceptions.HTTPError:
+        # selain 400 (atau retry habis) — anggap gagal
+        return None
+    except requests.exceptions.RequestException:
+        # jaringan error — skip
+        return None
 
 # ========= Bugzilla detail (komentar/attachment) =========
 def fetch_comments(bug_id: int):
@@ -135,13 +162,46 @@ def fetch_comments(bug_id: int):
         data = r.json()
     except Exception:
         return []
+    return _comment_texts((data.get("bugs") or {}).get(str(bug_id), {}))
+
+def _comment_texts(bug_node):
     out=[]
-    bug_node=(data.get("bugs") or {}).get(str(bug_id), {})
     for c in bug_node.get("comments", []) or []:
         txt=c.get("text") or ""
         if txt: out.append(txt)
     return out
 
+def fetch_comments_batch(bug_ids):
+    """
+    Comment banyak bug dalam satu request: /rest/bug/{id0}/comment?ids=id1&ids=id2...
+    Return {bug_id: [text, ...]}. Kalau request batch gagal (mis. satu bug private → 400),
+    batch dibelah dua terus sampai per-bug; bug yang tetap tidak ada di hasil
+    tidak masuk dict → caller fallback ke fetch_comments().
+    """
+    bug_ids = list(bug_ids)
+    if not bug_ids:
+        return {}
+    if len(bug_ids) == 1:
+        return {}
+    url = f"{BUGZILLA_BASE.rstrip('/')}/rest/bug/{bug_ids[0]}/comment"
+    params = {"ids": bug_ids[1:]}
+    if BUGZILLA_API_KEY:
+        params["api_key"] = BUGZILLA_API_KEY
+    r = _safe_get(url, params=params, timeout=120)
+    data = None
+    if r is not None:
+        try:
+            data = r.json()
+        except Exception:
+            data = None
+    if data is None:
+        mid = len(bug_ids) // 2
+        out = fetch_comments_batch(bug_ids[:mid])
+        out.update(fetch_comments_batch(bug_ids[mid:]))
+        return out
+    nodes = data.get("bugs") or {}
+    return {bid: _comment_texts(nodes[str(bid)]) for bid in bug_ids if str(bid) in nodes}
+
 def fetch_attachments_meta(bug_id: int):
     url = f"{BUGZILLA_BASE.rstrip('/')}/rest/bug/{bug_id}/attachment"
     params = {"api_key": BUGZILLA_API_KEY} if BUGZILLA_API_KEY else {}
@@ -174,18 +234,13 @@ def fetch_attachment_data(attach_id: int):
 
     # fallback: CGI (binary)
     cgi = f"{BUGZILLA_BASE.rstrip('/')}/attachment.cgi"
-    r = _safe_get(cgi, params={"id": attach_id}, timeout=180, stream=True)
+    r = _safe_get(cgi, params={"id": attach_id}, timeout=180, stream=True, max_body=MAX_ATTACH_BYTES)
     if r is None:
         return b""
-    buf=b""
     try:
-        for chunk in r.iter_content(chunk_size=8192):
-            if not chunk: break
-            buf += chunk
-            if len(buf) > MAX_ATTACH_BYTES: break
+        return http_client.read_limited(r, MAX_ATTACH_BYTES)
     except Exception:
         return b""
-    return buf
 
 # ========= Ekstraksi FILES =========
 def extract_files_changed(text: str):
@@ -258,6 +313,133 @@ def extract_commit_messages(text: str):
             out.append(t[:300])
     return set(out)
 
+# ========= Ekstraksi FUSED (satu lintasan per teks) =========
+# Hasil identik dengan extract_commit_messages / extract_commit_refs / extract_files_changed,
+# tapi regex tidak lagi di-scan di setiap posisi teks:
+# - regex URL commit jalan sekali (dipakai untuk refs + posisi baris)
+# - regex ber-anchor (^Subject:, Bug N, changeset, ^diff, ^---, ...) hanya di-match
+#   di posisi literal pemicunya (str.find, jauh lebih murah dari scan re.I)
+# - LIKELY_PATH hanya dijalankan di run karakter path yang memuat ".ext"
+LINE_BREAK = re.compile(r"\r\n|[\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]")   # = str.splitlines
+WS_RUN     = re.compile(r"\s+")
+EXT_DOT    = re.compile(r"\.(?:%s)" % "|".join(re.escape(ext[1:]) for ext in CODE_FILE_EXTS))
+PATH_RUN   = re.compile(r"[A-Za-z0-9_\-./]*")
+
+def _fold(s):
+    """lower() yang offset-nya sama dengan s (None kalau panjang berubah, mis. 'İ')."""
+    low = s.lower()
+    if len(low) != len(s):
+        return None
+    # re.I juga mencocokkan 'ı' dengan i dan 'ſ' dengan s
+    return low.replace("\u0131", "i").replace("\u017f", "s")
+
+def _find_all(s, word, line_start=False):
+    out = []
+    i = s.find(word)
+    while i != -1:
+        if not line_start or i == 0 or s[i - 1] == "\n":
+            out.append(i)
+        i = s.find(word, i + 1)
+    return out
+
+def _match_at(pattern, s, cands):
+    """Setara pattern.finditer(s) kalau setiap match pasti mulai di salah satu posisi cands."""
+    end = 0
+    for pos in sorted(set(cands)):
+        if pos < end:
+            continue
+        m = pattern.match(s, pos)
+        if m:
+            yield m
+            end = m.end()
+
+def _finditer_hint(pattern, s, low, word, line_start=False):
+    if low is None:
+        return pattern.finditer(s)
+    return _match_at(pattern, s, _find_all(low, word, line_start))
+
+def _likely_paths(s, files):
+    """Setara LIKELY_PATH.finditer(s): match tidak pernah keluar dari satu run karakter path."""
+    done, rev = -1, None
+    for m in EXT_DOT.finditer(s):
+        k = m.start()
+        if k < done:
+            continue
+        if rev is None:
+            rev = s[::-1]
+        # awal run = panjang run karakter path yang berakhir di k (dicari di string terbalik)
+        a = k - (PATH_RUN.match(rev, len(s) - k).end() - (len(s) - k))
+        done = PATH_RUN.match(s, k).end()
+        for pm in LIKELY_PATH.finditer(s, a, done):
+            files.add(pm.group(1).strip())
+
+def _line_starts(s):
+    return [0] + [m.end() for m in LINE_BREAK.finditer(s)]
+
+def extract_all(text: str):
+    """Return (commit_messages: set, commit_refs: set, files_changed: list terurut) dalam satu lintasan."""
+    s = text or ""
+    msgs = set()
+    refs = set()
+    files = set()
+
+    # --- URL commit: sekali finditer → refs + baris yang memuat URL
+    low = _fold(s)
+    url_starts = []
+    for m in HG_COMMIT_URL.finditer(s):
+        refs.add(m.group(0)); url_starts.append(m.start())
+    for m in GH_COMMIT_URL.finditer(s):
+        refs.add(m.group(0)); url_starts.append(m.start())
+    for m in _finditer_hint(CHANGESET_HASH, s, low, "changeset"):
+        refs.add(m.group(1))
+
+    # --- commit messages
+    for m in _finditer_hint(SUBJECT_LINE, s, low, "subject:", line_start=True):
+        val = m.group(1).strip()
+        if val: msgs.add(val)
+
+    for m in _finditer_hint(BUG_TITLE_LINE, s, low, "bug"):
+        val = m.group(1).strip()
+        if val: msgs.add(val)
+
+    for m in _match_at(COMMIT_BLOCK, s, _find_all(s, "commit", line_start=True)):
+        para = m.group(1) or ""
+        para = "\n".join([ln.lstrip() for ln in para.splitlines()]).strip()
+        first = para.splitlines()[0].strip() if para else ""
+        if first: msgs.add(first)
+
+    if url_starts:
+        lines = s.splitlines()
+        starts = _line_starts(s)
+        hit_lines = sorted({bisect_right(starts, off) - 1 for off in url_starts})
+        for i in hit_lines:
+            for cand in _nearby_message_lines(lines, i):
+                if "http://" in cand or "https://" in cand:
+                    continue
+                if DIFF_GIT_FILE.match(cand) or MINUS_FILE.match(cand) or PLUS_FILE.match(cand) or INDEX_FILE.match(cand):
+                    continue
+                if len(cand) >= 6:
+                    msgs.add(cand.strip())
+
+    # --- files changed
+    for m in _match_at(DIFF_GIT_FILE, s, _find_all(s, "diff --git a/", line_start=True)):
+        files.add(m.group(1).strip())
+    for pattern, word in ((MINUS_FILE, "---"), (PLUS_FILE, "+++")):
+        for m in _match_at(pattern, s, _find_all(s, word, line_start=True)):
+            name = m.group(1).strip()
+            if name and name != "/dev/null": files.add(name)
+    for m in _match_at(INDEX_FILE, s, _find_all(s, "Index:", line_start=True)):
+        files.add(m.group(1).strip())
+    _likely_paths(s, files)
+
+    out_msgs = set()
+    for m in msgs:
+        t = WS_RUN.sub(" ", m).strip()
+        if t:
+            out_msgs.add(t[:300])
+    norm = {f[2:] if (f.startswith("a/") or f.startswith("b/")) else f for f in files}
+    return out_msgs, refs, sorted(norm)
+
 # ========= Cleaning =========
 def clean_text(x):
     if x is None: return ""
@@ -298,7 +480,8 @@ def clean_bug(b, commit_messages=None, commit_refs=None, files_changed=None):
     }
 
 # ========= ENRICH =========
-def enrich_one(bug):
+def enrich_one(bug, comments=None):
+    """comments: teks comment yang sudah diambil batch; None → fetch per-bug."""
     bid = bug.get("id")
     try:
         bid=int(bid)
@@ -311,10 +494,11 @@ def enrich_one(bug):
 
     if FETCH_COMMENTS:
         try:
-            for txt in fetch_comments(bid):
-                commit_msgs.update(extract_commit_messages(txt))
-                commit_refs.update(extract_commit_refs(txt))
-                files.update(extract_files_changed(txt))
+            for txt in (comments if comments is not None else fetch_comments(bid)):
+                t_msgs, t_refs, t_files = extract_all(txt)
+                commit_msgs.update(t_msgs)
+                commit_refs.update(t_refs)
+                files.update(t_files)
         except Exception as e:
             print(f"[warn] comments {bid} -> {e}")
 
@@ -338,9 +522,10 @@ def enrich_one(bug):
                 except:
                     txt=""
                 if not txt: continue
-                commit_msgs.update(extract_commit_messages(txt))
-                commit_refs.update(extract_commit_refs(txt))
-                files.update(extract_files_changed(txt))
+                t_msgs, t_refs, t_files = extract_all(txt)
+                commit_msgs.update(t_msgs)
+                commit_refs.update(t_refs)
+                files.update(t_files)
                 taken += 1
         except Exception as e:
             print(f"[warn] attachments {bid} -> {e}")
@@ -356,43 +541,180 @@ def enrich_one(bug):
         return None
     return out
 
-# ========= MAIN =========
-if __name__ == "__main__":
-    if not os.path.exists(IN_PATH):
-        raise SystemExit(f"input missing: {IN_PATH}")
-
-    already = iter_existing_ids(OUT_PATH) if RESUME else set()
-    if RESUME:
-        print(f"[resume] skipping {len(already)} existing IDs in {OUT_PATH}")
+def _enrich_safe(bug, comments=None):
+    try:
+        if comments is not None and not isinstance(comments, list):
+            # Future dari prefetch batch
+            comments = comments.result().get(int(bug.get("id")))
+        return enrich_one(bug, comments=comments)
+    except Exception as e:
+        # guard terakhir: jika enrich_one gagal, skip bug ini
+        print(f"[warn] enrich {bug.get('id')} -> {e}")
+        return None
 
-    buf=[]; total=0; written=0
-    for bug in load_input(IN_PATH):
-        total += 1
-        bid = bug.get("id")
+def _batch_ids(batch):
+    ids = []
+    for bug in batch:
         try:
-            bid_int=int(bid)
+            ids.append(int(bug.get("id")))
         except:
-            continue
-        if bid_int in already:
-            continue
+            pass
+    return ids
 
-        try:
-            out = enrich_one(bug)
-        except Exception as e:
-            # guard terakhir: jika enrich_one gagal, skip bug ini
-            print(f"[warn] enrich {bid_int} -> {e}")
-            out = None
+def _fetch_comments_map(batch):
+    if not FETCH_COMMENTS or COMMENT_BATCH <= 1:
+        return {}
+    try:
+        return fetch_comments_batch(_batch_ids(batch))
+    except Exception as e:
+        print(f"[warn] comments batch -> {e}")
+        return {}
+
+def iter_batches(bugs, size):
+    batch = []
+    for bug in bugs:
+        batch.append(bug)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def iter_enriched(bugs, workers=None, ordered=None):
+    """
+    Worker pool: maksimal `workers` bug diproses bersamaan (comments + attachments per bug).
+    Comment diambil per batch COMMENT_BATCH bug lewat pool prefetch terpisah, lalu
+    dibagikan ke enrich_one tiap bug.
+    Yield (bug, out). ordered=True → urutan sama dengan input; False → urutan selesai.
+    """
+    workers = WORKERS if workers is None else workers
+    ordered = ORDERED if ordered is None else ordered
+    batch_size = max(1, COMMENT_BATCH)
+    if workers <= 1:
+        for batch in iter_batches(bugs, batch_size):
+            cmap = _fetch_comments_map(batch)
+            for bug in batch:
+                try:
+                    comments = cmap.get(int(bug.get("id")))
+                except:
+                    comments = None
+                yield bug, _enrich_safe(bug, comments)
+        return
+
+    max_inflight = max(workers * 2, batch_size)
+    with ThreadPoolExecutor(max_workers=max(1, workers // 4)) as prefetch, \
+         ThreadPoolExecutor(max_workers=workers) as pool:
+        inflight = deque() if ordered else {}
+
+        def drain(limit):
+            # keluarkan hasil sampai jumlah in-flight <= limit
+            while len(inflight) > limit:
+                if ordered:
+                    b, fut = inflight.popleft()
+                    yield b, fut.result()
+                else:
+                    done, _ = wait(inflight, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        yield inflight.pop(fut), fut.result()
+
+        for batch in iter_batches(bugs, batch_size):
+            cfut = prefetch.submit(_fetch_comments_map, batch)
+            for bug in batch:
+                fut = pool.submit(_enrich_safe, bug, cfut)
+                if ordered:
+                    inflight.append((bug, fut))
+                else:
+                    inflight[fut] = bug
+            yield from drain(max_inflight)
+        yield from drain(0)
+
+def iter_pending(already, tracker=None):
+    """
+    Bug input yang belum ada di output (resume by id). Return (generator, counter).
+    tracker (ResumeTracker, input JSONL) → baca mulai tracker.offset & catat offset tiap record.
+    """
+    counter = {"input": 0}
+    def gen():
+        if tracker is None:
+            source = ((None, bug) for bug in load_input(IN_PATH))
+        else:
+            source = resume_index.iter_jsonl_offsets(IN_PATH, tracker.offset)
+        for end, bug in source:
+            if bug is None:
+                tracker.skip(end)
+                continue
+            counter["input"] += 1
+            try:
+                bid_int=int(bug.get("id"))
+            except:
+                if tracker: tracker.skip(end)
+                continue
+            if bid_int in already:
+                if tracker: tracker.skip(end)
+                continue
+            if tracker: tracker.dispatch(bug, bid_int, end)
+            yield bug
+    return gen(), counter
+
+def load_resume_state():
+    """(already_ids, tracker): dari sidecar kalau valid, kalau tidak scan penuh output."""
+    # offset byte hanya berlaku untuk JSONL biasa (bukan terkompresi / dataset)
+    jsonl = IN_PATH.lower().endswith(".jsonl") and os.path.isfile(IN_PATH)
+    if not jsonl:
+        resume_index.clear_resume(OUT_PATH)
+    if not RESUME:
+        return set(), resume_index.ResumeTracker(0) if jsonl else None
+    state = resume_index.load_resume(OUT_PATH, IN_PATH) if jsonl else None
+    if state is not None:
+        offset, already = state
+        print(f"[resume] sidecar: seek input to byte {offset}, +{len(already)} IDs ahead")
+        return already, resume_index.ResumeTracker(offset)
+    already = iter_existing_ids(OUT_PATH)
+    print(f"[resume] skipping {len(already)} existing IDs in {OUT_PATH}")
+    return already, resume_index.ResumeTracker(0) if jsonl else None
+
+def flush(buf, tracker):
+    append_jsonl(OUT_PATH, buf)
+    if tracker is not None:
+        resume_index.save_resume(OUT_PATH, IN_PATH, tracker)
+
+# ========= MAIN =========
+def main():
+    if not os.path.exists(IN_PATH):
+        raise SystemExit(f"input missing: {IN_PATH}")
 
+    get_cache()   # dibuat sebelum thread pool jalan (worker _safe_get memakai instance yang sama)
+    already, tracker = load_resume_state()
+    bugs, counter = iter_pending(already, tracker)
+    buf=[]; done=0; written=0
+    t0 = time.perf_counter()
+    print(f"[enrich] workers={WORKERS} ordered={ORDERED}")
+    for bug, out in iter_enriched(bugs):
+        done += 1
+        if tracker is not None:
+            tracker.finish(bug)
         if out is not None:
             buf.append(out); written += 1
 
         if len(buf) >= SAVE_EVERY:
-            append_jsonl(OUT_PATH, buf)
-            print(f"[save] +{len(buf)} (total_written={written})")
+            flush(buf, tracker)
+            rate = done / max(time.perf_counter() - t0, 1e-9)
+            print(f"[save] +{len(buf)} (total_written={written}, processed={done}, {rate:.2f} bugs/s)")
             buf.clear()
 
+    if buf or tracker is not None:
+        flush(buf, tracker)
     if buf:
-        append_jsonl(OUT_PATH, buf)
         print(f"[save] +{len(buf)} (total_written={written})")
 
-    print(f"done. input={total}, written={written}, out={OUT_PATH}")
+    elapsed = time.perf_counter() - t0
+    print(f"done. input={counter['input']}, processed={done}, written={written}, out={OUT_PATH}, "
+          f"{done / max(elapsed, 1e-9):.2f} bugs/s ({elapsed:.1f}s)")
+    if partitioned_jsonl.partitioned():
+        partitioned_jsonl.export_jsonl(OUT_PATH)
+    http_client.print_host_stats()
+    close_cache()
+    return done, written, elapsed
+
+if __name__ == "__main__":
+    main()
@@ -1,42 +1,192 @@
 # filter_commit_messages.py
-import json
 import os
+import re
+import sys
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import jsonl_io
+import partitioned_jsonl
 
 IN_PATH  = "datasource/bug_enriched_commit_message.jsonl"
 OUT_WITH = "datasource/bug_with_commit_messages.jsonl"   # hanya yang punya commit_messages
 OUT_NONE = "datasource/bug_no_commit_messages.jsonl"     # yang commit_messages kosong / tidak ada
+WORKERS  = int(os.getenv("FILTER_WORKERS", str(os.cpu_count() or 1)))   # proses paralel
+RAW      = os.getenv("FILTER_RAW", "1") not in ("0","false","False")   # routing baris mentah (tanpa re-encode)
+MIN_RANGE_BYTES = 8 << 20   # input lebih kecil dari ini tidak dipecah
 
 def has_commit_messages(obj):
     msgs = obj.get("commit_messages")
     return isinstance(msgs, list) and len([m for m in msgs if str(m).strip()]) > 0
 
-def main():
-    os.makedirs(os.path.dirname(OUT_WITH), exist_ok=True)
+# ====== ROUTING BARIS MENTAH ======
+KEY = b'"commit_messages"'
+WS  = b" \t\r\n"
+# setelah key: ': null' / ': []' / ': ["<char ASCII non-spasi selain " dan \>'
+VALUE_RE = re.compile(rb'[ \t\r\n]*:[ \t\r\n]*(?:(null)|\[[ \t\r\n]*(?:(\])|"[\x21\x23-\x5b\x5d-\x7e]))')
+
+def _route_full(s):
+    try:
+        obj = jsonl_io.loads(s)
+    except Exception:
+        return None
+    if not isinstance(obj, dict):
+        return None
+    return has_commit_messages(obj)
+
+def route_line(line):
+    """
+    True / False = baris punya commit_messages atau tidak, None = baris tidak valid (dibuang).
+    Cek murah di byte baris: key top-level "commit_messages" tidak ada → False,
+    [] / null → False, item pertama string diawali karakter ASCII non-spasi → True.
+    Kasus lain (key muncul >1x, ada '{' sebelum key, value bukan list, item kosong / non-ASCII, ...)
+    → parse penuh. Baris yang tidak diawali '{' dan diakhiri '}' (mis. terpotong) juga di-parse penuh.
+    Catatan: jalur murah tidak memvalidasi isi baris lain (FILTER_RAW=0 untuk validasi penuh).
+    """
+    s = line.strip()
+    if not s:
+        return None
+    if s[:1] != b"{" or s[-1:] != b"}":
+        return _route_full(s)
+    i = s.find(KEY)
+    if i < 0:
+        return False
+    if s.find(KEY, i + 1) >= 0 or s.find(b"{", 1, i) >= 0:   # >1x / mungkin di object nested
+        return _route_full(s)
+    if s[max(0, i - 8):i].rstrip(WS)[-1:] not in (b"{", b","):
+        return _route_full(s)
+    m = VALUE_RE.match(s, i + len(KEY))
+    if m is None:
+        return _route_full(s)
+    return not (m.group(1) or m.group(2))
 
+def byte_ranges(path, parts):
+    """Pecah file jadi `parts` rentang byte yang batasnya di awal baris."""
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, "rb") as f:
+        for k in range(1, parts):
+            f.seek(size * k // parts)
+            f.readline()
+            bounds.append(max(f.tell(), bounds[-1]))
+    bounds.append(size)
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+def split_range(in_path, start, end, out_with, out_none):
+    """Route baris yang mulai di [start, end) ke out_with / out_none. Return (in, with, none)."""
     cnt_in = cnt_with = cnt_none = 0
-    with open(IN_PATH, "r", encoding="utf-8") as fin, \
-         open(OUT_WITH, "w", encoding="utf-8") as fwith, \
-         open(OUT_NONE, "w", encoding="utf-8") as fnone:
+    with open(in_path, "rb") as fin, \
+         open(out_with, "wb", buffering=1 << 20) as fwith, \
+         open(out_none, "wb", buffering=1 << 20) as fnone:
+        fin.seek(start)
+        pos = start
         for line in fin:
-            line = line.strip()
-            if not line:
+            if pos >= end:
+                break
+            pos += len(line)
+            r = route_line(line)
+            if r is None:
+                continue
+            if not line.endswith(b"\n"):
+                line += b"\n"
+            cnt_in += 1
+            if r:
+                fwith.write(line); cnt_with += 1
+            else:
+                fnone.write(line); cnt_none += 1
+    return cnt_in, cnt_with, cnt_none
+
+def _concat(parts, out_path):
+    with open(out_path, "wb") as out:
+        for p in parts:
+            with open(p, "rb") as f:
+                shutil.copyfileobj(f, out, 1 << 20)
+            os.remove(p)
+
+def main_raw():
+    """
+    Baris input disalin apa adanya (tanpa json.dumps). File dipecah jadi rentang byte,
+    tiap rentang di-route oleh satu proses ke file part, lalu part di-concat sesuai urutan
+    → urutan baris output sama dengan input.
+    """
+    size = os.path.getsize(IN_PATH)
+    parts = max(1, min(WORKERS, size // MIN_RANGE_BYTES))
+    ranges = byte_ranges(IN_PATH, parts)
+    jobs = [(IN_PATH, a, b, f"{OUT_WITH}.part{k}", f"{OUT_NONE}.part{k}") for k, (a, b) in enumerate(ranges)]
+    if len(jobs) <= 1:
+        results = [split_range(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=len(jobs)) as pool:
+            results = list(pool.map(split_range, *zip(*jobs)))
+    _concat([job[3] for job in jobs], OUT_WITH)
+    _concat([job[4] for job in jobs], OUT_NONE)
+    cnt_in, cnt_with, cnt_none = (sum(col) for col in zip(*results)) if results else (0, 0, 0)
+    print(f"Ranges        : {len(jobs)} (workers={WORKERS})")
+    return cnt_in, cnt_with, cnt_none
+
+def main_reencode():
+    """Mode lama: parse + encode ulang tiap object (juga untuk input .gz / .zst)."""
+    cnt_in = cnt_with = cnt_none = 0
+    with jsonl_io.JsonlWriter(OUT_WITH, "w") as fwith, \
+         jsonl_io.JsonlWriter(OUT_NONE, "w") as fnone:
+        for line in jsonl_io.iter_lines(IN_PATH):
+            if not line.strip():
                 continue
             try:
-                obj = json.loads(line)
+                obj = jsonl_io.loads(line)
             except Exception:
                 continue
 
             cnt_in += 1
             if has_commit_messages(obj):
-                fwith.write(json.dumps(obj, ensure_ascii=False) + "\n")
+                fwith.write(obj)
                 cnt_with += 1
             else:
-                fnone.write(json.dumps(obj, ensure_ascii=False) + "\n")
+                fnone.write(obj)
                 cnt_none += 1
+    return cnt_in, cnt_with, cnt_none
+
+# ====== DATASET ======
+def split_partition(root, entry):
+    """Satu partisi dataset input → {"with": [baris], "none": [baris]} (baris mentah)."""
+    out = {"with": [], "none": []}
+    for line in partitioned_jsonl.iter_partition_lines(root, entry):
+        r = route_line(line.encode("utf-8"))
+        if r is None:
+            continue
+        out["with" if r else "none"].append(line if line.endswith("\n") else line + "\n")
+    return out
+
+def main_partitioned():
+    """
+    Input dataset terpartisi → output dataset (<OUT_WITH>.dataset, <OUT_NONE>.dataset).
+    Partisi diproses paralel; partisi input yang tidak berubah sejak run terakhir di-skip.
+    """
+    out_with, out_none = partitioned_jsonl.dataset_path(OUT_WITH), partitioned_jsonl.dataset_path(OUT_NONE)
+    st = partitioned_jsonl.map_partitions(IN_PATH, {"with": out_with, "none": out_none},
+                                          split_partition, workers=WORKERS)
+    cnt_with, cnt_none = st["outputs"]["with"]["total_rows"], st["outputs"]["none"]["total_rows"]
+    print(f"Partitions    : {st['partitions']} (processed={st['processed']}, unchanged={st['skipped']})")
+    print(f"With commits  : {cnt_with} -> {out_with}")
+    print(f"No commits    : {cnt_none} -> {out_none}")
+
+def main():
+    os.makedirs(os.path.dirname(OUT_WITH), exist_ok=True)
+    if partitioned_jsonl.is_dataset(IN_PATH):
+        return main_partitioned()
+
+    if RAW and not IN_PATH.lower().endswith((".gz", ".zst")):
+        cnt_in, cnt_with, cnt_none = main_raw()
+    else:
+        cnt_in, cnt_with, cnt_none = main_reencode()
 
     print(f"Total in      : {cnt_in}")
     print(f"With commits  : {cnt_with} -> {OUT_WITH}")
     print(f"No commits    : {cnt_none} -> {OUT_NONE}")
+    if partitioned_jsonl.partitioned():
+        partitioned_jsonl.export_jsonl(OUT_WITH)
+        partitioned_jsonl.export_jsonl(OUT_NONE)
 
 if __name__ == "__main__":
     main()
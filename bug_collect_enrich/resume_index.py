@@ -0,0 +1,135 @@
+"""
+resume_index.py
+Sidecar resume index untuk enrich_bugzilla_from_file (<out>.resume.json).
+
+Tanpa sidecar, resume = json-parse seluruh output JSONL untuk set id, lalu
+json-parse ulang seluruh input. Dengan sidecar:
+- offset  : byte offset input; semua record sebelum offset sudah diproses
+            → input langsung di-seek ke sana
+- ahead   : id (sorted) yang sudah selesai di belakang offset (mode unordered)
+- out_size: ukuran output saat sidecar ditulis; baris output setelahnya
+            (crash sebelum sidecar sempat ditulis) dibaca dari ekor saja
+Sidecar hanya dipakai kalau input JSONL dan ukuran + mtime input masih sama.
+"""
+import os, sys, json
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import jsonl_io
+
+
+def sidecar_path(out_path):
+    return out_path + ".resume.json"
+
+def _input_sig(in_path):
+    st = os.stat(in_path)
+    return {"in_path": os.path.abspath(in_path), "in_size": st.st_size, "in_mtime_ns": st.st_mtime_ns}
+
+
+# ====== INPUT ======
+def iter_jsonl_offsets(path, start=0):
+    """Yield (end_offset, obj) per baris JSONL mulai byte `start`; obj None kalau baris tidak valid."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        pos = start
+        for line in f:
+            pos += len(line)
+            obj = None
+            if line.strip():
+                try:
+                    obj = jsonl_io.loads(line)
+                except:
+                    pass
+            yield pos, obj if isinstance(obj, dict) else None
+
+
+# ====== TRACKER ======
+class ResumeTracker:
+    """
+    Watermark offset input: naik hanya kalau semua record sebelumnya sudah selesai,
+    jadi aman juga untuk mode unordered (selesai tidak urut input).
+    """
+    def __init__(self, start=0):
+        self.offset = start
+        self.queue = deque()    # [end_offset, bug_id, finished] urut input
+        self.inflight = {}      # id(bug) -> entry queue
+
+    def _advance(self):
+        q = self.queue
+        while q and q[0][2]:
+            self.offset = q.popleft()[0]
+
+    def skip(self, end):
+        """Record yang tidak perlu diproses (invalid / sudah ada)."""
+        self.queue.append([end, None, True])
+        self._advance()
+
+    def dispatch(self, bug, bug_id, end):
+        entry = [end, bug_id, False]
+        self.queue.append(entry)
+        self.inflight[id(bug)] = entry
+
+    def finish(self, bug):
+        entry = self.inflight.pop(id(bug), None)
+        if entry is not None:
+            entry[2] = True
+            self._advance()
+
+    def ahead_ids(self):
+        return sorted(e[1] for e in self.queue if e[2] and e[1] is not None)
+
+
+# ====== SIDECAR ======
+def save_resume(out_path, in_path, tracker):
+    """Panggil tepat setelah output di-flush: semua bug yang finish() sudah ada di output."""
+    state = _input_sig(in_path)
+    state["offset"] = tracker.offset
+    state["ahead"] = tracker.ahead_ids()
+    state["out_size"] = os.path.getsize(out_path) if os.path.exists(out_path) else 0
+    path = sidecar_path(out_path)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+def _tail_ids(out_path, start):
+    ids = set()
+    decode = jsonl_io.make_decoder(("id",))
+    with open(out_path, "rb") as f:
+        f.seek(start)
+        for line in f:
+            try:
+                bid = decode(line).get("id")
+                if isinstance(bid, int): ids.add(bid)
+            except:
+                pass
+    return ids
+
+def load_resume(out_path, in_path):
+    """
+    Return (offset, ids_sudah_ada) dari sidecar, atau None kalau sidecar tidak ada /
+    tidak cocok lagi dengan input & output (caller fallback ke scan penuh).
+    """
+    path = sidecar_path(out_path)
+    if not os.path.isfile(path) or not os.path.isfile(out_path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except Exception:
+        return None
+    sig = _input_sig(in_path)
+    if any(state.get(k) != v for k, v in sig.items()):
+        return None
+    out_size = os.path.getsize(out_path)
+    if state.get("out_size", -1) > out_size:
+        return None
+    ids = set(state.get("ahead") or [])
+    if out_size > state["out_size"]:
+        ids |= _tail_ids(out_path, state["out_size"])
+    return int(state.get("offset", 0)), ids
+
+def clear_resume(out_path):
+    path = sidecar_path(out_path)
+    if os.path.exists(path):
+        os.remove(path)
@@ -0,0 +1,231 @@
+"""
+bench_collect.py
+Benchmark collector terhadap stub Bugzilla REST lokal (tanpa network keluar).
+
+  python collecting_data/bench_collect.py [--months 12] [--per-month 2500] [--latency 0.2] [--workers 8]
+  python collecting_data/bench_collect.py --github [--repos 4] [--per-month 300]
+
+Stub meniru /rest/bug: filter creation_time (>=) + v1 (lessthan), offset/limit,
+count_only, dengan latency buatan per request supaya mirip round-trip ke BMO.
+Stub GitHub meniru /repos/{o}/{r}/issues: since (updated_at), sort=created asc,
+page/per_page, ETag + If-None-Match → 304.
+"""
+import os, sys, time, json, argparse, threading
+from datetime import datetime, timedelta, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+import collect_bug_bugzilla as bz
+import collect_bug_github as gh
+
+
+# ====== STUB SERVER ======
+def _parse_z(s):
+    return datetime.strptime(s, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+
+class StubBugzilla:
+    def __init__(self, since, months, per_month, latency):
+        self.latency = latency
+        self.requests = 0
+        self.lock = threading.Lock()
+        self.bugs = []
+        start = datetime.fromisoformat(since).replace(tzinfo=timezone.utc)
+        for m, (w_start, w_end) in enumerate(bz.month_range(start, start + timedelta(days=31 * months - 1))):
+            if m >= months:
+                break
+            span = (w_end - w_start).total_seconds()
+            for i in range(per_month):
+                ct = w_start + timedelta(seconds=int(span * i / per_month))
+                self.bugs.append({
+                    "id": (m + 1) * 1_000_000 + i,
+                    "summary": f"stub bug {m}-{i} https://example.org/x",
+                    "status": "NEW", "resolution": "", "product": "Core", "component": "General",
+                    "creation_time": ct.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                    "last_change_time": ct.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                    "creator": "a@example.org", "assigned_to": "b@example.org",
+                    "keywords": [], "url": "", "depends_on": [], "dupe_of": None,
+                })
+
+    def query(self, q):
+        with self.lock:
+            self.requests += 1
+        lo = q.get("creation_time", [""])[0]
+        hi = q.get("v1", ["9999"])[0]
+        rows = [b for b in self.bugs if lo <= b["creation_time"] < hi]
+        if q.get("count_only"):
+            return {"bug_count": len(rows)}
+        off = int(q.get("offset", ["0"])[0])
+        lim = int(q.get("limit", ["1000"])[0])
+        return {"bugs": rows[off:off + lim]}
+
+    def serve(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                time.sleep(stub.latency)
+                body = json.dumps(stub.query(parse_qs(urlparse(self.path).query))).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *a):
+                pass
+
+        srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=srv.serve_forever, daemon=True).start()
+        return srv
+
+
+class StubGitHub:
+    def __init__(self, repos, months, per_month, latency):
+        self.latency = latency
+        self.requests = 0
+        self.not_modified = 0
+        self.lock = threading.Lock()
+        self.issues = {}
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        for r in range(repos):
+            rows = []
+            for i in range(months * per_month):
+                ct = start + timedelta(days=31 * months * i / (months * per_month))
+                ut = ct + timedelta(days=(i * 7) % 90)
+                row = {"id": r * 10_000_000 + i + 1, "number": i + 1, "title": f"issue {i}",
+                       "state": "open", "html_url": f"https://github.com/o/repo{r}/issues/{i + 1}",
+                       "created_at": ct.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                       "updated_at": ut.strftime("%Y-%m-%dT%H:%M:%SZ"), "labels": [], "user": {"login": "u"}}
+                if i % 3 == 0:
+                    row["pull_request"] = {}
+                rows.append(row)
+            self.issues[f"o/repo{r}"] = rows
+
+    def query(self, repo, q):
+        since = q.get("since", [""])[0]
+        rows = [it for it in self.issues[repo] if it["updated_at"] >= since]
+        if q.get("sort", ["created"])[0] == "created" and q.get("direction", ["desc"])[0] == "desc":
+            rows = rows[::-1]
+        per = int(q.get("per_page", ["30"])[0])
+        page = int(q.get("page", ["1"])[0])
+        return rows[(page - 1) * per:page * per]
+
+    def serve(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                time.sleep(stub.latency)
+                u = urlparse(self.path)
+                repo = "/".join(u.path.split("/")[2:4])
+                body = json.dumps(stub.query(repo, parse_qs(u.query))).encode()
+                etag = '"%x"' % hash(body)
+                with stub.lock:
+                    stub.requests += 1
+                    if self.headers.get("If-None-Match") == etag:
+                        stub.not_modified += 1
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *a):
+                pass
+
+        srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=srv.serve_forever, daemon=True).start()
+        return srv
+
+
+def bench_github(args):
+    import tempfile
+    stub = StubGitHub(args.repos, args.months, args.per_month, args.latency)
+    srv = stub.serve()
+    tmp = tempfile.mkdtemp()
+    gh.GITHUB_API_BASE = f"http://127.0.0.1:{srv.server_port}"
+    gh.GITHUB_TOKEN = None
+    gh.OWNER_REPOS = sorted(stub.issues)
+    gh.SINCE = "2024-01-01"
+    gh.CURSOR_PATH = os.path.join(tmp, "cursor.json")
+    gh.ETAG_CACHE_PATH = os.path.join(tmp, "etag.sqlite")
+    print(f"stub: {args.repos} repos x {args.months * args.per_month} issues+PRs, latency={args.latency}s")
+
+    results = []
+    for label, workers in (("cursor (workers=1)", 1), (f"cursor (workers={args.workers})", args.workers),
+                           (f"cursor re-run, ETag (workers={args.workers})", args.workers)):
+        stub.requests = stub.not_modified = 0
+        t0 = time.perf_counter()
+        rows = gh.fetch_bugs_by_date(workers=workers)
+        dt = time.perf_counter() - t0
+        print(f"{label:<36} rows={len(rows):>7}  requests={stub.requests:>5}  304={stub.not_modified:>5}  {dt:7.2f}s")
+        results.append((dt, sorted(r["id"] for r in rows)))
+        if len(results) == 1:
+            os.remove(gh.ETAG_CACHE_PATH)   # run paralel pertama juga tanpa cache
+    print(f"identical ids: {results[0][1] == results[1][1] == results[2][1]}   "
+          f"speedup: {results[0][0] / results[1][0]:.1f}x")
+    srv.shutdown()
+
+
+# ====== BENCH ======
+def run(label, fn, stub):
+    stub.requests = 0
+    t0 = time.perf_counter()
+    rows = fn()
+    dt = time.perf_counter() - t0
+    print(f"{label:<28} rows={len(rows):>8}  requests={stub.requests:>5}  {dt:7.2f}s")
+    return dt, rows
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark collect_bug_bugzilla vs stub Bugzilla")
+    ap.add_argument("--months", type=int, default=12)
+    ap.add_argument("--per-month", type=int, default=2500)
+    ap.add_argument("--latency", type=float, default=0.2, help="detik per request")
+    ap.add_argument("--workers", type=int, default=8)
+    ap.add_argument("--max-rps", type=float, default=0, help="0 = tanpa rate limit")
+    ap.add_argument("--github", action="store_true", help="benchmark collect_bug_github vs stub GitHub")
+    ap.add_argument("--repos", type=int, default=4)
+    args = ap.parse_args()
+
+    if args.github:
+        bench_github(args)
+        return
+
+    since = "2020-01-01"
+    stub = StubBugzilla(since, args.months, args.per_month, args.latency)
+    srv = stub.serve()
+    bz.BUGZILLA_BASE = f"http://127.0.0.1:{srv.server_port}"
+    bz.BUGZILLA_API_KEY = None
+    bz.SINCE = since
+    # window sampai akhir data stub saja, bukan sampai hari ini
+    end = _parse_z(stub.bugs[-1]["creation_time"]) + timedelta(days=1)
+    real_range = bz.month_range
+    bz.month_range = lambda s, e: real_range(s, min(e, end))
+
+    print(f"stub: {len(stub.bugs)} bugs, {args.months} windows, latency={args.latency}s")
+    # rate limit sama untuk kedua run (default MAX_RPS collector membatasi run sequential saja)
+    t_seq, seq = run("sequential (workers=1)",
+                     lambda: bz.fetch_bugs_by_date(workers=1, max_rps=args.max_rps), stub)
+    t_par, par = run(f"concurrent (workers={args.workers})",
+                     lambda: bz.fetch_bugs_by_date(workers=args.workers, max_rps=args.max_rps), stub)
+
+    same = sorted(b["id"] for b in seq) == sorted(b["id"] for b in par)
+    print(f"identical ids: {same}   speedup: {t_seq / t_par:.1f}x")
+    srv.shutdown()
+
+if __name__ == "__main__":
+    main()
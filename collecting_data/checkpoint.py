@@ -0,0 +1,159 @@
+"""
+checkpoint.py
+Incremental (delta) collect untuk collector bugzilla / github / redmine.
+
+- Checkpoint JSON: {source: {product: max last_change_time}} → run berikutnya
+  cuma query bug yang berubah sejak checkpoint.
+- Delta di-merge by id langsung ke dataset terpartisi (partitioned_jsonl, <out>.dataset,
+  product + bulan creation_time): hanya bulan yang kena yang dibaca & partisinya ditulis ulang
+  (partisi yang isinya sama tidak disentuh). JSONL utama dibangun ulang dari dataset kalau perlu.
+  Layout DATASET_LAYOUT=jsonl: dataset dipakai sebagai store delta, dibuat dari JSONL full run.
+"""
+import os, sys, json, shutil
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from jsonl_io import loads, dumps
+import partitioned_jsonl
+
+ALL_PRODUCTS = "*"
+
+
+# ====== CHECKPOINT ======
+def load_checkpoint(path):
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+    return {}
+
+def save_checkpoint(path, state):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+def update_checkpoint(state, source, rows, per_product=True):
+    """Naikkan max last_change_time per (source, product) dari rows hasil clean."""
+    src = state.setdefault(source, {})
+    for r in rows:
+        lct = r.get("last_change_time") or ""
+        if not lct:
+            continue
+        keys = [ALL_PRODUCTS]
+        if per_product and r.get("product"):
+            keys.append(r["product"])
+        for k in keys:
+            if lct > src.get(k, ""):
+                src[k] = lct
+    return state
+
+def checkpoint_since(state, source, product=None):
+    """
+    Checkpoint global source (product=None) atau per product.
+    None kalau belum ada → caller pakai SINCE (product baru = ambil history penuh).
+    """
+    src = state.get(source) or {}
+    return src.get(ALL_PRODUCTS if product is None else product)
+
+def checkpoint_from_jsonl(state, source, path):
+    """Seed checkpoint dari JSONL hasil full run (streaming, per baris)."""
+    if not os.path.exists(path):
+        return state
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.strip(): continue
+            try:
+                update_checkpoint(state, source, [loads(line)])
+            except Exception:
+                pass
+    return state
+
+
+# ====== PARTITIONS ======
+def _sort_key(r):
+    return (r.get("creation_time", ""), r.get("id", 0))
+
+def merge_into_dataset(root, rows):
+    """
+    Merge rows (hasil clean) by id ke dataset; yang lebih baru (last_change_time) menang.
+    Per bulan creation_time yang kena, semua partisi product bulan itu dibaca (bug bisa pindah
+    product), lalu dikelompokkan ulang; partisi lain dipertahankan apa adanya.
+    Return list key partisi yang berubah / terhapus.
+    """
+    by_month = {}
+    for r in rows:
+        month = partitioned_jsonl.partition_key(r).rsplit("month=", 1)[1]
+        by_month.setdefault(month, {})[r["id"]] = r
+    if not by_month:
+        return []
+
+    entries = partitioned_jsonl.partitions(root) if partitioned_jsonl.is_dataset(root) else []
+    w = partitioned_jsonl.DatasetWriter(root)
+    touched = set()
+    for month, updates in sorted(by_month.items()):
+        merged = {}
+        for e in entries:
+            if e["month"] != month:
+                continue
+            touched.add(e["key"])
+            for line in partitioned_jsonl.iter_partition_lines(root, e):
+                if line.strip():
+                    r = loads(line)
+                    merged[r["id"]] = r
+        for i, r in updates.items():
+            old = merged.get(i)
+            if old is None or r.get("last_change_time", "") > old.get("last_change_time", ""):
+                merged[i] = r
+        groups = {}
+        for r in sorted(merged.values(), key=_sort_key):
+            groups.setdefault(partitioned_jsonl.partition_key(r), []).append(dumps(r) + "\n")
+        for key, lines in groups.items():
+            touched.add(key)
+            w.put_partition(key, lines)   # isi sama → file lama tidak disentuh
+    for e in entries:
+        if e["key"] not in touched:
+            w.keep_partition(e["key"])
+    w.close()   # partisi bulan yang kena tapi sekarang kosong → dihapus (prune)
+    return sorted(k for k in touched
+                  if w.old.get(k, {}).get("digest") != w.entries.get(k, {}).get("digest"))
+
+
+def reset_checkpoint(out_path, source, ckpt_path):
+    """
+    Setelah full run: checkpoint di-seed ulang dari output. Layout jsonl → store delta lama
+    (dataset) dibuang, dibangun ulang dari JSONL baru saat delta berikutnya.
+    """
+    if not partitioned_jsonl.partitioned():
+        shutil.rmtree(partitioned_jsonl.dataset_path(out_path), ignore_errors=True)
+    save_checkpoint(ckpt_path, checkpoint_from_jsonl({}, source, out_path))
+
+
+# ====== DELTA RUN ======
+def apply_delta(out_path, pages, clean_fn, source, ckpt_path, state, write_jsonl=True):
+    """
+    Clean halaman delta, merge ke dataset (partisi yang kena saja), rebuild JSONL utama
+    (write_jsonl=False → dilewati, mis. DATASET_KEEP_JSONL=0), lalu simpan checkpoint baru.
+    Return (jumlah bug berubah, partisi berubah).
+    """
+    root = partitioned_jsonl.dataset_path(out_path)
+    if not partitioned_jsonl.is_dataset(root):
+        # sekali: JSONL full run → dataset (encode ulang: format baris sama dengan hasil merge)
+        partitioned_jsonl.export_jsonl(out_path, root, reencode=True)
+
+    delta = {}
+    for page in pages:
+        for b in page:
+            if "id" not in b: continue
+            cb = clean_fn(b)
+            old = delta.get(cb["id"])
+            if old is None or cb.get("last_change_time", "") > old.get("last_change_time", ""):
+                delta[cb["id"]] = cb
+
+    changed = merge_into_dataset(root, delta.values())
+    if write_jsonl and (changed or not os.path.exists(out_path)) and partitioned_jsonl.is_dataset(root):
+        partitioned_jsonl.write_jsonl(root, out_path)
+    update_checkpoint(state, source, delta.values())
+    save_checkpoint(ckpt_path, state)
+    return len(delta), changed
@@ -1,5 +1,11 @@
-import os, json, csv, re, requests
-from datetime import datetime, timedelta, timezone
+import os, sys, requests
+from datetime import datetime, timezone
+from checkpoint import checkpoint_since
+import engine
+from engine import to_utc_iso_z, clean_text, as_list, as_int_or_none, month_range, make_record
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import http_client
 
 # ====== CONFIG ======
 BUGZILLA_BASE = "https://bugzilla.mozilla.org"
@@ -9,141 +15,173 @@ BY = "creation_time"
 PER_PAGE = 200000              
 MAX_TOTAL = 10000000            
 PRODUCTS = [] 
+PAGE_LIMIT = 1000
+WORKERS = int(os.getenv("BUGZILLA_WORKERS", "8"))         # 1 = sequential (mode lama)
+MAX_RPS = float(os.getenv("BUGZILLA_MAX_RPS", "5"))       # batas global request/detik, 0 = tanpa batas
 
 OUT_JSONL = "bugzilla_bugs.jsonl"
+STREAM        = os.getenv("COLLECT_STREAM", "0") not in ("0","false","False")        # append per halaman
+STREAM_SORT   = os.getenv("COLLECT_STREAM_SORT", "1") not in ("0","false","False")   # external sort by creation_time
+STREAM_RESUME = os.getenv("COLLECT_STREAM_RESUME", "0") not in ("0","false","False") # lanjut file+index lama
+DELTA         = os.getenv("COLLECT_DELTA", "0") not in ("0","false","False")         # hanya bug berubah sejak checkpoint
+SOURCE = "bugzilla"
+CHECKPOINT_PATH = OUT_JSONL + ".checkpoint.json"
+
+# ====== FETCH ======
+INCLUDE_FIELDS = list(engine.RECORD_FIELDS)
+
+def window_params(w_start, w_end):
+    params = {
+        "include_fields": INCLUDE_FIELDS,
+        "order": "creation_time asc",
+        "limit": PAGE_LIMIT,
+        "creation_time": w_start.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "f1": "creation_ts", "o1": "lessthan", "v1": w_end.strftime("%Y-%m-%dT%H:%M:%SZ"),
+    }
+    if PRODUCTS:
+        params["product"] = PRODUCTS
+    if BUGZILLA_API_KEY:
+        params["api_key"] = BUGZILLA_API_KEY
+    return params
+
+def fetch_page(base_url, params, offset):
+    r = http_client.get(base_url, params={**params, "offset": offset}, timeout=120)
+    r.raise_for_status()
+    return r.json().get("bugs", [])
+
+def fetch_window_count(base_url, params):
+    """Jumlah bug di window (count_only); None kalau server tidak mendukung."""
+    q = {k: v for k, v in params.items() if k not in ("include_fields", "order", "limit")}
+    q["count_only"] = 1
+    r = http_client.get(base_url, params=q, timeout=120)
+    r.raise_for_status()
+    count = r.json().get("bug_count")
+    return int(count) if count is not None else None
+
+def _iter_sequential(base_url, windows):
+    for w_start, w_end in windows:
+        params = window_params(w_start, w_end)
+        offset = 0
+        while True:
+            page = fetch_page(base_url, params, offset)
+            if not page:
+                break
+            yield page
+
+            if len(page) < params["limit"]:
+                break
+            offset += params["limit"]
 
-# ====== HELPERS ======
-def to_utc_iso_z(s):
-    if "T" in s:
-        dt = datetime.fromisoformat(s.replace("Z","").replace("z",""))
-    else:
-        dt = datetime.fromisoformat(s) 
-    if dt.tzinfo is None:
-        dt = dt.replace(tzinfo=timezone.utc)
-    return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
-
-URL_RE = re.compile(r"https?://\S+")
-SPACE_RE = re.compile(r"\s+")
-
-def clean_text(x):
-    if x is None: return ""
-    if not isinstance(x, str): x = str(x)
-    x = URL_RE.sub(" ", x)
-    x = SPACE_RE.sub(" ", x).strip()
-    return x
-
-def as_list(x):
-    if x is None: return []
-    return x if isinstance(x, list) else [x]
-
-def as_int_or_none(x):
-    try:
-        i = int(x)
-        return i if i != 0 else None
-    except:
-        return None
-
-def month_range(start_dt, end_dt):
-    cur = datetime(start_dt.year, start_dt.month, 1, tzinfo=timezone.utc)
-    while cur <= end_dt:
-        if cur.month == 12:
-            nxt = datetime(cur.year+1, 1, 1, tzinfo=timezone.utc)
-        else:
-            nxt = datetime(cur.year, cur.month+1, 1, tzinfo=timezone.utc)
-        yield cur, min(nxt - timedelta(seconds=1), end_dt)
-        cur = nxt
-
-def fetch_bugs_by_date():
+def _iter_concurrent(base_url, windows, workers):
+    """
+    Window & halaman diambil paralel lewat engine.iter_tasks.
+    Per window: count_only dulu → semua offset langsung di-submit;
+    kalau count tidak tersedia, halaman berikutnya di-submit berantai.
+    """
+    def start(submit):
+        for w_start, w_end in windows:
+            params = window_params(w_start, w_end)
+            submit(fetch_window_count, base_url, params, ctx=("count", params, 0, None))
+
+    def handle(ctx, fut, submit):
+        kind, params, offset, count = ctx
+        limit = params["limit"]
+
+        if kind == "count":
+            try:
+                count = fut.result()
+            except (requests.RequestException, ValueError):
+                count = None
+            if not count:
+                submit(fetch_page, base_url, params, 0, ctx=("chain", params, 0, None))
+            else:
+                for off in range(0, count, limit):
+                    submit(fetch_page, base_url, params, off, ctx=("page", params, off, count))
+            return
+
+        page = fut.result()
+        if page:
+            yield page
+
+        # halaman terakhir masih penuh (mode berantai / count meleset) → lanjut offset berikutnya
+        is_last = kind == "chain" or offset + limit >= count
+        if is_last and len(page) >= limit:
+            submit(fetch_page, base_url, params, offset + limit, ctx=("chain", params, offset + limit, None))
+
+    return engine.iter_tasks(start, handle, workers)
+
+def iter_bug_pages(workers=None, max_rps=None):
+    """Yield halaman mentah (list of bug dict) per request, urutan selesai."""
     base_url = f"{BUGZILLA_BASE.rstrip('/')}/rest/bug"
-    include_fields = [
-        "id","summary","status","resolution","product","component",
-        "creation_time","last_change_time","creator","assigned_to",
-        "keywords","url","depends_on","dupe_of"
-    ]
+    workers = WORKERS if workers is None else workers
+    max_rps = MAX_RPS if max_rps is None else max_rps
 
     start_dt = datetime.fromisoformat(SINCE).replace(tzinfo=timezone.utc)
     end_dt   = datetime.now(timezone.utc)
-
-    all_rows = {}
-    for w_start, w_end in month_range(start_dt, end_dt):
+    windows = list(month_range(start_dt, end_dt))
+
+    engine.set_rate(base_url, max_rps)
+    if workers <= 1:
+        return _iter_sequential(base_url, windows)
+    return _iter_concurrent(base_url, windows, workers)
+
+def iter_delta_pages(state):
+    """
+    Halaman bug yang last_change_time >= checkpoint (per product kalau PRODUCTS diisi).
+    Scope sama dengan full run: creation_time >= SINCE (bug lama yang baru di-update tidak ikut).
+    """
+    base_url = f"{BUGZILLA_BASE.rstrip('/')}/rest/bug"
+    engine.set_rate(base_url, MAX_RPS)
+    start_ts = to_utc_iso_z(SINCE)
+    for product in (PRODUCTS or [None]):
+        since = checkpoint_since(state, SOURCE, product) or start_ts
+        print(f"[delta] product={product or '*'} since={since}")
         params = {
-            "include_fields": include_fields,
-            "order": "creation_time asc",
-            "limit": 1000,              
-            "creation_time": w_start.strftime("%Y-%m-%dT%H:%M:%SZ"),
-            "f1": "creation_ts", "o1": "lessthan", "v1": w_end.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "include_fields": INCLUDE_FIELDS,
+            "order": "bug_id",
+            "limit": PAGE_LIMIT,
+            "last_change_time": since,
+            "creation_time": start_ts,
         }
-        if PRODUCTS:
-            params["product"] = PRODUCTS
+        if product:
+            params["product"] = product
         if BUGZILLA_API_KEY:
             params["api_key"] = BUGZILLA_API_KEY
-
         offset = 0
         while True:
-            params["offset"] = offset
-            r = requests.get(base_url, params=params, timeout=120)
-            r.raise_for_status()
-            data = r.json()
-            page = data.get("bugs", [])
+            page = fetch_page(base_url, params, offset)
             if not page:
                 break
-            for b in page:
-                all_rows[b["id"]] = b   # de-dup by id di sini
-
-            if len(page) < params["limit"]:
+            yield page
+            if len(page) < PAGE_LIMIT:
                 break
-            offset += params["limit"]
+            offset += PAGE_LIMIT
 
-    return list(all_rows.values())
+def fetch_bugs_by_date(workers=None, max_rps=None):
+    return engine.fetch_all(iter_bug_pages(workers, max_rps))
 
 # ====== CLEANING ======
 def clean_bug(b):
-    return {
-        "id": int(b.get("id")),
-        "summary": clean_text(b.get("summary")),
-        "status": clean_text(b.get("status")),
-        "resolution": clean_text(b.get("resolution")),
-        "product": clean_text(b.get("product")),
-        "component": clean_text(b.get("component")),
-        "creation_time": clean_text(b.get("creation_time")),
-        "last_change_time": clean_text(b.get("last_change_time")),
-        "creator": clean_text(b.get("creator")),
-        "assigned_to": clean_text(b.get("assigned_to")),
-        "keywords": [clean_text(k) for k in as_list(b.get("keywords"))],
-        "url": clean_text(b.get("url")),
-        "depends_on": [int(x) for x in as_list(b.get("depends_on")) if as_int_or_none(x) is not None],
-        "dupe_of": as_int_or_none(b.get("dupe_of")),
-    }
-
-def clean_dataset(rows):
-    tmp = {}
-    for b in rows:
-        if "id" not in b: continue
-        cb = clean_bug(b)
-        i = cb["id"]
-        if i not in tmp:
-            tmp[i] = cb
-        else:
-            old = tmp[i].get("last_change_time","")
-            new = cb.get("last_change_time","")
-            if new > old:
-                tmp[i] = cb
-    out = list(tmp.values())
-    out.sort(key=lambda x: x.get("creation_time",""))
-    return out
-
-# ====== SAVE ======
-def save_jsonl(path, rows):
-    with open(path, "w", encoding="utf-8") as f:
-        for r in rows:
-            f.write(json.dumps(r, ensure_ascii=False) + "\n")
-
+    return make_record(
+        id=int(b.get("id")),
+        summary=clean_text(b.get("summary")),
+        status=clean_text(b.get("status")),
+        resolution=clean_text(b.get("resolution")),
+        product=clean_text(b.get("product")),
+        component=clean_text(b.get("component")),
+        creation_time=clean_text(b.get("creation_time")),
+        last_change_time=clean_text(b.get("last_change_time")),
+        creator=clean_text(b.get("creator")),
+        assigned_to=clean_text(b.get("assigned_to")),
+        keywords=[clean_text(k) for k in as_list(b.get("keywords"))],
+        url=clean_text(b.get("url")),
+        depends_on=[int(x) for x in as_list(b.get("depends_on")) if as_int_or_none(x) is not None],
+        dupe_of=as_int_or_none(b.get("dupe_of")),
+    )
 
 # ====== MAIN ======
 if __name__ == "__main__":
-    print(f"fetching since={SINCE} by={BY} ...")
-    raw = fetch_bugs_by_date()
-    print("raw:", len(raw))
-    clean = clean_dataset(raw)
-    print("clean:", len(clean))
-    save_jsonl(OUT_JSONL, clean)
+    if not DELTA:
+        print(f"fetching since={SINCE} by={BY} workers={WORKERS} max_rps={MAX_RPS} ...")
+    source = engine.Source(SOURCE, OUT_JSONL, iter_bug_pages, iter_delta_pages, clean_bug, CHECKPOINT_PATH)
+    engine.run(source, delta=DELTA, stream=STREAM, stream_resume=STREAM_RESUME, stream_sort=STREAM_SORT)
@@ -1,5 +1,12 @@
-import os, json, re, time, requests
-from datetime import datetime, timedelta, timezone
+import os, sys, json, math, requests
+from datetime import datetime, timezone
+from checkpoint import checkpoint_since
+import engine
+from engine import to_utc_iso_z, clean_text, month_range, make_record
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import http_client
+from http_cache import HttpCache
 
 # ====== CONFIG ======
 GITHUB_API_BASE = "https://api.github.com"
@@ -11,158 +18,199 @@ PER_PAGE = 100
 MAX_TOTAL = 10_000_000
 
 OUT_JSONL = "github_bugs.jsonl"                  
+STREAM        = os.getenv("COLLECT_STREAM", "0") not in ("0","false","False")        # append per halaman
+STREAM_SORT   = os.getenv("COLLECT_STREAM_SORT", "1") not in ("0","false","False")   # external sort by creation_time
+STREAM_RESUME = os.getenv("COLLECT_STREAM_RESUME", "0") not in ("0","false","False") # lanjut file+index lama
+DELTA         = os.getenv("COLLECT_DELTA", "0") not in ("0","false","False")         # hanya issue berubah sejak checkpoint
+SOURCE = "github"
+CHECKPOINT_PATH = OUT_JSONL + ".checkpoint.json"
+
+# crawler cursor: list issue per repo di-page sekali (sort=created asc), repo paralel,
+# halaman disimpan dengan ETag → run berikutnya revalidasi (304 tidak memakan quota)
+REPO_WORKERS    = int(os.getenv("GITHUB_REPO_WORKERS", "4"))
+ETAG_CACHE      = os.getenv("GITHUB_ETAG_CACHE", "1") not in ("0","false","False")
+ETAG_CACHE_PATH = os.getenv("GITHUB_ETAG_CACHE_PATH", OUT_JSONL + ".etag.sqlite")
+ETAG_CACHE_MB   = int(os.getenv("GITHUB_ETAG_CACHE_MB", "2048"))
+CURSOR_PATH     = OUT_JSONL + ".cursor.json"
 
 # ====== HELPERS ======
-def to_utc_iso_z(s):
-    if not s: return ""
-    s = str(s)
-    try:
-        if "T" in s:
-            dt = datetime.fromisoformat(s.replace("Z","").replace("z",""))
-        else:
-            dt = datetime.fromisoformat(s)
-    except:
-        return s
-    if dt.tzinfo is None:
-        dt = dt.replace(tzinfo=timezone.utc)
-    return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
-
-URL_RE = re.compile(r"https?://\S+")
-SPACE_RE = re.compile(r"\s+")
-
-def clean_text(x):
-    if x is None: return ""
-    if not isinstance(x, str): x = str(x)
-    x = URL_RE.sub(" ", x)
-    x = SPACE_RE.sub(" ", x).strip()
-    return x
-
-def as_list(x):
-    if x is None: return []
-    return x if isinstance(x, list) else [x]
-
-def as_int_or_none(x):
-    try:
-        i = int(x)
-        return i if i != 0 else None
-    except:
-        return None
-
-def month_range(start_dt, end_dt):
-    cur = datetime(start_dt.year, start_dt.month, 1, tzinfo=timezone.utc)
-    while cur <= end_dt:
-        if cur.month == 12:
-            nxt = datetime(cur.year + 1, 1, 1, tzinfo=timezone.utc)
-        else:
-            nxt = datetime(cur.year, cur.month + 1, 1, tzinfo=timezone.utc)
-        yield cur, min(nxt - timedelta(seconds=1), end_dt)
-        cur = nxt
-
 def _headers():
     h = {"Accept": "application/vnd.github+json", "User-Agent": "gh-issues-list-collector/1.1"}
     if GITHUB_TOKEN:
         h["Authorization"] = f"Bearer {GITHUB_TOKEN}"
     return h
 
-def _wait_from_headers(resp, attempt):
-    retry_after = resp.headers.get("Retry-After")
-    reset = resp.headers.get("X-RateLimit-Reset")
-    wait = None
-    if retry_after:
-        try: wait = int(retry_after)
-        except: pass
-    if wait is None and reset:
+def gh_get(url, params, max_retries=5):
+    # 403/429 rate limit (Retry-After / X-RateLimit-Reset) sudah di-handle http_client
+    resp = http_client.get(url, params=params, headers=_headers(), timeout=120, max_retries=max_retries)
+    try:
+        resp.raise_for_status()
+        return resp
+    except requests.HTTPError as e:
+        print("ERROR", resp.status_code, resp.url)
         try:
-            reset_ts = int(reset)
-            now = int(time.time())
-            wait = max(1, reset_ts - now)
+            print(resp.text[:5000])
         except:
             pass
-    if wait is None:
-        wait = min(60 * (attempt + 1), 300)  # backoff
-    print(f"[rate-limit] waiting {wait}s …")
-    time.sleep(wait)
-
-def gh_get(url, params, max_retries=5):
-    attempt = 0
-    while True:
-        resp = requests.get(url, params=params, headers=_headers(), timeout=120)
-        if resp.status_code == 403 and attempt < max_retries:
-            _wait_from_headers(resp, attempt)
-            attempt += 1
-            continue
-        try:
-            resp.raise_for_status()
-            return resp
-        except requests.HTTPError as e:
-            print("ERROR", resp.status_code, resp.url)
-            try:
-                print(resp.text[:5000])
-            except:
-                pass
-            raise
+        raise
 
 # ====== FETCH  ======
-def fetch_bugs_by_date():
+def load_cursors():
+    try:
+        with open(CURSOR_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def save_cursors(cursors):
+    tmp = CURSOR_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(cursors, f, indent=2)
+    os.replace(tmp, CURSOR_PATH)
+
+def fetch_issue_page(repo, page, cache=None):
+    """Satu halaman list issue+PR repo (urut created asc). Return (items, revalidated_304)."""
+    owner, name = repo.split("/", 1)
+    url = f"{GITHUB_API_BASE}/repos/{owner}/{name}/issues"
+    params = {
+        "state": "all",
+        "since": to_utc_iso_z(SINCE),   # updated_at >= SINCE, superset dari created_at >= SINCE
+        "sort": "created",
+        "direction": "asc",
+        "per_page": PER_PAGE,
+        "page": page
+    }
+    if cache is None:
+        return gh_get(url, params).json(), False
+    resp = cache.get(url, params=params, headers=_headers(), timeout=120)
+    if resp.status_code != 200:
+        print("ERROR", resp.status_code, resp.url)
+        resp.raise_for_status()
+    # cache tanpa TTL: body dari cache = hasil revalidasi 304
+    return resp.json(), getattr(resp, "from_cache", False)
+
+def windowed_requests(month_counts):
+    """
+    Estimasi request mode lama (per window bulan: /issues?since=awal_window dari page 1):
+    window w butuh ceil(#item updated_at >= w / PER_PAGE) halaman (min 1).
+    """
     start_dt = datetime.fromisoformat(SINCE).replace(tzinfo=timezone.utc)
-    end_dt = datetime.now(timezone.utc)
-
-    all_rows = {}
+    months = [w.strftime("%Y-%m") for w, _ in month_range(start_dt, datetime.now(timezone.utc))]
+    total = 0
+    for m in months:
+        n = sum(c for k, c in month_counts.items() if k >= m)
+        total += max(1, math.ceil(n / PER_PAGE))
+    return total
+
+def iter_issue_pages(workers=None, resume=None):
+    """
+    Yield list issue (tanpa PR, created_at >= SINCE) per halaman.
+    Tiap repo di-page sekali dengan cursor (halaman berikutnya + issue number terakhir),
+    beberapa repo sekaligus. resume=True → lanjut dari CURSOR_PATH.
+    """
+    workers = REPO_WORKERS if workers is None else workers
+    resume = STREAM_RESUME if resume is None else resume
+    start_ts = to_utc_iso_z(SINCE)
+    cursors = load_cursors() if resume else {}
+    cache = HttpCache(ETAG_CACHE_PATH, max_bytes=ETAG_CACHE_MB << 20) if ETAG_CACHE else None
+    stats = {"requests": 0, "not_modified": 0}
+    month_counts = {}   # repo → {bulan updated_at: jumlah item} (untuk estimasi mode window)
     total = 0
 
+    def submit_page(submit, repo):
+        submit(fetch_issue_page, repo, cursors[repo]["page"], cache, ctx=repo)
+
+    def start(submit):
+        for repo in OWNER_REPOS:
+            cur = cursors.setdefault(repo, {"page": 1, "last_number": 0, "done": False})
+            if not cur["done"]:
+                print(f"[repo] {repo} from page {cur['page']}")
+                submit_page(submit, repo)
+
+    def handle(repo, fut, submit):
+        nonlocal total
+        cur = cursors[repo]
+        items, not_modified = fut.result()
+        stats["requests"] += 1
+        stats["not_modified"] += not_modified
+
+        kept = []
+        for it in items:
+            # halaman bisa bergeser kalau issue lama ter-update selama crawl → skip yang sudah lewat
+            num = it.get("number") or 0
+            if num <= cur["last_number"]:
+                continue
+            cur["last_number"] = num
+            upd = to_utc_iso_z(it.get("updated_at"))[:7]
+            mc = month_counts.setdefault(repo, {})
+            mc[upd] = mc.get(upd, 0) + 1
+            if "pull_request" in it:
+                continue
+            created = to_utc_iso_z(it.get("created_at"))
+            if not created or created < start_ts:
+                continue
+            kept.append(it)
+            total += 1
+            if total >= MAX_TOTAL:
+                break
+
+        if len(items) < PER_PAGE:
+            cur["done"] = True
+        else:
+            cur["page"] += 1
+            if total < MAX_TOTAL:
+                submit_page(submit, repo)
+
+        if kept:
+            yield kept
+        # cursor disimpan setelah halaman diterima consumer
+        save_cursors(cursors)
+
+    try:
+        yield from engine.iter_tasks(start, handle, workers, stop=lambda: total >= MAX_TOTAL)
+    finally:
+        if cache is not None:
+            cache.print_stats()
+            cache.close()
+
+    est = sum(windowed_requests(month_counts.get(repo, {})) for repo in OWNER_REPOS)
+    print(f"[github] requests={stats['requests']} (304 not modified={stats['not_modified']}) "
+          f"vs windowed~{est} -> saved ~{max(0, est - stats['requests'])} requests")
+
+def iter_delta_pages(state):
+    """
+    Halaman issue yang updated_at >= checkpoint per repo (product = owner/repo).
+    Scope sama dengan full run: created_at >= SINCE (API hanya filter updated_at → filter di client).
+    """
+    start_ts = to_utc_iso_z(SINCE)
     for repo in OWNER_REPOS:
         owner, name = repo.split("/", 1)
         base_url = f"{GITHUB_API_BASE}/repos/{owner}/{name}/issues"
-        print(f"[repo] {repo}")
-
-        for w_start, w_end in month_range(start_dt, end_dt):
-            page = 1
-            while True:
-                params = {
-                    "state": "all",
-                    "since": w_start.strftime("%Y-%m-%dT%H:%M:%SZ"),
-                    "per_page": PER_PAGE,
-                    "page": page
-                }
-                resp = gh_get(base_url, params)
-                items = resp.json()
-                if not items:
-                    break
-
-                stop_window = False
-                for it in items:
-                    if "pull_request" in it:
-                        continue
-
-                    created = to_utc_iso_z(it.get("created_at"))
-                    if not created:
-                        continue
-
-    
-                    if created > w_end.strftime("%Y-%m-%dT%H:%M:%SZ"):
-                        stop_window = True
-                        break
-                    if created < w_start.strftime("%Y-%m-%dT%H:%M:%SZ"):
-                        continue
-
-                    all_rows[it["id"]] = it
-                    total += 1
-                    if total >= MAX_TOTAL:
-                        break
-
-                if total >= MAX_TOTAL or stop_window:
-                    break
-
-                if len(items) < PER_PAGE:
-                    break
-                page += 1
-
-            if total >= MAX_TOTAL:
+        since = checkpoint_since(state, SOURCE, repo) or to_utc_iso_z(SINCE)
+        print(f"[delta] repo={repo} since={since}")
+        page = 1
+        while True:
+            params = {
+                "state": "all",
+                "since": since,
+                "sort": "updated",
+                "direction": "asc",
+                "per_page": PER_PAGE,
+                "page": page
+            }
+            items = gh_get(base_url, params).json()
+            if not items:
+                break
+            kept = [it for it in items if "pull_request" not in it
+                    and to_utc_iso_z(it.get("created_at")) >= start_ts]
+            if kept:
+                yield kept
+            if len(items) < PER_PAGE:
                 break
-        if total >= MAX_TOTAL:
-            break
+            page += 1
 
-    return list(all_rows.values())
+def fetch_bugs_by_date(workers=None):
+    return engine.fetch_all(iter_issue_pages(workers))
 
 # ====== CLEANING  ======
 def clean_bug(b):
@@ -182,52 +230,23 @@ def clean_bug(b):
     creator = (b.get("user") or {}).get("login","")
     assignee = (b.get("assignee") or {}).get("login","") if isinstance(b.get("assignee"), dict) else ""
 
-    return {
-        "id": int(b.get("id")),
-        "summary": clean_text(b.get("title")),
-        "status": clean_text(status),
-        "resolution": "",
-        "product": clean_text(product),   
-        "component": clean_text(component), 
-        "creation_time": clean_text(to_utc_iso_z(b.get("created_at"))),
-        "last_change_time": clean_text(to_utc_iso_z(b.get("updated_at"))),
-        "creator": clean_text(creator),
-        "assigned_to": clean_text(assignee),
-        "keywords": [clean_text(k) for k in labels],
-        "url": clean_text(url),
-        "depends_on": [],                   
-        "dupe_of": None,                    
-    }
-
-def clean_dataset(rows):
-    tmp = {}
-    for b in rows:
-        if "id" not in b: continue
-        cb = clean_bug(b)
-        i = cb["id"]
-        if i not in tmp:
-            tmp[i] = cb
-        else:
-            old = tmp[i].get("last_change_time","")
-            new = cb.get("last_change_time","")
-            if new > old:
-                tmp[i] = cb
-    out = list(tmp.values())
-    out.sort(key=lambda x: x.get("creation_time",""))
-    return out
-
-# ====== SAVE ======
-def save_jsonl(path, rows):
-    with open(path, "w", encoding="utf-8") as f:
-        for r in rows:
-            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+    return make_record(
+        id=int(b.get("id")),
+        summary=clean_text(b.get("title")),
+        status=clean_text(status),
+        product=clean_text(product),
+        component=clean_text(component),
+        creation_time=clean_text(to_utc_iso_z(b.get("created_at"))),
+        last_change_time=clean_text(to_utc_iso_z(b.get("updated_at"))),
+        creator=clean_text(creator),
+        assigned_to=clean_text(assignee),
+        keywords=[clean_text(k) for k in labels],
+        url=clean_text(url),
+    )
 
 # ====== MAIN ======
 if __name__ == "__main__":
-    print(f"fetching since={SINCE} by={BY} ...")
-    raw = fetch_bugs_by_date()
-    print("raw:", len(raw))
-    clean = clean_dataset(raw)
-    print("clean:", len(clean))
-    save_jsonl(OUT_JSONL, clean)
-    print("saved ->", OUT_JSONL)
\ No newline at end of file
+    if not DELTA:
+        print(f"fetching since={SINCE} by={BY} ...")
+    source = engine.Source(SOURCE, OUT_JSONL, iter_issue_pages, iter_delta_pages, clean_bug, CHECKPOINT_PATH)
+    engine.run(source, delta=DELTA, stream=STREAM, stream_resume=STREAM_RESUME, stream_sort=STREAM_SORT)
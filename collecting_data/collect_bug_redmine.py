@@ -1,5 +1,10 @@
-import os, json, csv, re, requests
-from datetime import datetime, timezone
+import os, sys, json
+from checkpoint import checkpoint_since
+import engine
+from engine import to_utc_iso_z, clean_text, make_record
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import http_client
 
 # ====== CONFIG ======
 REDMINE_BASE = "https://www.redmine.org"                 
@@ -11,44 +16,16 @@ MAX_TOTAL = 1000000
 PROJECTS = []                                           
 
 OUT_JSONL = "redmine_bugs.jsonl"
+STREAM        = os.getenv("COLLECT_STREAM", "0") not in ("0","false","False")        # append per halaman
+STREAM_SORT   = os.getenv("COLLECT_STREAM_SORT", "1") not in ("0","false","False")   # external sort by creation_time
+STREAM_RESUME = os.getenv("COLLECT_STREAM_RESUME", "0") not in ("0","false","False") # lanjut file+index lama
+DELTA         = os.getenv("COLLECT_DELTA", "0") not in ("0","false","False")         # hanya issue berubah sejak checkpoint
+SOURCE = "redmine"
+CHECKPOINT_PATH = OUT_JSONL + ".checkpoint.json"
+WORKERS       = int(os.getenv("REDMINE_WORKERS", "6"))   # request paralel (offset & project), 1 = sequential
+PROGRESS_PATH = OUT_JSONL + ".progress.json"             # offset selesai per project (COLLECT_STREAM_RESUME)
 
 # ====== HELPERS ======
-def to_utc_iso_z(s):
-    if not s:
-        return ""
-    s = str(s)
-    try:
-        if "T" in s:
-            dt = datetime.fromisoformat(s.replace("Z","").replace("z",""))
-        else:
-            dt = datetime.fromisoformat(s)
-    except:
-        return s
-    if dt.tzinfo is None:
-        dt = dt.replace(tzinfo=timezone.utc)
-    return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
-
-URL_RE = re.compile(r"https?://\S+")
-SPACE_RE = re.compile(r"\s+")
-
-def clean_text(x):
-    if x is None: return ""
-    if not isinstance(x, str): x = str(x)
-    x = URL_RE.sub(" ", x)
-    x = SPACE_RE.sub(" ", x).strip()
-    return x
-
-def as_list(x):
-    if x is None: return []
-    return x if isinstance(x, list) else [x]
-
-def as_int_or_none(x):
-    try:
-        i = int(x)
-        return i if i != 0 else None
-    except:
-        return None
-
 def _headers():
     h = {"Accept": "application/json", "User-Agent": "redmine-collector/1.0"}
     if REDMINE_API_KEY:
@@ -56,44 +33,172 @@ def _headers():
     return h
 
 # ====== FETCH ======
-def fetch_bugs_by_date():
+def load_progress():
+    try:
+        with open(PROGRESS_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def save_progress(progress):
+    tmp = PROGRESS_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(progress, f)
+    os.replace(tmp, PROGRESS_PATH)
+
+# urutan halaman harus stabil selama crawl paralel / antar resume: issue yang ter-update
+# (updated_on berubah) tidak boleh menggeser offset → urut id (issue baru selalu di akhir)
+SORT = "id:asc"
+
+def scope_params(since, project_id=None):
+    params = {
+        "status_id": "*",
+        "limit": PER_PAGE,
+        "sort": SORT,
+        BY: f">={since}",
+    }
+    if project_id:
+        params["project_id"] = project_id
+    return params
+
+def fetch_page(url, params, offset):
+    """Satu halaman issues.json. Return (issues, total_count atau None)."""
+    r = http_client.get(url, params=dict(params, offset=offset), headers=_headers(), timeout=120)
+    r.raise_for_status()
+    data = r.json()
+    return data.get("issues", []), data.get("total_count")
+
+def _shifted(done, offset, page):
+    """True kalau batas id halaman tidak nyambung dengan halaman tetangga yang sudah selesai."""
+    if not page:
+        return False
+    first, last = page[0].get("id"), page[-1].get("id")
+    prev, nxt = done.get(str(offset - PER_PAGE)), done.get(str(offset + PER_PAGE))
+    return bool((prev and prev[1] >= first) or (nxt and nxt[0] <= last))
+
+def _verify_done(url, params, st):
+    """
+    Resume: tiap blok offset selesai yang bersambung dicek ke server (limit=1 di posisi id pertama
+    & terakhir blok). Ada yang bergeser → progress project direset. Return total_count terbaru.
+    """
+    offsets = sorted(int(o) for o in st["done"])
+    blocks, count = [], None
+    for off in offsets:
+        if blocks and off == blocks[-1][1] + PER_PAGE:
+            blocks[-1][1] = off
+        else:
+            blocks.append([off, off])
+    for lo, hi in blocks:
+        first, (_, last, n) = st["done"][str(lo)][0], st["done"][str(hi)]
+        for pos, want in ((lo, first), (hi + n - 1, last)):
+            rows, count = fetch_page(url, dict(params, limit=1), pos)
+            if not rows or rows[0].get("id") != want:
+                st["done"] = {}
+                return count
+    if count is None:
+        _, count = fetch_page(url, dict(params, limit=1), 0)
+    return count
+
+def iter_issue_pages(since=None, workers=None, resume=False):
+    """
+    Yield list issue per halaman API (per project kalau PROJECTS diisi), urutan selesai.
+    Semua project jalan bersamaan; per project halaman pertama memberi total_count,
+    lalu semua offset sisanya di-submit ke pool (maks `workers` request sekaligus).
+    Halaman diurutkan id (SORT) supaya offset stabil. Per project PROGRESS_PATH mencatat
+    offset yang sudah di-yield beserta [id pertama, id terakhir, jumlah baris]; resume=True
+    mengecek batas id tiap blok halaman selesai ke server (_verify_done) lalu melewati offset
+    yang sudah selesai (since & sort harus sama). Batas id bergeser (issue terhapus / pindah
+    project) → project di-crawl ulang penuh (duplikat dibuang oleh de-dup id di output).
+    """
     url = f"{REDMINE_BASE.rstrip('/')}/issues.json"
-
-    def fetch_scope(project_id=None):
-        issues, offset = [], 0
-        while True:
-            params = {
-                "status_id": "*",
-                "limit": PER_PAGE,
-                "offset": offset,
-                "sort": f"{BY}:desc",
-                BY: f">={SINCE}",
-            }
-            if project_id:
-                params["project_id"] = project_id
-            r = requests.get(url, params=params, headers=_headers(), timeout=120)
-            r.raise_for_status()
-            data = r.json()
-            page = data.get("issues", [])
-            if not page:
-                break
-            issues.extend(page)
-            if len(page) < PER_PAGE or len(issues) >= MAX_TOTAL:
-                break
-            offset += PER_PAGE
-        return issues[:MAX_TOTAL]
-
-    all_issues = []
-    if PROJECTS:
-        for pid in PROJECTS:
-            got = fetch_scope(pid)
-            all_issues.extend(got)
-            if len(all_issues) >= MAX_TOTAL:
-                break
-    else:
-        all_issues = fetch_scope()
-
-    return all_issues[:MAX_TOTAL]
+    since = since or SINCE
+    workers = WORKERS if workers is None else workers
+    progress = load_progress() if resume else {}
+    total = 0
+
+    def submit_page(submit, key, params, offset, kind):
+        submit(fetch_page, url, params, offset, ctx=(key, params, offset, kind, progress[key]["gen"]))
+
+    def submit_all(submit, key, params, first):
+        st = progress[key]
+        for off in range(first, min(st["total_count"], MAX_TOTAL), PER_PAGE):
+            if str(off) not in st["done"]:
+                submit_page(submit, key, params, off, "page")
+
+    def start(submit):
+        for pid in (PROJECTS or [None]):
+            key = str(pid) if pid else "*"
+            st = progress.get(key)
+            if not st or st.get("since") != since or st.get("sort") != SORT \
+                    or not isinstance(st.get("done"), dict):
+                st = progress[key] = {"since": since, "sort": SORT, "total_count": None, "done": {}}
+            st["gen"] = 0
+            params = scope_params(since, pid)
+            if st["total_count"] is None:
+                submit_page(submit, key, params, 0, "first")
+                continue
+            n_done = len(st["done"])
+            count = _verify_done(url, params, st)
+            if n_done and not st["done"]:
+                print(f"[WARN] project={key}: batas id halaman selesai bergeser, crawl ulang project")
+            if count is None:
+                st["total_count"] = None
+                submit_page(submit, key, params, 0, "first")
+                continue
+            st["total_count"] = max(count, st["total_count"])
+            # halaman tidak penuh (terakhir) diambil ulang: issue baru (id lebih besar) masuk di akhir
+            st["done"] = {o: b for o, b in st["done"].items() if b[2] >= PER_PAGE}
+            submit_all(submit, key, params, 0)
+            print(f"[resume] project={key} {len(st['done'])} pages done")
+
+    def handle(ctx, fut, submit):
+        nonlocal total
+        key, params, offset, kind, gen = ctx
+        page, count = fut.result()
+        st = progress[key]
+        stale = gen != st["gen"]   # halaman dari crawl sebelum restart: data tetap di-yield, tidak dicatat
+
+        if not stale and _shifted(st["done"], offset, page):
+            print(f"[WARN] project={key}: batas id offset {offset} bergeser, crawl ulang project")
+            st.update(gen=st["gen"] + 1, total_count=count, done={})
+            if count is not None:
+                submit_all(submit, key, params, 0)
+            else:
+                submit_page(submit, key, params, 0, "chain")
+            stale = True
+        elif kind == "first" and not stale:
+            st["total_count"] = count
+            if count is not None:
+                print(f"[project] {key}: total_count={count}")
+                submit_all(submit, key, params, PER_PAGE)
+        # total_count tidak ada / bertambah selama crawl → halaman berikutnya berantai
+        last = st["total_count"] is None or offset + PER_PAGE >= st["total_count"]
+        if not stale and last and len(page) >= PER_PAGE and offset + PER_PAGE < MAX_TOTAL:
+            submit_page(submit, key, params, offset + PER_PAGE, "chain")
+
+        page = page[:MAX_TOTAL - total]
+        total += len(page)
+        if page:
+            yield page
+        # dicatat setelah consumer menerima halaman (stream sudah append ke disk)
+        if not stale and page:
+            st["done"][str(offset)] = [page[0].get("id"), page[-1].get("id"), len(page)]
+            save_progress(progress)
+
+    yield from engine.iter_tasks(start, handle, workers, stop=lambda: total >= MAX_TOTAL)
+    save_progress(progress)
+
+def iter_delta_pages(state):
+    """
+    Halaman issue yang updated_on >= checkpoint global.
+    (product di record = nama project, bukan id di PROJECTS → pakai checkpoint global)
+    """
+    since = checkpoint_since(state, SOURCE)
+    print(f"[delta] since={since or SINCE}")
+    return iter_issue_pages(since)
+
+def fetch_bugs_by_date(workers=None):
+    return engine.fetch_all(iter_issue_pages(workers=workers))
 
 # ====== CLEANING ======
 def clean_bug(b):
@@ -106,51 +211,24 @@ def clean_bug(b):
     created = b.get("created_on") or ""
     updated = b.get("updated_on") or created
 
-    return {
-        "id": int(b.get("id")),
-        "summary": clean_text(b.get("subject")),
-        "status": clean_text(status),
-        "resolution": "", 
-        "product": clean_text(proj),
-        "component": clean_text(tracker), 
-        "creation_time": clean_text(to_utc_iso_z(created)),
-        "last_change_time": clean_text(to_utc_iso_z(updated)),
-        "creator": clean_text(author),
-        "assigned_to": clean_text(assigned),
-        "keywords": [],           
-        "url": f"{REDMINE_BASE.rstrip('/')}/issues/{b.get('id')}",
-        "depends_on": [],         
-        "dupe_of": None,          
-    }
-
-def clean_dataset(rows):
-    tmp = {}
-    for b in rows:
-        if "id" not in b: continue
-        cb = clean_bug(b)
-        i = cb["id"]
-        if i not in tmp:
-            tmp[i] = cb
-        else:
-            old = tmp[i].get("last_change_time","")
-            new = cb.get("last_change_time","")
-            if new > old:
-                tmp[i] = cb
-    out = list(tmp.values())
-    out.sort(key=lambda x: x.get("creation_time",""))
-    return out
-
-# ====== SAVE ======
-def save_jsonl(path, rows):
-    with open(path, "w", encoding="utf-8") as f:
-        for r in rows:
-            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+    return make_record(
+        id=int(b.get("id")),
+        summary=clean_text(b.get("subject")),
+        status=clean_text(status),
+        product=clean_text(proj),
+        component=clean_text(tracker),
+        creation_time=clean_text(to_utc_iso_z(created)),
+        last_change_time=clean_text(to_utc_iso_z(updated)),
+        creator=clean_text(author),
+        assigned_to=clean_text(assigned),
+        url=f"{REDMINE_BASE.rstrip('/')}/issues/{b.get('id')}",
+    )
 
 # ====== MAIN ======
 if __name__ == "__main__":
-    print(f"fetching since={SINCE} by={BY} ...")
-    raw = fetch_bugs_by_date()
-    print("raw:", len(raw))
-    clean = clean_dataset(raw)
-    print("clean:", len(clean))
-    save_jsonl(OUT_JSONL, clean)
+    delta = DELTA and BY == "updated_on"
+    if not delta:
+        print(f"fetching since={SINCE} by={BY} ...")
+    source = engine.Source(SOURCE, OUT_JSONL, lambda: iter_issue_pages(resume=STREAM and STREAM_RESUME),
+                           iter_delta_pages, clean_bug, CHECKPOINT_PATH)
+    engine.run(source, delta=delta, stream=STREAM, stream_resume=STREAM_RESUME, stream_sort=STREAM_SORT)
@@ -0,0 +1,209 @@
+"""
+engine.py
+Engine collector bersama untuk bugzilla / github / redmine.
+
+Script collect_bug_*.py cukup jadi source adapter:
+- fetch halaman mentah (full run + delta) dan clean_bug() → record skema bersama (RECORD_FIELDS)
+- pola request concurrent ditulis sebagai start()/handle() untuk iter_tasks()
+Yang dipegang engine (sekali untuk semua tracker):
+- pool fetch concurrent (halaman di-yield dari thread utama)
+- rate limit per host (token bucket http_client)
+- de-dup by id (clean_dataset / StreamWriter), output JSONL, checkpoint + partisi bulan
+- export dataset terpartisi + terkompresi (DATASET_LAYOUT=partitioned, lihat partitioned_jsonl.py),
+  delta di-merge langsung ke dataset; DATASET_KEEP_JSONL=0 → JSONL dibuang setelah export,
+  dibangun ulang dari dataset saat resume berikutnya
+"""
+import os, sys, re
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlparse
+from stream_output import stream_pages
+from checkpoint import load_checkpoint, apply_delta, reset_checkpoint
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import http_client
+import jsonl_io
+import partitioned_jsonl
+
+# ====== SCHEMA ======
+RECORD_FIELDS = (
+    "id", "summary", "status", "resolution", "product", "component",
+    "creation_time", "last_change_time", "creator", "assigned_to",
+    "keywords", "url", "depends_on", "dupe_of",
+)
+_DEFAULTS = {"resolution": "", "keywords": [], "url": "", "depends_on": [], "dupe_of": None}
+
+def make_record(**fields):
+    """Record ter-normalisasi, urutan key = RECORD_FIELDS; field opsional diisi default."""
+    unknown = set(fields) - set(RECORD_FIELDS)
+    if unknown:
+        raise TypeError(f"field tidak dikenal: {sorted(unknown)}")
+    rec = {}
+    for k in RECORD_FIELDS:
+        if k in fields:
+            rec[k] = fields[k]
+        elif k in _DEFAULTS:
+            v = _DEFAULTS[k]
+            rec[k] = list(v) if isinstance(v, list) else v
+        else:
+            raise TypeError(f"field wajib tidak ada: {k}")
+    return rec
+
+# ====== HELPERS ======
+def to_utc_iso_z(s):
+    if not s: return ""
+    s = str(s)
+    try:
+        if "T" in s:
+            dt = datetime.fromisoformat(s.replace("Z","").replace("z",""))
+        else:
+            dt = datetime.fromisoformat(s)
+    except:
+        return s
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+URL_RE = re.compile(r"https?://\S+")
+SPACE_RE = re.compile(r"\s+")
+
+def clean_text(x):
+    if x is None: return ""
+    if not isinstance(x, str): x = str(x)
+    x = URL_RE.sub(" ", x)
+    x = SPACE_RE.sub(" ", x).strip()
+    return x
+
+def as_list(x):
+    if x is None: return []
+    return x if isinstance(x, list) else [x]
+
+def as_int_or_none(x):
+    try:
+        i = int(x)
+        return i if i != 0 else None
+    except:
+        return None
+
+def month_range(start_dt, end_dt):
+    cur = datetime(start_dt.year, start_dt.month, 1, tzinfo=timezone.utc)
+    while cur <= end_dt:
+        if cur.month == 12:
+            nxt = datetime(cur.year + 1, 1, 1, tzinfo=timezone.utc)
+        else:
+            nxt = datetime(cur.year, cur.month + 1, 1, tzinfo=timezone.utc)
+        yield cur, min(nxt - timedelta(seconds=1), end_dt)
+        cur = nxt
+
+# ====== RATE LIMIT ======
+def set_rate(url, rps):
+    """Batas request/detik untuk host `url` (semua thread & retry lewat http_client); None = env/default."""
+    if rps is not None:
+        http_client.set_host_rate(urlparse(url).netloc.lower(), rps)
+
+# ====== FETCH POOL ======
+def iter_tasks(start, handle, workers, stop=None):
+    """
+    Pool fetch generik.
+    - start(submit): submit request awal, submit(fn, *args, ctx=...) → fn(*args) di pool
+    - handle(ctx, fut, submit): generator per request selesai; yield halaman (list record mentah)
+      dan boleh submit request lanjutan. Kode setelah yield jalan setelah consumer menerima
+      halaman (tempat simpan cursor / progress).
+    - stop(): True → berhenti, request yang belum jalan dibatalkan
+    Semua handle jalan di thread utama, jadi state adapter tidak perlu lock.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        pending = {}
+
+        def submit(fn, *args, ctx=None):
+            pending[pool.submit(fn, *args)] = ctx
+
+        start(submit)
+        while pending and not (stop and stop()):
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                ctx = pending.pop(fut)
+                yield from handle(ctx, fut, submit)
+        for fut in pending:
+            fut.cancel()
+
+def fetch_all(pages):
+    """Kumpulkan halaman di RAM, de-dup by id (yang terakhir menang)."""
+    all_rows = {}
+    for page in pages:
+        for b in page:
+            all_rows[b["id"]] = b
+    return list(all_rows.values())
+
+# ====== CLEAN + SAVE ======
+def clean_dataset(rows, clean_fn):
+    tmp = {}
+    for b in rows:
+        if "id" not in b: continue
+        cb = clean_fn(b)
+        i = cb["id"]
+        if i not in tmp:
+            tmp[i] = cb
+        else:
+            old = tmp[i].get("last_change_time","")
+            new = cb.get("last_change_time","")
+            if new > old:
+                tmp[i] = cb
+    out = list(tmp.values())
+    out.sort(key=lambda x: x.get("creation_time",""))
+    return out
+
+def save_jsonl(path, rows):
+    jsonl_io.write_jsonl(path, rows)
+
+# ====== RUN ======
+class Source:
+    """Adapter satu tracker untuk run()."""
+    def __init__(self, name, out_path, iter_pages, iter_delta_pages, clean_fn, checkpoint_path=None):
+        self.name = name
+        self.out_path = out_path
+        self.iter_pages = iter_pages               # () -> halaman mentah full run
+        self.iter_delta_pages = iter_delta_pages   # (state checkpoint) -> halaman mentah delta
+        self.clean_fn = clean_fn                   # raw -> make_record(...)
+        self.checkpoint_path = checkpoint_path or out_path + ".checkpoint.json"
+
+def run(src, delta=False, stream=False, stream_resume=False, stream_sort=True):
+    """
+    Pipeline fetch → normalize → write yang sama untuk semua tracker:
+    - delta  : halaman berubah sejak checkpoint di-merge ke dataset terpartisi (checkpoint.py)
+    - stream : clean + append per halaman, de-dup via index sqlite, lalu finalize
+    - lainnya: kumpulkan di RAM, clean_dataset, save_jsonl
+    Setelah full run checkpoint di-seed ulang dari output.
+    """
+    partitioned = partitioned_jsonl.partitioned()
+    keep_jsonl = not partitioned or partitioned_jsonl.KEEP_JSONL
+    if delta:
+        state = load_checkpoint(src.checkpoint_path)
+        n_changed, parts = apply_delta(src.out_path, src.iter_delta_pages(state), src.clean_fn,
+                                       src.name, src.checkpoint_path, state, write_jsonl=keep_jsonl)
+        print(f"delta: changed={n_changed} partitions={parts}")
+    else:
+        if partitioned and stream_resume:
+            # working copy dibuang run sebelumnya (DATASET_KEEP_JSONL=0) → index / cursor masih
+            # menunjuk ke isinya, jadi bangun ulang dulu
+            partitioned_jsonl.restore_jsonl(src.out_path)
+        if stream:
+            n_raw, n_clean = stream_pages(src.out_path, src.iter_pages(), src.clean_fn,
+                                          resume=stream_resume, sort=stream_sort)
+        else:
+            raw = fetch_all(src.iter_pages())
+            n_raw = len(raw)
+            clean = clean_dataset(raw, src.clean_fn)
+            n_clean = len(clean)
+            save_jsonl(src.out_path, clean)
+        print("raw:", n_raw)
+        print("clean:", n_clean)
+        reset_checkpoint(src.out_path, src.name, src.checkpoint_path)
+        if partitioned:
+            # JSONL = working copy (resume); dataset = yang dibaca stage berikutnya & store delta
+            partitioned_jsonl.export_jsonl(src.out_path)
+    if partitioned and not keep_jsonl and os.path.exists(src.out_path):
+        os.remove(src.out_path)
+        print(f"[dataset] working copy {src.out_path} dibuang (DATASET_KEEP_JSONL=0)")
+    print("saved ->", partitioned_jsonl.dataset_path(src.out_path) if partitioned else src.out_path)
+    http_client.print_host_stats()
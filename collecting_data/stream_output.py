@@ -0,0 +1,176 @@
+"""
+stream_output.py
+Streaming output untuk collector (bugzilla / github / redmine).
+
+Tiap halaman API langsung di-clean lalu di-append ke JSONL, jadi memori tetap
+konstan dan data yang sudah ditulis tidak hilang kalau proses crash.
+De-dup pakai index id -> last_change_time di sqlite (on-disk), bukan dict di RAM.
+Opsional: finalize_jsonl() = external sort by creation_time (+ buang versi lama)
+supaya hasilnya sama dengan clean_dataset() + save_jsonl() mode lama.
+"""
+import os, sys, heapq, sqlite3, tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from jsonl_io import loads, encode_line, JsonlWriter
+
+
+class IdIndex:
+    """Map id -> last_change_time yang disimpan di sqlite."""
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS seen (id INTEGER PRIMARY KEY, lct TEXT NOT NULL)")
+        self.superseded = 0
+
+    def get(self, bug_id):
+        row = self.conn.execute("SELECT lct FROM seen WHERE id=?", (bug_id,)).fetchone()
+        return row[0] if row else None
+
+    def offer(self, bug_id, lct):
+        """True kalau id baru / lebih baru dari yang sudah ditulis (lalu index di-update)."""
+        old = self.get(bug_id)
+        if old is not None and not (lct > old):
+            return False
+        if old is not None:
+            self.superseded += 1
+        self.conn.execute("INSERT OR REPLACE INTO seen (id, lct) VALUES (?, ?)", (bug_id, lct))
+        return True
+
+    def __len__(self):
+        return self.conn.execute("SELECT count(*) FROM seen").fetchone()[0]
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+
+class StreamWriter:
+    """
+    Append hasil clean per halaman ke JSONL.
+    resume=True → file & index lama dipakai lagi (lanjut setelah crash),
+    resume=False → mulai dari file kosong.
+    """
+    def __init__(self, out_path, clean_fn, index_path=None, resume=False):
+        self.out_path = out_path
+        self.clean_fn = clean_fn
+        self.index_path = index_path or out_path + ".idx.sqlite"
+        if not resume:
+            for p in (out_path, self.index_path):
+                if os.path.exists(p):
+                    os.remove(p)
+        self.index = IdIndex(self.index_path)
+        self.f = JsonlWriter(out_path, "a")
+        self.raw = 0
+        self.written = 0
+
+    def write_page(self, rows):
+        for b in rows:
+            self.raw += 1
+            if "id" not in b: continue
+            cb = self.clean_fn(b)
+            if self.index.offer(cb["id"], cb.get("last_change_time", "")):
+                self.f.write(cb)
+                self.written += 1
+        # file dulu baru index: kalau crash di antaranya, finalize yang buang duplikatnya
+        self.f.flush()
+        self.index.commit()
+
+    def close(self):
+        self.f.close()
+        self.index.close()
+
+
+# ====== FINALIZE ======
+def _sort_key(r):
+    return (r.get("creation_time", ""), r.get("id", 0))
+
+def _write_run(rows, tmpdir):
+    rows.sort(key=_sort_key)
+    fd, path = tempfile.mkstemp(suffix=".jsonl", dir=tmpdir)
+    with os.fdopen(fd, "wb") as f:
+        f.write(b"".join(encode_line(r) for r in rows))
+    return path
+
+def _iter_run(path):
+    with open(path, "rb") as f:
+        for line in f:
+            yield loads(line)
+
+def finalize_jsonl(path, sort=True, chunk_rows=200_000):
+    """
+    Rapikan JSONL hasil streaming:
+    - sort=True  → external sort by creation_time (run per chunk_rows + k-way merge),
+                   versi lama dari id yang sama (last_change_time lebih kecil) dibuang.
+    - sort=False → hanya buang versi lama, urutan append dipertahankan.
+    Memori dibatasi chunk_rows record.
+    """
+    if not os.path.exists(path):
+        return 0
+    out_dir = os.path.dirname(os.path.abspath(path))
+    tmp_out = path + ".tmp"
+
+    if not sort:
+        index = IdIndex(path + ".idx.sqlite")
+        kept = 0
+        try:
+            index.conn.execute("CREATE TEMP TABLE done (id INTEGER PRIMARY KEY)")
+            with open(path, "rb") as fin, open(tmp_out, "wb") as fout:
+                for line in fin:
+                    if not line.strip(): continue
+                    r = loads(line)
+                    if r.get("last_change_time", "") != index.get(r["id"]):
+                        continue
+                    if index.conn.execute("INSERT OR IGNORE INTO done (id) VALUES (?)", (r["id"],)).rowcount == 0:
+                        continue
+                    fout.write(encode_line(r))   # encode ulang: baris lama (resume) ikut format jsonl_io
+                    kept += 1
+        finally:
+            index.close()
+        os.replace(tmp_out, path)
+        return kept
+
+    runs = []
+    with tempfile.TemporaryDirectory(dir=out_dir) as tmpdir:
+        buf = []
+        with open(path, "rb") as fin:
+            for line in fin:
+                if not line.strip(): continue
+                buf.append(loads(line))
+                if len(buf) >= chunk_rows:
+                    runs.append(_write_run(buf, tmpdir)); buf = []
+        if buf:
+            runs.append(_write_run(buf, tmpdir)); buf = []
+
+        kept = 0
+        with open(tmp_out, "wb") as fout:
+            # id sama → creation_time sama → pasti bersebelahan setelah merge
+            cur = None
+            for r in heapq.merge(*(_iter_run(p) for p in runs), key=_sort_key):
+                if cur is not None and cur["id"] == r["id"]:
+                    if r.get("last_change_time", "") >= cur.get("last_change_time", ""):
+                        cur = r
+                    continue
+                if cur is not None:
+                    fout.write(encode_line(cur)); kept += 1
+                cur = r
+            if cur is not None:
+                fout.write(encode_line(cur)); kept += 1
+    os.replace(tmp_out, path)
+    return kept
+
+
+def stream_pages(path, pages, clean_fn, resume=False, sort=True):
+    """Clean + append tiap halaman dari `pages`, lalu finalize. Return (raw, clean)."""
+    w = StreamWriter(path, clean_fn, resume=resume)
+    try:
+        for page in pages:
+            w.write_page(page)
+            print(f"[stream] raw={w.raw} written={w.written} -> {path}")
+    finally:
+        w.close()
+    return w.raw, finalize_jsonl(path, sort=sort)
@@ -0,0 +1,192 @@
+"""
+http_cache.py
+Cache response HTTP di disk (sqlite) untuk enricher, di atas http_client.
+
+- Key = sha256(method + url + params terurut + sha256 pendek kredensial): nilai api_key / token /
+  header Authorization tidak disimpan, tapi response dengan kredensial berbeda (atau tanpa
+  kredensial) tidak saling dipakai
+- Hanya response 200 yang disimpan; body + ETag + Last-Modified
+- Request berikutnya kirim If-None-Match / If-Modified-Since → 304 = pakai body cache
+- Eviction LRU berdasarkan ukuran total (max_bytes)
+- offline=True → tidak ada network sama sekali, miss = None
+
+Konfigurasi via env (dipakai enrich_bugzilla_from_file):
+  HTTP_CACHE=1, HTTP_CACHE_PATH, HTTP_CACHE_MAX_MB, HTTP_CACHE_TTL (detik tanpa revalidasi),
+  HTTP_CACHE_OFFLINE=1
+"""
+import json, time, sqlite3, hashlib, threading
+
+import http_client
+
+SECRET_PARAMS = ("api_key", "token", "access_token")
+SECRET_HEADERS = ("authorization", "x-redmine-api-key", "x-bugzilla-api-key")
+
+
+class CachedResponse:
+    """Pengganti minimal requests.Response untuk body dari cache."""
+    def __init__(self, url, status_code, content, headers, from_cache):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers
+        self.from_cache = from_cache
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size=8192):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i:i + chunk_size]
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def _credential_hash(secrets):
+    raw = json.dumps(sorted(secrets), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+def cache_key(method, url, params=None, headers=None):
+    items, secrets = [], []
+    for k, v in sorted((params or {}).items()):
+        if k in SECRET_PARAMS:
+            if v:
+                secrets.append((k, str(v)))
+            continue
+        items.append((k, v if isinstance(v, (list, tuple)) else [v]))
+    for k, v in (headers or {}).items():
+        if k.lower() in SECRET_HEADERS and v:
+            secrets.append((k.lower(), str(v)))
+    key = [method.upper(), url, items]
+    if secrets:   # tanpa kredensial key sama dengan sebelumnya (cache lama tetap terpakai)
+        key.append(_credential_hash(secrets))
+    raw = json.dumps(key, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class HttpCache:
+    def __init__(self, path, max_bytes=2 << 30, ttl=0, offline=False):
+        self.path = path
+        self.max_bytes = int(max_bytes)
+        self.ttl = float(ttl)
+        self.offline = offline
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY, url TEXT, etag TEXT, last_modified TEXT,
+                content_type TEXT, body BLOB, size INTEGER, fetched REAL, accessed REAL
+            )""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed)")
+        self.total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0, "stored": 0, "evicted": 0, "bytes_served": 0}
+
+    def _count(self, name, n=1):
+        with self.lock:
+            self.stats[name] += n
+
+    # ---- storage ----
+    def _load(self, key):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT url, etag, last_modified, content_type, body, fetched FROM entries WHERE key=?", (key,)
+            ).fetchone()
+
+    def _touch(self, key, refreshed=False):
+        now = time.time()
+        with self.lock:
+            if refreshed:
+                self.conn.execute("UPDATE entries SET accessed=?, fetched=? WHERE key=?", (now, now, key))
+            else:
+                self.conn.execute("UPDATE entries SET accessed=? WHERE key=?", (now, key))
+            self.conn.commit()
+
+    def _store(self, key, url, resp, body):
+        now = time.time()
+        with self.lock:
+            old = self.conn.execute("SELECT size FROM entries WHERE key=?", (key,)).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?,?,?,?,?,?,?,?,?)",
+                (key, url, resp.headers.get("ETag"), resp.headers.get("Last-Modified"),
+                 resp.headers.get("Content-Type"), body, len(body), now, now))
+            self.total += len(body) - (old[0] if old else 0)
+            self.stats["stored"] += 1
+            if self.total > self.max_bytes:
+                self._evict()
+            self.conn.commit()
+
+    def _evict(self):
+        # LRU: buang yang paling lama tidak diakses sampai ~90% max_bytes
+        target = int(self.max_bytes * 0.9)
+        drop = []
+        for key, size in self.conn.execute("SELECT key, size FROM entries ORDER BY accessed ASC"):
+            if self.total <= target:
+                break
+            drop.append((key,))
+            self.total -= size
+        self.conn.executemany("DELETE FROM entries WHERE key=?", drop)
+        self.stats["evicted"] += len(drop)
+
+    def _hit(self, key, row, revalidated=False):
+        url, _, _, ctype, body, _ = row
+        self._touch(key, refreshed=revalidated)
+        self._count("revalidated" if revalidated else "hits")
+        self._count("bytes_served", len(body))
+        return CachedResponse(url, 200, body, {"Content-Type": ctype or ""}, from_cache=True)
+
+    # ---- request ----
+    def get(self, url, params=None, headers=None, max_body=None, **kwargs):
+        """
+        GET lewat cache. Return CachedResponse (200 dari cache / network) atau
+        requests.Response asli untuk status non-200; None kalau offline & miss.
+        max_body: simpan/return maksimal sekian byte (untuk download besar via stream).
+        """
+        key = cache_key("GET", url, params, headers)
+        row = self._load(key)
+        if row is not None and (self.offline or (self.ttl and time.time() - row[5] < self.ttl)):
+            return self._hit(key, row)
+        if self.offline:
+            self._count("misses")
+            return None
+
+        hdrs = dict(headers or {})
+        if row is not None:
+            if row[1]:
+                hdrs["If-None-Match"] = row[1]
+            if row[2]:
+                hdrs["If-Modified-Since"] = row[2]
+        stream = max_body is not None
+        resp = http_client.get(url, params=params, headers=hdrs, stream=stream, **kwargs)
+        if resp.status_code == 304 and row is not None:
+            resp.close()
+            return self._hit(key, row, revalidated=True)
+        self._count("misses")
+        if resp.status_code != 200:
+            return resp
+
+        if stream:
+            body = http_client.read_limited(resp, max_body)
+        else:
+            body = resp.content
+        self._store(key, url, resp, body)
+        return CachedResponse(resp.url, 200, body, resp.headers, from_cache=False)
+
+    def print_stats(self, printer=print):
+        st = self.stats
+        printer(f"[cache] hits={st['hits']} revalidated={st['revalidated']} misses={st['misses']} "
+                f"stored={st['stored']} evicted={st['evicted']} size={self.total / 1e6:.1f}MB "
+                f"served={st['bytes_served'] / 1e6:.1f}MB")
+
+    def close(self):
+        with self.lock:
+            self.conn.commit()
+            self.conn.close()
@@ -0,0 +1,287 @@
+"""
+http_client.py
+HTTP client bersama untuk collector (collecting_data/) & enricher (bug_collect_enrich/).
+
+- Satu requests.Session dengan connection pool (keep-alive, tanpa TCP+TLS baru per request)
+- Retry dengan exponential backoff + jitter; menghormati Retry-After dan
+  X-RateLimit-Reset (GitHub) kalau ada
+- Batas concurrency per host (semaphore)
+- Token bucket per host (opsional, HTTP_HOST_RPS / set_host_rate); kalau response membawa
+  X-RateLimit-Remaining + X-RateLimit-Reset (GitHub), rate bucket diturunkan supaya sisa quota
+  habis tepat saat reset (tidak pernah di atas rate yang dikonfigurasi), quota habis → semua
+  request ke host itu menunggu sampai reset
+- Counter per host: jumlah request, retry, error, latency
+
+Konfigurasi via env:
+  HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE, HTTP_HOST_CONCURRENCY,
+  HTTP_HOST_LIMITS='{"api.github.com": 4}', HTTP_HOST_RPS='{"hg.mozilla.org": 10}', HTTP_MAX_RETRIES,
+  HTTP_BACKOFF_BASE, HTTP_BACKOFF_MAX
+"""
+import os, json, time, random, threading
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+POOL_CONNECTIONS     = int(os.getenv("HTTP_POOL_CONNECTIONS", "16"))
+POOL_MAXSIZE         = int(os.getenv("HTTP_POOL_MAXSIZE", "32"))
+HOST_MAX_CONCURRENCY = int(os.getenv("HTTP_HOST_CONCURRENCY", "8"))
+HOST_LIMITS          = json.loads(os.getenv("HTTP_HOST_LIMITS", "{}"))
+HOST_RPS             = json.loads(os.getenv("HTTP_HOST_RPS", "{}"))
+MAX_RETRIES          = int(os.getenv("HTTP_MAX_RETRIES", "5"))
+BACKOFF_BASE         = float(os.getenv("HTTP_BACKOFF_BASE", "1.0"))
+BACKOFF_MAX          = float(os.getenv("HTTP_BACKOFF_MAX", "300"))
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+_lock = threading.Lock()
+_session = None
+_host_sems = {}
+_host_buckets = {}
+_stats = {}
+
+
+# ====== SESSION ======
+def get_session():
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                s = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=0)
+                s.mount("https://", adapter)
+                s.mount("http://", adapter)
+                _session = s
+    return _session
+
+def host_of(url):
+    return urlparse(url).netloc.lower()
+
+def set_host_limit(host, n):
+    """Ubah batas concurrency untuk satu host (sebelum request pertama ke host itu)."""
+    with _lock:
+        HOST_LIMITS[host] = int(n)
+        _host_sems.pop(host, None)
+
+def _host_sem(host):
+    with _lock:
+        sem = _host_sems.get(host)
+        if sem is None:
+            sem = threading.BoundedSemaphore(int(HOST_LIMITS.get(host, HOST_MAX_CONCURRENCY)))
+            _host_sems[host] = sem
+        return sem
+
+
+# ====== RATE (token bucket per host) ======
+class TokenBucket:
+    """
+    Token bucket thread-safe: maksimal `rate` request per detik, rate bisa diubah saat jalan.
+    base_rate = rate yang dikonfigurasi (batas atas feedback quota), pause() = tahan semua acquire.
+    """
+    def __init__(self, rate, burst=None):
+        self.rate = self.base_rate = float(rate or 0)
+        self.capacity = float(burst or max(1.0, self.rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def set_rate(self, rate):
+        with self.lock:
+            self._refill(time.monotonic())
+            self.rate = float(rate)
+
+    def pause(self, seconds):
+        """Tahan acquire sampai `seconds` dari sekarang. True kalau jeda diperpanjang."""
+        with self.lock:
+            until = time.monotonic() + seconds
+            if until <= self.paused_until:
+                return False
+            self.paused_until = until
+            return True
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                elif self.rate <= 0:
+                    return
+                else:
+                    self._refill(now)
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            # tidur maksimal 1 detik supaya perubahan rate (feedback quota) cepat terasa
+            time.sleep(min(wait, 1.0))
+
+def set_host_rate(host, rps, burst=None):
+    """Pasang token bucket `rps` request/detik untuk satu host (0 = tanpa batas)."""
+    with _lock:
+        HOST_RPS[host] = float(rps)
+        _host_buckets[host] = TokenBucket(rps, burst)
+
+def _host_bucket(host):
+    with _lock:
+        bucket = _host_buckets.get(host)
+        if bucket is None and host in HOST_RPS:
+            bucket = _host_buckets[host] = TokenBucket(HOST_RPS[host])
+        return bucket
+
+def _quota_feedback(host, bucket, resp):
+    # GitHub: sisa quota dibagi rata sampai window reset, maksimal rate yang dikonfigurasi
+    remaining = resp.headers.get("X-RateLimit-Remaining")
+    reset = resp.headers.get("X-RateLimit-Reset")
+    if remaining is None or reset is None:
+        return
+    try:
+        remaining, reset_in = int(remaining), int(reset) - time.time()
+    except ValueError:
+        return
+    if reset_in <= 0:
+        return
+    if remaining <= 0:
+        # quota habis: tahan semua request ke host sampai reset, setelah itu mulai lagi dari base_rate
+        bucket.set_rate(bucket.base_rate)
+        if bucket.pause(reset_in):
+            print(f"[http] {host}: quota habis, request ditahan {reset_in:.0f}s sampai reset")
+        return
+    quota_rate = remaining / reset_in
+    bucket.set_rate(min(bucket.base_rate, quota_rate) if bucket.base_rate > 0 else quota_rate)
+
+
+# ====== STATS ======
+def _stat(host):
+    st = _stats.get(host)
+    if st is None:
+        st = _stats.setdefault(host, {"requests": 0, "retries": 0, "errors": 0,
+                                      "latency_total": 0.0, "latency_max": 0.0})
+    return st
+
+def _record(host, latency=None, retry=False, error=False):
+    with _lock:
+        st = _stat(host)
+        if latency is not None:
+            st["requests"] += 1
+            st["latency_total"] += latency
+            st["latency_max"] = max(st["latency_max"], latency)
+        if retry:
+            st["retries"] += 1
+        if error:
+            st["errors"] += 1
+
+def host_stats():
+    """Snapshot counter per host: requests, retries, errors, latency_avg, latency_max (detik)."""
+    with _lock:
+        out = {}
+        for host, st in _stats.items():
+            d = dict(st)
+            d["latency_avg"] = st["latency_total"] / st["requests"] if st["requests"] else 0.0
+            out[host] = d
+        return out
+
+def print_host_stats(printer=print):
+    for host, st in sorted(host_stats().items()):
+        printer(f"[http] {host}: requests={st['requests']} retries={st['retries']} errors={st['errors']} "
+                f"avg={st['latency_avg']:.3f}s max={st['latency_max']:.3f}s")
+
+
+# ====== RETRY ======
+def _is_rate_limited(resp):
+    if resp.status_code == 429:
+        return True
+    if resp.status_code == 403:
+        return resp.headers.get("X-RateLimit-Remaining") == "0" or "Retry-After" in resp.headers
+    return False
+
+def retry_wait(resp, attempt):
+    """Detik tunggu sebelum retry: Retry-After > X-RateLimit-Reset > backoff eksponensial + jitter."""
+    if resp is not None:
+        retry_after = resp.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return min(BACKOFF_MAX, max(0.0, float(retry_after)))
+            except ValueError:
+                try:
+                    return min(BACKOFF_MAX, max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time()))
+                except Exception:
+                    pass
+        reset = resp.headers.get("X-RateLimit-Reset")
+        if reset and resp.headers.get("X-RateLimit-Remaining") == "0":
+            try:
+                return min(BACKOFF_MAX, max(1.0, int(reset) - time.time()))
+            except ValueError:
+                pass
+    # full jitter
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+def request(method, url, params=None, headers=None, timeout=120, stream=False,
+            max_retries=None, retry_status=RETRY_STATUS, **kwargs):
+    """
+    Request lewat session bersama. Status di retry_status / rate limit (403+quota habis)
+    dan error jaringan di-retry sampai max_retries; response terakhir dikembalikan apa adanya
+    (caller tetap yang raise_for_status / cek status code).
+    """
+    max_retries = MAX_RETRIES if max_retries is None else max_retries
+    host = host_of(url)
+    sem = _host_sem(host)
+    bucket = _host_bucket(host)
+    attempt = 0
+    while True:
+        if bucket is not None:
+            bucket.acquire()
+        t0 = time.monotonic()
+        with sem:
+            try:
+                resp = get_session().request(method, url, params=params, headers=headers,
+                                             timeout=timeout, stream=stream, **kwargs)
+            except requests.RequestException:
+                _record(host, error=True)
+                if attempt >= max_retries:
+                    raise
+                resp = None
+        if resp is not None:
+            _record(host, latency=time.monotonic() - t0)
+            if bucket is not None:
+                _quota_feedback(host, bucket, resp)
+            if not (resp.status_code in retry_status or _is_rate_limited(resp)) or attempt >= max_retries:
+                return resp
+            resp.close()
+        wait = retry_wait(resp, attempt)
+        _record(host, retry=True)
+        status = resp.status_code if resp is not None else "network"
+        print(f"[http] retry {attempt + 1}/{max_retries} {host} ({status}) in {wait:.1f}s")
+        time.sleep(wait)
+        attempt += 1
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+def read_limited(resp, limit, chunk_size=65536):
+    """
+    Baca body (stream=True) maksimal `limit` byte ke bytearray yang dialokasikan sekali,
+    berhenti begitu limit tercapai. Memori = limit, tanpa copy berulang per chunk.
+    """
+    buf = bytearray(limit)
+    view = memoryview(buf)
+    n = 0
+    try:
+        for chunk in resp.iter_content(chunk_size=chunk_size):
+            if not chunk: break
+            k = min(len(chunk), limit - n)
+            view[n:n + k] = chunk[:k]
+            n += k
+            if n >= limit:
+                break
+    finally:
+        view.release()
+        resp.close()
+    del buf[n:]
+    return bytes(buf)
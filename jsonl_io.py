@@ -0,0 +1,212 @@
+"""
+jsonl_io.py
+Codec JSON / JSONL bersama untuk semua stage (collector, enrich, filter, NLP).
+
+- Backend: orjson → msgspec → json stdlib (env JSONL_BACKEND=auto|orjson|msgspec|json)
+- Output selalu JSON compact UTF-8 (tanpa spasi, non-ASCII tidak di-escape), sama untuk
+  semua backend (kecuali format eksponen float di stdlib: 1e-07 vs 1e-7)
+- JsonlWriter: encode langsung ke bytes, satu write() per batch baris
+- Decode terproyeksi ke skema bug tetap (BUG_FIELDS / fields=...): dengan msgspec field lain
+  dilewati saat parse (tidak dibangun sama sekali), tanpa msgspec dibuang setelah parse.
+  Field yang tidak ada di record tetap tidak ada (bukan None).
+"""
+import os, json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+BACKEND = os.getenv("JSONL_BACKEND", "auto")
+if BACKEND == "auto":
+    BACKEND = "orjson" if orjson else ("msgspec" if msgspec else "json")
+elif (BACKEND == "orjson" and orjson is None) or (BACKEND == "msgspec" and msgspec is None):
+    print(f"[jsonl_io] {BACKEND} tidak terpasang, pakai json stdlib")
+    BACKEND = "json"
+
+WRITE_BATCH = int(os.getenv("JSONL_WRITE_BATCH", "1000"))
+
+# skema bug: record collector (engine.RECORD_FIELDS) + field hasil enrich
+BUG_FIELDS = (
+    "id", "summary", "status", "resolution", "product", "component",
+    "creation_time", "last_change_time", "creator", "assigned_to",
+    "keywords", "url", "depends_on", "dupe_of",
+    "commit_messages", "commit_refs", "files_changed", "file_code",
+)
+
+
+# ====== ENCODE / DECODE ======
+_compact = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+def _json_dumpb(obj):
+    return _compact.encode(obj).encode("utf-8")
+
+if BACKEND == "orjson":
+    _OPTS = orjson.OPT_NON_STR_KEYS
+
+    def dumpb(obj):
+        try:
+            return orjson.dumps(obj, option=_OPTS)
+        except TypeError:   # int > 64 bit, tipe non-JSON → stdlib
+            return _json_dumpb(obj)
+
+    def loads(data):
+        return orjson.loads(data)
+
+elif BACKEND == "msgspec":
+    _enc, _dec = msgspec.json.Encoder(), msgspec.json.Decoder()
+
+    def dumpb(obj):
+        try:
+            return _enc.encode(obj)
+        except (TypeError, OverflowError):
+            return _json_dumpb(obj)
+
+    def loads(data):
+        try:
+            return _dec.decode(data)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from None
+
+else:
+    dumpb = _json_dumpb
+
+    def loads(data):
+        return json.loads(data)
+
+def dumps(obj):
+    """JSON compact sebagai str."""
+    return dumpb(obj).decode("utf-8")
+
+def encode_line(obj):
+    """Satu baris JSONL (bytes, diakhiri newline)."""
+    return dumpb(obj) + b"\n"
+
+
+# ====== SCHEMA DECODE ======
+def make_decoder(fields=BUG_FIELDS):
+    """
+    Return decode(line) → dict berisi hanya `fields` yang ada di record, None kalau baris
+    bukan object JSON. JSON rusak → ValueError.
+    """
+    fields = tuple(fields)
+    if msgspec is not None and all(f.isidentifier() for f in fields):
+        try:
+            Bug = msgspec.defstruct("Bug", [(f, object, msgspec.UNSET) for f in fields])
+        except Exception:
+            Bug = None
+        if Bug is not None:
+            dec, unset = msgspec.json.Decoder(Bug), msgspec.UNSET
+
+            def decode(line):
+                try:
+                    s = dec.decode(line)
+                except msgspec.ValidationError:
+                    return None
+                except msgspec.DecodeError as e:
+                    raise ValueError(str(e)) from None
+                out = {}
+                for f in fields:
+                    v = getattr(s, f)
+                    if v is not unset:
+                        out[f] = v
+                return out
+            return decode
+
+    def decode(line):
+        obj = loads(line)
+        if not isinstance(obj, dict):
+            return None
+        return {f: obj[f] for f in fields if f in obj}
+    return decode
+
+
+# ====== READ ======
+def iter_lines(path):
+    """Baris mentah: bytes untuk JSONL biasa, str untuk .gz / .zst / dataset terpartisi."""
+    p = str(path)
+    if os.path.isfile(p) and not p.lower().endswith((".gz", ".zst")):
+        with open(p, "rb") as f:
+            yield from f
+    else:
+        import partitioned_jsonl
+        yield from partitioned_jsonl.iter_lines(p)
+
+def iter_records(path, fields=None, strict=False):
+    """
+    Yield dict per baris JSONL. fields → decode terproyeksi ke skema.
+    strict=False → baris kosong / rusak / bukan object dilewati.
+    """
+    decode = make_decoder(fields) if fields else None
+    for line in iter_lines(path):
+        if not line.strip():
+            continue
+        try:
+            obj = decode(line) if decode else loads(line)
+        except ValueError:
+            if strict: raise
+            continue
+        if isinstance(obj, dict):
+            yield obj
+        elif strict:
+            raise ValueError(f"{path}: baris bukan object JSON")
+
+
+# ====== WRITE ======
+class JsonlWriter:
+    """Writer JSONL ber-buffer: baris di-encode ke bytes, ditulis per batch_rows baris."""
+    def __init__(self, path, mode="a", batch_rows=None):
+        self.path = str(path)
+        self.f = open(self.path, mode.replace("b", "") + "b", buffering=1 << 20)
+        self.batch_rows = batch_rows or WRITE_BATCH
+        self.buf = []
+        self.count = 0
+
+    def write(self, obj):
+        self.buf.append(encode_line(obj))
+        if len(self.buf) >= self.batch_rows:
+            self.flush_batch()
+
+    def write_line(self, line):
+        """Baris yang sudah ter-encode (bytes / str), tanpa re-encode."""
+        if isinstance(line, str):
+            line = line.encode("utf-8")
+        self.buf.append(line if line.endswith(b"\n") else line + b"\n")
+        if len(self.buf) >= self.batch_rows:
+            self.flush_batch()
+
+    def write_many(self, rows):
+        for r in rows:
+            self.write(r)
+
+    def flush_batch(self):
+        if self.buf:
+            self.f.write(b"".join(self.buf))
+            self.count += len(self.buf)
+            self.buf = []
+
+    def flush(self):
+        self.flush_batch()
+        self.f.flush()
+
+    def tell(self):
+        return self.f.tell() + sum(len(b) for b in self.buf)
+
+    def close(self):
+        self.flush_batch()
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def write_jsonl(path, rows, mode="w"):
+    with JsonlWriter(path, mode) as w:
+        w.write_many(rows)
+    return w.count
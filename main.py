@@ -19,7 +19,9 @@ Config diambil dari:
 Logging: auto ke log_YYYY-MM-DD.txt
 """
 
-import os, sys, argparse, datetime, importlib.util, contextlib
+import os, sys, argparse, importlib.util, contextlib
+import table_io
+from pipeline_log import log_write, default_log_path
 
 HERE = os.path.dirname(os.path.abspath(__file__))
 # --- load .env ---
@@ -51,17 +53,6 @@ def load_env():
 
 load_env()
 
-# ---------- logging ----------
-def log_write(log_fh, msg):
-    ts = datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
-    line = f"[{ts}] {msg}"
-    print(line)
-    if log_fh:
-        try:
-            log_fh.write(line + "\n"); log_fh.flush()
-        except Exception:
-            pass
-
 # ---------- utils ----------
 def file_nonempty(path: str) -> bool:
     try:
@@ -103,6 +94,7 @@ def main():
     parser.add_argument("--sim_threshold", type=float, default=None)
     parser.add_argument("--dup_threshold", type=float, default=None)
     parser.add_argument("--force_nlp", action="store_true", help="Force re-run NLP even if bugs_clean.csv exists")
+    parser.add_argument("--incremental_nlp", action="store_true", help="NLP only re-cleans new/changed bugs (merge into bugs_clean.csv)")
 
     # neo4j
     parser.add_argument("--neo4j-enable", action="store_true", help="Store LDA relations to Neo4j (03_store_to_database.py)")
@@ -130,6 +122,7 @@ def main():
     env_neo4j_db   = os.getenv("NEO4J_DB", None)
 
     env_log_dir      = os.getenv("LOG_DIR", HERE)
+    env_incr_nlp     = str2bool(os.getenv("NLP_INCREMENTAL", "false"))
 
     # ====== gabung ENV + CLI  ======
     input_path   = args.input   or env_input
@@ -140,6 +133,7 @@ def main():
     sim_th       = args.sim_threshold or env_sim_th
     dup_th       = args.dup_threshold or env_dup_th
     auto_k       = args.auto_k or env_auto_k
+    incr_nlp     = args.incremental_nlp or env_incr_nlp
 
     neo4j_enable = args.neo4j_enable or env_neo4j_enable
     neo4j_uri    = args.neo4j_uri or env_neo4j_uri
@@ -151,8 +145,7 @@ def main():
     print(f"num_topics {num_topics}")
 
     # ====== logging ======
-    date_str = datetime.datetime.now().strftime("%Y-%m-%d")
-    log_path = os.path.join(env_log_dir, f"log_{date_str}.txt")
+    log_path = default_log_path(env_log_dir)
     os.makedirs(env_log_dir, exist_ok=True)
     try:
         log_fh = open(log_path, "a", encoding="utf-8")
@@ -175,17 +168,23 @@ def main():
     os.makedirs(nlp_out, exist_ok=True)
     os.makedirs(lda_out, exist_ok=True)
 
-    bugs_clean_path = os.path.join(nlp_out, "bugs_clean.csv")
+    # bugs_clean.csv / bugs_clean.parquet (TABLE_FORMAT, lihat table_io.py)
+    bugs_clean_path = table_io.table_path(os.path.join(nlp_out, "bugs_clean.csv"))
 
     # --- STEP 1: NLP ---
-    if not args.force_nlp and file_nonempty(bugs_clean_path):
+    if not args.force_nlp and not incr_nlp and file_nonempty(bugs_clean_path):
         log_write(log_fh, f"[NLP] Skipped: found {bugs_clean_path}")
     else:
-        log_write(log_fh, "[NLP] Running 01_nlp_preprocess.py in-process…")
+        log_write(log_fh, f"[NLP] Running 01_nlp_preprocess.py in-process{' (incremental)' if incr_nlp else ''}…")
         nlp_mod = load_module_from(nlp_path, "nlp_step")
         if not hasattr(nlp_mod, "main"):
             log_write(log_fh, "[NLP][ERROR] 01_nlp_preprocess.py must define main()"); sys.exit(1)
         nlp_argv = [nlp_path, "--input", input_path, "--outdir", nlp_out]
+        if incr_nlp:
+            # state config (stopword / text cols / versi cleaner) berubah → 01 rebuild sendiri
+            nlp_argv.append("--incremental")
+            if args.force_nlp:
+                nlp_argv.append("--rebuild")
         with temp_argv(nlp_argv):
             nlp_mod.main()
         if not file_nonempty(bugs_clean_path):
@@ -0,0 +1,337 @@
+"""
+nlp_cache.py
+Cache teks sel → teks bersih untuk 01_nlp_preprocess (di atas nlp_clean), per kolom teks.
+
+- Kolom yang di-cache (NLP_CACHE_COLS, default product, component, commit_messages, files_changed):
+  nilai yang sama hanya di-clean sekali. Kolom list (ITEM_COLS: commit_messages, files_changed) di-cache
+  per item, bukan per sel gabungan: pesan commit / path yang sama di bug lain tetap hit. Kolom lain
+  (summary: hampir selalu unik) di-clean seperti biasa, tanpa biaya lookup. Token berulang sudah
+  di-cache nlp_clean.TokenFilter; yang dihemat di sini pass regex (URL / hash / bug id) + split per
+  teks (lihat report() / bench_nlp_clean.py).
+- Key = (kolom, teks) di LRU proses, sha1(namespace, kolom, teks) di store sqlite opsional
+  (NLP_CACHE_DB, dipakai ulang antar run). namespace = CLEANER_VERSION + digest stopword →
+  stopword / cleaner berubah = cache lama tidak dipakai (store sqlite dikosongkan).
+- Hasil identik dengan nlp_clean.clean_texts(nlp_clean.raw_texts(df, text_cols)):
+  kolom / item digabung spasi dan semua regex cleaner tidak melewati spasi, kecuali bug id
+  ("... debug" + "12x"). Tiap teks menyimpan flag: ujungnya bisa jadi awal bug id (TAIL) /
+  awalnya bisa jadi lanjutan bug id (HEAD). Sel dengan pasangan item TAIL → HEAD di-clean utuh,
+  baris dengan pasangan sel TAIL → HEAD berurutan di-clean utuh seperti biasa.
+"""
+import os, time, sqlite3, hashlib, re
+from collections import OrderedDict
+import nlp_clean
+
+CACHE_SIZE = int(os.getenv("NLP_CACHE_SIZE", "500000"))   # entri LRU per proses
+CACHE_COLS = os.getenv("NLP_CACHE_COLS", "product,component,commit_messages,files_changed")
+ITEM_COLS = ("commit_messages", "files_changed")   # kolom list: di-cache per item
+ROWS_PER_PASS = 50_000   # baris per putaran (batas RAM list sel)
+LOOKUP_BATCH = 500       # key per query sqlite (batas parameter sqlite 999)
+
+# dicek di sel setelah lower + URL / hash dibuang (BUGID_RE = bug\s*#?\s*\d+)
+TAIL_RE = re.compile(r"bug\s*#?\s*$")          # awal bug id di ujung sel
+HEAD_RE = re.compile(r"\s*#?\s*(?:\d|$)")       # lanjutan bug id di awal sel (atau sel "kosong")
+# awal teks yang mungkin jadi HEAD (cek murah sebelum regex penuh)
+HEAD_HINT_RE = re.compile(r"\s*(?:[0-9#]|http|[a-f0-9]{7}|$)")
+TAIL, HEAD = 1, 2
+
+def namespace(sw):
+    return f"{nlp_clean.CLEANER_VERSION}:{nlp_clean.stopwords_digest(sw)}"
+
+def boundary_flags(text):
+    """TAIL / HEAD (bitmask) teks, lihat docstring modul."""
+    low = text.lower()
+    if "bug" not in low and not HEAD_HINT_RE.match(low):
+        return 0
+    low = nlp_clean.HASH_RE.sub(" ", nlp_clean.URL_RE.sub(" ", low))
+    flags = HEAD if HEAD_RE.match(low) else 0
+    if "bug" in low and TAIL_RE.search(low):
+        flags |= TAIL
+    return flags
+
+def boundary_flags_many(texts):
+    """[boundary_flags(t) for t in texts], URL / hash dibuang sekali per batch (seperti nlp_clean.clean_batch)."""
+    low = [t.lower() for t in texts]
+    idx = [i for i, t in enumerate(low) if "bug" in t or HEAD_HINT_RE.match(t)]
+    out = [0] * len(low)
+    if any(nlp_clean.SEP in low[i] for i in idx):
+        for i in idx:
+            out[i] = boundary_flags(texts[i])
+        return out
+    joined = nlp_clean.URL_HASH_RE.sub(" ", nlp_clean.SEP.join([low[i] for i in idx]))
+    for i, t in zip(idx, joined.split(nlp_clean.SEP) if idx else ()):
+        flags = HEAD if HEAD_RE.match(t) else 0
+        if "bug" in t and TAIL_RE.search(t):
+            flags |= TAIL
+        out[i] = flags
+    return out
+
+class CellCache:
+    """
+    LRU (kolom, teks sel / item) → (teks bersih, flags) + store sqlite opsional (db_path).
+    cols = kolom yang di-cache (None = semua); kolom lain di-clean seperti biasa (tanpa cache).
+    Kolom ITEM_COLS dihitung per item (stats / report), kolom lain per sel.
+    """
+    def __init__(self, sw, cols=None, size=CACHE_SIZE, db_path=None):
+        self.sw = sw
+        self.ns = namespace(sw)
+        self.cols = None if cols is None else set(cols)
+        self.size = size
+        self.lru = OrderedDict()
+        self.reset_stats()
+        self.conn = None
+        if db_path:
+            self.conn = sqlite3.connect(db_path)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS meta (k TEXT PRIMARY KEY, v TEXT NOT NULL)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS frag (k BLOB PRIMARY KEY, v TEXT NOT NULL, "
+                              "flags INTEGER NOT NULL) WITHOUT ROWID")
+            row = self.conn.execute("SELECT v FROM meta WHERE k='ns'").fetchone()
+            if row is None or row[0] != self.ns:
+                with self.conn:
+                    self.conn.execute("DELETE FROM frag")
+                    self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('ns', ?)", (self.ns,))
+
+    def reset_stats(self):
+        self.stats = {}   # kolom -> [sel/item, hit lru, hit db, miss, char, char miss] (hit/miss per teks unik)
+        self.rows = self.fallback_rows = 0
+        self.t_clean = self.t_lookup = 0.0
+        self.clean_chars = 0   # karakter yang benar-benar di-clean (miss + kolom tanpa cache)
+
+    def cached(self, col):
+        return self.cols is None or col in self.cols
+
+    def _db_key(self, col, text):
+        return hashlib.sha1(f"{self.ns}\x00{col}\x00{text}".encode("utf-8", "surrogatepass")).digest()
+
+    def _put(self, key, val):
+        self.lru[key] = val
+        if len(self.lru) > self.size:
+            self.lru.popitem(last=False)
+
+    def lookup(self, col, texts):
+        """Teks unik satu kolom → (dict teks → (clean, flags) yang ketemu, list teks yang harus di-clean)."""
+        t0 = time.perf_counter()
+        found, rest = {}, []
+        lru = self.lru
+        for t in texts:
+            v = lru.get((col, t))
+            if v is None:
+                rest.append(t)
+            else:
+                lru.move_to_end((col, t))
+                found[t] = v
+        n_lru = len(found)
+        if self.conn is not None and rest:
+            hashed = {self._db_key(col, t): t for t in rest}
+            hk = list(hashed)
+            for i in range(0, len(hk), LOOKUP_BATCH):
+                part = hk[i:i + LOOKUP_BATCH]
+                for h, v, flags in self.conn.execute(
+                        f"SELECT k, v, flags FROM frag WHERE k IN ({','.join('?' * len(part))})", part):
+                    t = hashed[h]
+                    found[t] = (v, flags)
+                    self._put((col, t), found[t])
+            rest = [t for t in rest if t not in found]
+        st = self.stats.setdefault(col, [0, 0, 0, 0, 0, 0])
+        st[1] += n_lru
+        st[2] += len(found) - n_lru
+        st[3] += len(rest)
+        st[5] += sum(map(len, rest))
+        self.t_lookup += time.perf_counter() - t0
+        return found, rest
+
+    def store(self, col, items):
+        """items: dict teks → (clean, flags) hasil clean teks yang miss."""
+        t0 = time.perf_counter()
+        for t, val in items.items():
+            self._put((col, t), val)
+        if self.conn is not None and items:
+            with self.conn:
+                self.conn.executemany("INSERT OR REPLACE INTO frag VALUES (?,?,?)",
+                                      [(self._db_key(col, t), v, f) for t, (v, f) in items.items()])
+        self.t_lookup += time.perf_counter() - t0
+
+    def report(self):
+        """Ringkasan hit rate per kolom + perkiraan waktu yang dihemat (biaya clean rata-rata per karakter)."""
+        lines = []
+        tot = [0] * 6
+        for col, st in sorted(self.stats.items()):
+            tot = [a + b for a, b in zip(tot, st)]
+            unit = "items" if col in ITEM_COLS else "cells"
+            lines.append(f"[NLP] cache {col:16s} {unit}={st[0]:<9d} cleaned={st[3]:<8d} "
+                         f"hit lru={st[1]} db={st[2]} rate={1 - st[3] / max(st[0], 1):6.1%}")
+        per_char = self.t_clean / self.clean_chars if self.clean_chars else 0.0
+        saved = (tot[4] - tot[5]) * per_char - self.t_lookup
+        lines.append(f"[NLP] cache total: texts={tot[0]} rate={1 - tot[3] / max(tot[0], 1):.1%} "
+                     f"rows={self.rows} whole-row fallback={self.fallback_rows} "
+                     f"clean={self.t_clean:.1f}s lookup/store={self.t_lookup:.1f}s saved≈{saved:.1f}s")
+        return "\n".join(lines)
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def _resolve(col, uniq, cache, workers, pool):
+    """Teks unik satu kolom → dict teks → (clean, flags); yang miss di-clean lalu disimpan."""
+    found, missing = cache.lookup(col, uniq)
+    if missing:
+        t0 = time.perf_counter()
+        cleaned = nlp_clean.clean_texts(missing, cache.sw, workers=workers, pool=pool)
+        new = {t: (v, f) for t, v, f in zip(missing, cleaned, boundary_flags_many(missing))}
+        cache.t_clean += time.perf_counter() - t0
+        cache.clean_chars += sum(map(len, missing))
+        found.update(new)
+        cache.store(col, new)
+    return found
+
+def _cached_column(cells, col, cache, workers, pool):
+    """Sel satu kolom yang di-cache → (list clean, list flags); sel kosong → ("", 0)."""
+    found = _resolve(col, dict.fromkeys(t for t in cells if t is not None), cache, workers, pool)
+    found[None] = ("", 0)
+    st = cache.stats[col]
+    st[0] += len(cells) - cells.count(None)
+    st[4] += sum(len(t) for t in cells if t is not None)
+    res = [found[t] for t in cells]
+    return [r[0] for r in res], [r[1] for r in res]
+
+def _cell_items(cell, val):
+    """Item sel kolom list (urutan + str() sama dengan flatten_value); bukan list → [sel]."""
+    if cell is None:
+        return None
+    if isinstance(val, list):
+        return [str(x) for x in val if x is not None]
+    return [cell]
+
+def _item_column(cells, vals, col, cache, workers, pool):
+    """
+    Kolom list yang di-cache per item → (list clean, list flags); sel kosong → ("", 0).
+    Clean sel = clean item digabung spasi, kecuali bug id lintas item (TAIL → HEAD) → sel di-clean utuh.
+    """
+    items = [_cell_items(t, v) for t, v in zip(cells, vals)]
+    found = _resolve(col, dict.fromkeys(x for its in items if its is not None for x in its),
+                     cache, workers, pool)
+    get = found.__getitem__
+    out, flags, whole = [], [], []
+    for i, its in enumerate(items):
+        if its is None:
+            out.append(""); flags.append(0)
+            continue
+        if len(its) == 1:
+            v, f = get(its[0])
+            out.append(v); flags.append(f)
+            continue
+        res = list(map(get, its))
+        fs = [r[1] for r in res]
+        tails = fs[:-1]
+        if TAIL in tails or TAIL | HEAD in tails:
+            if any(a & TAIL and b & HEAD for a, b in zip(fs, fs[1:])):
+                whole.append(i); out.append(""); flags.append(0)
+                continue
+        out.append(" ".join([r[0] for r in res if r[0]]))
+        # HEAD dari item pertama; TAIL dari item terakhir yang bukan HEAD (item kosong = HEAD)
+        f = fs[0] & HEAD
+        for g in reversed(fs):
+            if g & TAIL:
+                f |= TAIL
+                break
+            if not g & HEAD:
+                break
+        flags.append(f)
+    if whole:
+        texts = [cells[i] for i in whole]
+        t0 = time.perf_counter()
+        cleaned = nlp_clean.clean_texts(texts, cache.sw, workers=workers, pool=pool)
+        cache.t_clean += time.perf_counter() - t0
+        cache.clean_chars += sum(map(len, texts))
+        for i, t, v in zip(whole, texts, cleaned):
+            out[i], flags[i] = v, boundary_flags(t)
+    st = cache.stats[col]
+    st[0] += sum(len(its) for its in items if its is not None)
+    st[4] += sum(len(t) for t in cells if t is not None)   # char sel = char item + spasi
+    return out, flags
+
+def _plain_segment(raws, cache, workers, pool):
+    """Kolom tanpa cache yang berurutan: teks mentah digabung (seperti raw_texts) → (list clean, None)."""
+    idx = [i for i, t in enumerate(raws) if t is not None]
+    texts = [raws[i] for i in idx]
+    t0 = time.perf_counter()
+    cleaned = nlp_clean.clean_texts(texts, cache.sw, workers=workers, pool=pool)
+    cache.t_clean += time.perf_counter() - t0
+    cache.clean_chars += sum(map(len, texts))
+    out = [""] * len(raws)
+    for i, v in zip(idx, cleaned):
+        out[i] = v
+    return out, None   # flags dihitung hanya kalau perlu (lihat _crosses)
+
+def _crosses(a, b):
+    """Bug id mungkin melewati batas sel a → b? a / b = (raw, flags | None)."""
+    fa, fb = a[1], b[1]
+    if fa is not None and not fa & TAIL or fb is not None and not fb & HEAD:
+        return False
+    if fa is None:
+        fa = boundary_flags(a[0])
+    if fb is None:
+        fb = boundary_flags(b[0])
+    return bool(fa & TAIL and fb & HEAD)
+
+def _clean_pass(df, text_cols, cache, workers, pool):
+    n = len(df)
+    # segmen = satu kolom cache, atau beberapa kolom tanpa cache yang berurutan (digabung mentah)
+    segs = []   # (sel mentah, kolom cache | None, nilai asli kolom list | None)
+    for c in text_cols:
+        if c not in df.columns:
+            continue
+        vals = df[c].tolist()
+        cells = [nlp_clean.text_or_none(v) for v in vals]
+        if cache.cached(c):
+            segs.append((cells, c, vals if c in ITEM_COLS else None))
+        elif segs and segs[-1][1] is None:
+            prev = segs[-1][0]
+            segs[-1] = ([b if a is None else a if b is None else a + " " + b for a, b in zip(prev, cells)],
+                        None, None)
+        else:
+            segs.append((cells, None, None))
+    res = [_plain_segment(raws, cache, workers, pool) if c is None
+           else _item_column(raws, vals, c, cache, workers, pool) if vals is not None
+           else _cached_column(raws, c, cache, workers, pool)
+           for raws, c, vals in segs]
+    segs = [raws for raws, _, _ in segs]
+
+    # jalur cepat: gabung hasil per segmen (sel kosong = "")
+    out = [" ".join(filter(None, p)) for p in zip(*(r[0] for r in res))] if res else [""] * n
+    # cek ulang hanya baris yang punya sel kosong atau sel cache ber-flag
+    marks = [[t is None for t in raws] for raws in segs] + [flags for _, flags in res if flags is not None]
+    summary = df["summary"].tolist() if "summary" in df.columns else [None] * n
+    redo, redo_texts = [], []
+    for i in ([i for i, m in enumerate(zip(*marks)) if any(m)] if marks else range(n)):
+        parts = [(raws[i], None if r[1] is None else r[1][i]) for raws, r in zip(segs, res) if raws[i] is not None]
+        if not parts:
+            # fallback raw_texts: tidak ada kolom yang terisi → summary
+            if isinstance(summary[i], str):
+                redo.append(i); redo_texts.append(summary[i])
+        elif len(parts) > 1 and any(_crosses(a, b) for a, b in zip(parts, parts[1:])):
+            redo.append(i); redo_texts.append(" ".join(p[0] for p in parts))
+    if redo:
+        for i, d in zip(redo, nlp_clean.clean_texts(redo_texts, cache.sw, workers=workers, pool=pool)):
+            out[i] = d
+    cache.rows += n
+    cache.fallback_rows += len(redo)
+    return out
+
+def clean_rows(df, text_cols, cache, workers=None, pool=None):
+    """Sama dengan nlp_clean.clean_texts(nlp_clean.raw_texts(df, text_cols), sw), lewat cache sel."""
+    workers = nlp_clean.WORKERS if workers is None else workers
+    own_pool = None
+    if pool is None and workers > 1 and len(df) > ROWS_PER_PASS:
+        pool = own_pool = nlp_clean.make_pool(cache.sw, workers)
+    try:
+        out = []
+        for i in range(0, len(df), ROWS_PER_PASS):
+            out.extend(_clean_pass(df.iloc[i:i + ROWS_PER_PASS], text_cols, cache, workers, pool))
+        return out
+    finally:
+        if own_pool is not None:
+            own_pool.shutdown()
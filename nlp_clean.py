@@ -0,0 +1,170 @@
+"""
+nlp_clean.py
+Engine cleaning teks batch untuk 01_nlp_preprocess.
+
+- clean_text(text, sw): cleaner per dokumen (referensi, perilaku lama)
+- clean_texts(texts, sw, workers): hasil identik dengan [clean_text(t, sw) for t in texts], tapi
+  * dokumen digabung per batch (dipisah SEP), regex jalan sekali per batch, bukan per dokumen
+  * URL + hash jadi 1 regex gabungan; pass bug id tetap terpisah setelahnya ("bug 1234567" →
+    hash dulu), jadi tidak bisa 1 regex
+  * tanda baca tidak pernah melewati spasi → dipecah per token lewat cache dict bersama
+    strip / cek stopword (token berulang hanya diproses sekali)
+  * batch dibagi ke beberapa proses (urutan output tetap)
+- raw_texts(df, text_cols): gabungan kolom teks per baris, per kolom (pengganti df.iterrows())
+"""
+import os, re, string, hashlib
+from concurrent.futures import ProcessPoolExecutor
+
+WORKERS = int(os.getenv("NLP_WORKERS", str(os.cpu_count() or 1)))
+BATCH_DOCS = int(os.getenv("NLP_BATCH_DOCS", "2000"))
+TOKEN_CACHE_MAX = 1_000_000   # cache token per proses di-reset kalau lebih dari ini
+
+# naikkan kalau output clean_text berubah → state NLP incremental (nlp_state.py) rebuild penuh
+CLEANER_VERSION = "1"
+
+PUNCT = string.punctuation
+
+def stopwords_digest(sw):
+    """Versi set stopword (sha1 isi set, tidak tergantung urutan)."""
+    return hashlib.sha1("\n".join(sorted(sw)).encode("utf-8")).hexdigest()
+
+# ====== PER DOKUMEN (REFERENSI) ======
+URL_RE   = re.compile(r"http\S+")
+HASH_RE  = re.compile(r"[a-f0-9]{7,40}")          # git hashes and similar
+BUGID_RE = re.compile(r"bug\s*#?\s*\d+")          # explicit Bug IDs
+PUNCT_RE = re.compile(r"[^\w\s\./-]+")            # keep / . - to preserve short paths
+SPACE_RE = re.compile(r"\s+")
+
+def token_ok(tok, sw):
+    if not tok: return False
+    if tok in sw: return False
+    if tok.isdigit(): return False
+    if len(tok) < 3: return False
+    # overly long path-ish tokens → drop
+    if tok.count(".") > 3 or tok.count("/") > 3: return False
+    return True
+
+def clean_text(text, sw):
+    if not isinstance(text, str):
+        return ""
+    text = text.lower()
+    # remove URLs, git hashes, explicit bug ids, keep short path markers minimally
+    text = URL_RE.sub(" ", text)
+    text = HASH_RE.sub(" ", text)
+    text = BUGID_RE.sub(" ", text)
+    text = PUNCT_RE.sub(" ", text)
+    tokens = SPACE_RE.split(text)
+    tokens = [t.strip(PUNCT) for t in tokens]
+    tokens = [t for t in tokens if token_ok(t, sw)]
+    return " ".join(tokens)
+
+# ====== BATCH ======
+# SEP tidak bisa ikut ter-match regex manapun dan bukan whitespace → batas dokumen tetap utuh
+SEP = "\x00"
+URL_HASH_RE = re.compile(r"http[^\s\x00]+|[a-f0-9]{7,40}")
+
+class TokenFilter(dict):
+    """
+    Token (dipisah whitespace, setelah URL / hash / bug id dibuang) → token bersih digabung spasi
+    ("" = semua dibuang). Dihitung sekali per token unik.
+    """
+    def __init__(self, sw):
+        super().__init__()
+        self.sw = sw
+
+    def __missing__(self, tok):
+        parts = [t.strip(PUNCT) for t in PUNCT_RE.sub(" ", tok).split()]
+        v = " ".join([t for t in parts if token_ok(t, self.sw)])
+        self[tok] = v
+        return v
+
+_filter = None
+
+def _init_worker(sw):
+    global _filter
+    _filter = TokenFilter(sw)
+
+def clean_batch(texts):
+    """Satu batch dokumen → list clean_text (pakai TokenFilter proses ini)."""
+    if len(_filter) > TOKEN_CACHE_MAX:
+        _filter.clear()
+    keep = _filter.__getitem__
+    docs = [t if isinstance(t, str) else "" for t in texts]   # non-str → "" (sama dgn clean_text)
+    if any(SEP in d for d in docs):
+        return [clean_text(t, _filter.sw) for t in texts]
+    joined = URL_HASH_RE.sub(" ", SEP.join(docs).lower())
+    joined = BUGID_RE.sub(" ", joined)
+    # str.split() = split whitespace yang sama dengan \s+ (tanpa token kosong)
+    return [" ".join([t for t in map(keep, d.split()) if t]) for d in joined.split(SEP)]
+
+def _batches(texts, size):
+    for i in range(0, len(texts), size):
+        yield texts[i:i + size]
+
+def make_pool(sw, workers=None):
+    """Pool proses cleaning (dipakai ulang antar chunk); None kalau workers <= 1."""
+    workers = WORKERS if workers is None else workers
+    if workers <= 1:
+        return None
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(sw,))
+
+def clean_texts(texts, sw, workers=None, batch_docs=None, pool=None):
+    """
+    List teks mentah → list teks bersih, sama persis dengan clean_text per dokumen.
+    pool = hasil make_pool(sw) (sw harus sama), kalau tidak ada pool dibuat per panggilan.
+    """
+    texts = list(texts)
+    workers = WORKERS if workers is None else workers
+    batch_docs = batch_docs or BATCH_DOCS
+    n_batches = (len(texts) + batch_docs - 1) // batch_docs
+    if pool is None and workers > 1 and n_batches > 1:
+        with make_pool(sw, min(workers, n_batches)) as pool:
+            return clean_texts(texts, sw, batch_docs=batch_docs, pool=pool)
+    out = []
+    if pool is None or n_batches <= 1:
+        if _filter is None or _filter.sw is not sw:
+            _init_worker(sw)
+        for b in _batches(texts, batch_docs):
+            out.extend(clean_batch(b))
+        return out
+    for res in pool.map(clean_batch, _batches(texts, batch_docs), chunksize=4):
+        out.extend(res)
+    return out
+
+# ====== RAW TEXT ======
+def flatten_value(val):
+    """
+    Bugzilla new structure has list fields (commit_messages, commit_refs, files_changed, keywords, depends_on).
+    This helper will make them joinable.
+    """
+    if val is None:
+        return ""
+    if isinstance(val, list):
+        # convert every item to str, then join
+        return " ".join(str(x) for x in val if x is not None)
+    # for non-list, just cast to str
+    return str(val)
+
+def text_or_none(val):
+    # handle list vs string (None / kosong → tidak ikut digabung)
+    if val is None:
+        return None
+    if isinstance(val, str):
+        return val if val.strip() else None
+    flat = flatten_value(val) if isinstance(val, list) else str(val)
+    return flat if flat.strip() else None
+
+def raw_texts(df, text_cols):
+    """Teks mentah per baris: kolom text_cols yang tidak kosong digabung spasi, fallback summary."""
+    n = len(df)
+    cols = [[text_or_none(v) for v in df[c].tolist()] for c in text_cols if c in df.columns]
+    summary = df["summary"].tolist() if "summary" in df.columns else [None] * n
+    out = []
+    for i in range(n):
+        chunks = [col[i] for col in cols if col[i] is not None]
+        # fallback: at least summary
+        if not chunks and isinstance(summary[i], str):
+            out.append(summary[i])
+        else:
+            out.append(" ".join(chunks))
+    return out
@@ -0,0 +1,96 @@
+"""
+nlp_state.py
+State NLP incremental untuk 01_nlp_preprocess (<outdir>/bugs_clean.state.sqlite).
+
+- meta: config yang menentukan isi bugs_clean.csv (versi cleaner, digest stopword, text cols,
+        mode key, kolom output, format tabel). Beda dengan run sebelumnya → rebuild penuh.
+- fp  : id -> fingerprint record input yang sudah ada di bugs_clean.csv
+        key=hash → sha1 semua field input yang dipakai (base cols + text cols)
+        key=lct  → last_change_time saja (lebih murah, tapi hasil enrich yang tidak mengubah
+                   last_change_time, mis. commit_messages, tidak terdeteksi)
+"""
+import os, json, sqlite3, hashlib
+import jsonl_io
+
+KEYS = ("hash", "lct")
+LOOKUP_BATCH = 500   # id per query sqlite (batas parameter sqlite 999)
+
+
+def state_path(out_path):
+    return os.path.splitext(out_path)[0] + ".state.sqlite"
+
+def drop_state(out_path):
+    """Hapus state (output ditulis ulang tanpa incremental → fingerprint lama tidak valid)."""
+    p = state_path(out_path)
+    for f in (p, p + "-wal", p + "-shm"):
+        if os.path.exists(f):
+            os.remove(f)
+
+def make_config(cleaner_version, sw_digest, text_cols, key, out_cols, fmt="csv"):
+    return {"cleaner_version": cleaner_version, "stopwords": sw_digest, "text_cols": list(text_cols),
+            "key": key, "out_cols": list(out_cols), "format": fmt}
+
+def fingerprint(rec, key):
+    if key == "lct":
+        return str(rec.get("last_change_time") or "")
+    return hashlib.sha1(jsonl_io.dumpb(rec)).hexdigest()
+
+
+class NlpState:
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (k TEXT PRIMARY KEY, v TEXT NOT NULL)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS fp (id TEXT PRIMARY KEY, fp TEXT NOT NULL)")
+        self.conn.execute("CREATE TEMP TABLE cur (id TEXT PRIMARY KEY, fp TEXT NOT NULL)")
+
+    def config(self):
+        row = self.conn.execute("SELECT v FROM meta WHERE k='config'").fetchone()
+        return json.loads(row[0]) if row else None
+
+    def scan(self, records, key, collect=True):
+        """
+        Fingerprint semua record input (ke tabel cur).
+        collect=True → return (record baru / berubah, urut input & de-dup by id; id yang hilang dari input),
+        collect=False → hanya isi cur (setelah rebuild penuh), return jumlah record.
+        """
+        changed, batch, n = {}, [], 0
+
+        def flush():
+            self.conn.executemany("INSERT OR REPLACE INTO cur VALUES (?,?)", [(i, f) for i, f, _ in batch])
+            if collect:
+                ids = [i for i, _, _ in batch]
+                old = dict(self.conn.execute(
+                    f"SELECT id, fp FROM fp WHERE id IN ({','.join('?' * len(ids))})", ids))
+                for i, f, rec in batch:
+                    if old.get(i) != f:
+                        changed.pop(i, None)
+                        changed[i] = rec
+                    else:
+                        changed.pop(i, None)   # duplikat id: versi terakhir yang menentukan
+            batch.clear()
+
+        for rec in records:
+            batch.append((str(rec.get("id")), fingerprint(rec, key), rec))
+            n += 1
+            if len(batch) >= LOOKUP_BATCH:
+                flush()
+        if batch:
+            flush()
+        if not collect:
+            return n
+        deleted = [r[0] for r in self.conn.execute("SELECT id FROM fp WHERE id NOT IN (SELECT id FROM cur)")]
+        return list(changed.values()), deleted
+
+    def save(self, config):
+        """Fingerprint hasil scan jadi state baru (panggil setelah bugs_clean.csv selesai ditulis)."""
+        with self.conn:
+            self.conn.execute("DELETE FROM fp")
+            self.conn.execute("INSERT INTO fp SELECT id, fp FROM cur")
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('config', ?)", (json.dumps(config),))
+            self.conn.execute("DELETE FROM cur")
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,77 @@
+"""
+nlp_stopwords.py
+Stopword NLTK (english + indonesian) untuk 01_nlp_preprocess, dibekukan di stopwords_nltk.txt
+(di-commit ke repo; 1 kata per baris, baris '#' = header + digest) → run 01 tidak import NLTK
+(~2s) dan tidak cek / download corpus apa pun.
+
+- load(): baca stopwords_nltk.txt dan cek digest-nya. File tidak ada / digest beda → error
+  (tidak ada fallback ke NLTK saat pipeline jalan).
+- python nlp_stopwords.py → bekukan ulang dari NLTK (mis. setelah upgrade nltk / corpus), lalu commit.
+  Isi berubah → digest stopword berubah → state NLP incremental & cache nlp_cache rebuild sendiri.
+"""
+import os, sys
+from nlp_clean import stopwords_digest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FROZEN_PATH = os.getenv("NLP_STOPWORDS_FILE", os.path.join(HERE, "stopwords_nltk.txt"))
+LANGS = ("english", "indonesian")
+DIGEST_PREFIX = "# sha1: "
+
+
+def from_nltk():
+    """Set stopword dari corpus NLTK (download corpus stopwords kalau belum ada) + bahasa yang gagal dimuat."""
+    import nltk
+    try:
+        nltk.data.find("corpora/stopwords")
+    except LookupError:
+        nltk.download("stopwords")
+    from nltk.corpus import stopwords
+    sw, missing = set(), []
+    for lang in LANGS:
+        try:
+            sw |= set(stopwords.words(lang))
+        except Exception:
+            missing.append(lang)
+    return sw, missing
+
+def read_frozen(path=FROZEN_PATH):
+    """(set kata, digest di header atau None)"""
+    words, digest = set(), None
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith(DIGEST_PREFIX):
+                digest = line[len(DIGEST_PREFIX):].strip()
+            elif line and not line.startswith("#"):
+                words.add(line)
+    return words, digest
+
+def write_frozen(sw, path=FROZEN_PATH):
+    import nltk
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(f"# NLTK {getattr(nltk, '__version__', '?')} stopwords: {', '.join(LANGS)} "
+                f"(python nlp_stopwords.py)\n")
+        f.write(f"{DIGEST_PREFIX}{stopwords_digest(sw)}\n")
+        f.write("\n".join(sorted(sw)) + "\n")
+    os.replace(tmp, path)
+
+def load(path=FROZEN_PATH):
+    """Stopword NLTK beku dari file yang di-commit."""
+    if not os.path.exists(path):
+        raise RuntimeError(f"{path} tidak ada: jalankan `python nlp_stopwords.py` (butuh nltk + corpus "
+                           f"stopwords) lalu commit file-nya, atau set NLP_STOPWORDS_FILE")
+    sw, digest = read_frozen(path)
+    if digest != stopwords_digest(sw):
+        raise RuntimeError(f"{path}: digest tidak cocok dengan isi (file diubah manual?) → "
+                           f"bekukan ulang dengan `python nlp_stopwords.py`")
+    return sw
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else FROZEN_PATH
+    sw, missing = from_nltk()
+    if missing:
+        sys.exit(f"NLTK stopwords tidak lengkap (tidak ada: {', '.join(missing)})")
+    write_frozen(sw, path)
+    print(f"{path}: {len(sw)} kata, sha1 {stopwords_digest(sw)}")
@@ -0,0 +1,356 @@
+"""
+partitioned_jsonl.py
+Layout datasource terpartisi: JSONL terkompresi per (product, bulan creation_time) + manifest.
+
+  <root>/manifest.json
+  <root>/product=Core/month=2024-01/part-00000.jsonl.gz
+  <root>/product=mozilla%2Fgecko-dev/month=2024-02/part-00000.jsonl.zst
+
+- Codec: gzip (stdlib), zstd (kalau modul zstandard ada), none
+- Manifest per partisi: file chunk, jumlah baris, byte, digest sha1 isi (tanpa kompresi)
+  → partisi yang isinya sama tidak ditulis ulang, stage berikutnya bisa skip partisi
+    yang digest-nya tidak berubah (map_partitions)
+- Reader (iter_lines) transparan: dataset dir, .jsonl.gz / .jsonl.zst, atau JSONL biasa
+
+Konfigurasi via env:
+  DATASET_LAYOUT=jsonl|partitioned, DATASET_CODEC=gzip|zstd|none, DATASET_CHUNK_ROWS
+  DATASET_KEEP_JSONL=0 → collector membuang JSONL working copy setelah export (disk ~1 salinan
+    terkompresi saja); delta / resume berikutnya membangun ulang JSONL dari dataset (restore_jsonl)
+"""
+import os, io, json, gzip, heapq, shutil, hashlib, itertools
+from datetime import datetime, timezone
+from urllib.parse import quote, unquote
+import jsonl_io
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+LAYOUT     = os.getenv("DATASET_LAYOUT", "jsonl")
+CODEC      = os.getenv("DATASET_CODEC", "gzip")
+CHUNK_ROWS = int(os.getenv("DATASET_CHUNK_ROWS", "100000"))
+KEEP_JSONL = os.getenv("DATASET_KEEP_JSONL", "1") not in ("0","false","False")
+SPILL_ROWS = 50_000   # baris di-buffer di RAM sebelum di-append ke file staging
+
+MANIFEST = "manifest.json"
+EXT = {"gzip": ".jsonl.gz", "zstd": ".jsonl.zst", "none": ".jsonl"}
+
+
+def partitioned():
+    return LAYOUT == "partitioned"
+
+def dataset_path(path):
+    """datasource/bugs.jsonl → datasource/bugs.dataset"""
+    base = path[:-len(".jsonl")] if path.lower().endswith(".jsonl") else path
+    return base + ".dataset"
+
+def is_dataset(path):
+    return os.path.isfile(os.path.join(path, MANIFEST))
+
+def is_jsonl(path):
+    """True untuk dataset dir atau file JSONL (biasa / terkompresi)."""
+    p = str(path).lower()
+    return is_dataset(path) or any(p.endswith(e) for e in EXT.values())
+
+
+# ====== CODEC ======
+def _codec(name):
+    name = name or "gzip"
+    if name == "zstd" and zstandard is None:
+        print("[dataset] zstandard tidak terpasang, pakai gzip")
+        return "gzip"
+    if name not in EXT:
+        raise ValueError(f"codec tidak dikenal: {name}")
+    return name
+
+def open_text(path, mode="r"):
+    """open() teks UTF-8 yang paham .gz / .zst (mode 'r' atau 'w')."""
+    p = str(path).lower()
+    if p.endswith(".gz"):
+        if "w" in mode:
+            # mtime=0 → byte output deterministik
+            return io.TextIOWrapper(gzip.GzipFile(path, "wb", compresslevel=6, mtime=0), encoding="utf-8")
+        return io.TextIOWrapper(gzip.open(path, "rb"), encoding="utf-8")
+    if p.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError(f"{path}: butuh modul zstandard (pip install zstandard)")
+        if "w" in mode:
+            raw = zstandard.ZstdCompressor(level=3).stream_writer(open(path, "wb"), closefd=True)
+        else:
+            raw = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+        return io.TextIOWrapper(raw, encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+# ====== MANIFEST ======
+def load_manifest(root):
+    path = os.path.join(root, MANIFEST)
+    if not os.path.isfile(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_manifest(root, manifest):
+    path = os.path.join(root, MANIFEST)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+def partitions(path):
+    """Entry manifest (urut bulan, product); file JSONL tunggal = satu partisi semu."""
+    if is_dataset(path):
+        return load_manifest(path)["partitions"]
+    return [{"key": "", "files": [os.path.abspath(path)], "rows": None, "digest": None}]
+
+def partition_key(rec):
+    product = str(rec.get("product") or "_")
+    ct = rec.get("creation_time") or ""
+    month = ct[:7] if len(ct) >= 7 else "unknown"
+    return f"product={quote(product, safe='')}/month={month}"
+
+def _key_fields(key):
+    fields = dict(part.split("=", 1) for part in key.split("/"))
+    return unquote(fields.get("product", "")), fields.get("month", "")
+
+def _sort_key(entry):
+    product, month = _key_fields(entry["key"])
+    return month, product
+
+
+# ====== READ ======
+def iter_partition_lines(root, entry):
+    for name in entry["files"]:
+        with open_text(os.path.join(root, name)) as f:
+            yield from f
+
+def iter_lines(path):
+    """Semua baris dari dataset dir / JSONL terkompresi / JSONL biasa."""
+    path = str(path)
+    if is_dataset(path):
+        for entry in partitions(path):
+            yield from iter_partition_lines(path, entry)
+    else:
+        with open_text(path) as f:
+            yield from f
+
+
+# ====== WRITE ======
+class DatasetWriter:
+    """
+    Tulis record ke dataset terpartisi. write() → buffer per partisi (spill ke staging
+    di disk kalau besar), close() → kompres per partisi + manifest baru.
+    Partisi dengan digest sama dengan manifest lama dibiarkan (file tidak disentuh).
+    prune=True → partisi lama yang tidak ditulis lagi dihapus (export penuh).
+    """
+    def __init__(self, root, codec=None, chunk_rows=None, prune=True):
+        self.root = root
+        self.codec = _codec(codec or CODEC)
+        self.chunk_rows = chunk_rows or CHUNK_ROWS
+        self.prune = prune
+        old = load_manifest(root) or {}
+        self.old = {e["key"]: e for e in old.get("partitions", [])}
+        self.entries = {}
+        self.buffers, self.buffered = {}, 0
+        self.staging = os.path.join(root, ".staging")
+        shutil.rmtree(self.staging, ignore_errors=True)
+        os.makedirs(self.staging)
+        self.stats = {"rows": 0, "written": 0, "unchanged": 0, "removed": 0}
+
+    def write(self, rec, line=None):
+        if line is None:
+            line = jsonl_io.dumps(rec) + "\n"
+        self.buffers.setdefault(partition_key(rec), []).append(line)
+        self.buffered += 1
+        if self.buffered >= SPILL_ROWS:
+            self._spill()
+
+    def _staging_file(self, key):
+        return os.path.join(self.staging, quote(key, safe="") + ".jsonl")
+
+    def _spill(self):
+        for key, lines in self.buffers.items():
+            with open(self._staging_file(key), "a", encoding="utf-8") as f:
+                f.write("".join(lines))
+        self.buffers, self.buffered = {}, 0
+
+    def put_partition(self, key, lines, **meta):
+        """Tulis satu partisi utuh (mis. hasil map_partitions); meta ikut disimpan di manifest."""
+        with open(self._staging_file(key), "w", encoding="utf-8") as f:
+            f.write("".join(lines))
+        self._finalize(key, meta)
+
+    def keep_partition(self, key):
+        """Partisi lama dipertahankan apa adanya (stage skip partisi yang tidak berubah)."""
+        if key in self.old:
+            self.entries[key] = self.old[key]
+            self.stats["unchanged"] += 1
+
+    def _finalize(self, key, meta=None):
+        src = self._staging_file(key)
+        h, rows = hashlib.sha1(), 0
+        with open(src, "rb") as f:
+            for line in f:
+                h.update(line); rows += 1
+        digest = h.hexdigest()
+        self.stats["rows"] += rows
+        old = self.old.get(key)
+        if old and old["digest"] == digest and old.get("codec") == self.codec \
+                and all(os.path.isfile(os.path.join(self.root, n)) for n in old["files"]):
+            self.entries[key] = dict(old, **(meta or {}))
+            self.stats["unchanged"] += 1
+            os.remove(src)
+            return
+
+        part_dir = os.path.join(self.root, key)
+        os.makedirs(part_dir, exist_ok=True)
+        files, out, n, size = [], None, 0, 0
+        with open(src, "r", encoding="utf-8") as f:
+            for line in f:
+                if out is None or n >= self.chunk_rows:
+                    if out is not None:
+                        out.close()
+                    name = f"part-{len(files):05d}{EXT[self.codec]}"
+                    files.append(f"{key}/{name}")
+                    out, n = open_text(os.path.join(part_dir, ".tmp-" + name), "w"), 0
+                out.write(line); n += 1
+        if out is not None:
+            out.close()
+        # chunk lama baru diganti setelah semua chunk baru selesai ditulis
+        for name in files:
+            base = name.rsplit("/", 1)[1]
+            os.replace(os.path.join(part_dir, ".tmp-" + base), os.path.join(self.root, name))
+            size += os.path.getsize(os.path.join(self.root, name))
+        for name in (old or {}).get("files", []):
+            if name not in files and os.path.exists(os.path.join(self.root, name)):
+                os.remove(os.path.join(self.root, name))
+        product, month = _key_fields(key)
+        self.entries[key] = dict(meta or {}, key=key, product=product, month=month, files=files,
+                                 rows=rows, bytes=size, digest=digest, codec=self.codec)
+        self.stats["written"] += 1
+        os.remove(src)
+
+    def close(self):
+        self._spill()
+        for name in sorted(os.listdir(self.staging)):
+            self._finalize(unquote(name[:-len(".jsonl")]))
+        shutil.rmtree(self.staging, ignore_errors=True)
+        if self.prune:
+            for key, old in self.old.items():
+                if key in self.entries:
+                    continue
+                for name in old["files"]:
+                    if os.path.exists(os.path.join(self.root, name)):
+                        os.remove(os.path.join(self.root, name))
+                self.stats["removed"] += 1
+                try:
+                    os.removedirs(os.path.join(self.root, key))
+                except OSError:
+                    pass
+        else:
+            for key, old in self.old.items():
+                self.entries.setdefault(key, old)
+        entries = sorted(self.entries.values(), key=_sort_key)
+        self.stats["total_rows"] = sum(e["rows"] for e in entries)
+        save_manifest(self.root, {
+            "version": 1,
+            "codec": self.codec,
+            "rows": self.stats["total_rows"],
+            "updated": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "partitions": entries,
+        })
+        return self.stats
+
+def export_jsonl(path, root=None, codec=None, reencode=False):
+    """
+    JSONL biasa → dataset terpartisi (baris disalin apa adanya, tanpa re-encode; reencode=True →
+    tiap record ditulis ulang lewat jsonl_io, mis. JSONL lama dengan format json.dumps default).
+    Partisi yang tidak berubah tidak ditulis ulang. Return (root, stats).
+    """
+    root = root or dataset_path(path)
+    if not os.path.isfile(path):
+        return root, None
+    w = DatasetWriter(root, codec)
+    with open_text(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                rec = jsonl_io.loads(line)
+            except Exception:
+                continue
+            w.write(rec, None if reencode else (line if line.endswith("\n") else line + "\n"))
+    stats = w.close()
+    print(f"[dataset] {path} -> {root}: rows={stats['rows']} written={stats['written']} "
+          f"unchanged={stats['unchanged']} removed={stats['removed']}")
+    return root, stats
+
+def _time_key(line):
+    rec = jsonl_io.loads(line)
+    return rec.get("creation_time") or "", rec.get("id") or 0
+
+def write_jsonl(root, path):
+    """
+    Dataset → JSONL biasa urut creation_time (seperti output full run): per bulan, partisi
+    semua product di-merge (heap) by (creation_time, id). Return jumlah baris.
+    """
+    entries = partitions(root)
+    tmp, n = path + ".tmp", 0
+    with jsonl_io.JsonlWriter(tmp, "w") as out:
+        for _, group in itertools.groupby(entries, key=lambda e: _key_fields(e["key"])[1]):
+            its = [(l for l in iter_partition_lines(root, e) if l.strip()) for e in group]
+            for line in heapq.merge(*its, key=_time_key):
+                out.write_line(line); n += 1
+    os.replace(tmp, path)
+    return n
+
+def restore_jsonl(path, root=None):
+    """
+    JSONL working copy tidak ada (DATASET_KEEP_JSONL=0) tapi dataset ada → tulis ulang dari
+    dataset (write_jsonl). Return True kalau file dibangun ulang.
+    """
+    root = root or dataset_path(path)
+    if os.path.exists(path) or not is_dataset(root):
+        return False
+    write_jsonl(root, path)
+    print(f"[dataset] {root} -> {path} (working copy dibangun ulang)")
+    return True
+
+
+# ====== STAGE PER PARTISI ======
+def map_partitions(src, outputs, fn, workers=None, codec=None):
+    """
+    Jalankan fn(src_root, entry) -> {nama_output: [baris]} per partisi src secara paralel
+    (process pool), tulis tiap hasil ke dataset outputs[nama_output] dengan key partisi sama.
+    Partisi yang digest src-nya sama dengan source_digest di semua manifest output di-skip.
+    Return dict statistik.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    entries = partitions(src)
+    writers = {name: DatasetWriter(root, codec) for name, root in outputs.items()}
+    todo, skipped = [], 0
+    for e in entries:
+        if all(w.old.get(e["key"], {}).get("source_digest") == e["digest"] for w in writers.values()):
+            for w in writers.values():
+                w.keep_partition(e["key"])
+            skipped += 1
+        else:
+            todo.append(e)
+
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(todo) <= 1:
+        results = (fn(src, e) for e in todo)
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        results = pool.map(fn, [src] * len(todo), todo)
+    try:
+        for e, out in zip(todo, results):
+            for name, w in writers.items():
+                w.put_partition(e["key"], out.get(name, []), source_digest=e["digest"])
+    finally:
+        if workers > 1 and len(todo) > 1:
+            pool.shutdown()
+    stats = {name: w.close() for name, w in writers.items()}
+    return {"partitions": len(entries), "processed": len(todo), "skipped": skipped, "outputs": stats}
@@ -0,0 +1,30 @@
+"""
+pipeline_log.py
+Logging bersama pipeline (main.py, 02_lda_topics.py, 03_store_to_database.py).
+02 / 03 dulu meng-exec ulang main.py (load_env + semua import main.py) hanya untuk log_write.
+"""
+import os, datetime
+
+
+def log_write(log_fh, msg):
+    ts = datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+    line = f"[{ts}] {msg}"
+    print(line)
+    if log_fh:
+        try:
+            log_fh.write(line + "\n"); log_fh.flush()
+        except Exception:
+            pass
+
+def default_log_path(log_dir):
+    """<log_dir>/log_YYYY-MM-DD.txt"""
+    date_str = datetime.datetime.now().strftime("%Y-%m-%d")
+    return os.path.join(log_dir, f"log_{date_str}.txt")
+
+def open_log(path):
+    """File log (append) atau None kalau tidak bisa dibuka."""
+    try:
+        return open(path, "a", encoding="utf-8")
+    except Exception as e:
+        print(f"[WARN] Could not open log file {path}: {e}")
+        return None
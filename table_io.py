@@ -0,0 +1,245 @@
+"""
+table_io.py
+Format tabel antar stage (NLP → LDA → clean topics → store): CSV (default) atau Parquet.
+
+- TABLE_FORMAT=csv|parquet (env). Parquet butuh pyarrow; tanpa pyarrow → CSV.
+- Nama file tetap sama, hanya ekstensi: out_nlp/bugs_clean.csv ↔ out_nlp/bugs_clean.parquet.
+  Reader menerima path .csv / .parquet mana saja → find_table() pilih file yang ada
+  (format aktif dulu).
+- Parquet: kolom list disimpan sebagai list<string> native (bukan "a;b;c"), relasi bertipe
+  (tanpa reader CSV longgar), read terproyeksi per kolom + memory-mapped, kompresi zstd.
+- CSV: output sama persis dengan sebelumnya (list di-join ';', relasi ditulis apa adanya).
+- pyarrow baru di-import saat file Parquet pertama dibaca / ditulis (run CSV tidak membayar import).
+"""
+import os, importlib.util
+
+pa = pq = None   # diisi arrow()
+
+def have_arrow():
+    return pa is not None or importlib.util.find_spec("pyarrow") is not None
+
+def arrow():
+    """(pyarrow, pyarrow.parquet), di-import sekali saat pertama dipakai."""
+    global pa, pq
+    if pa is None:
+        import pyarrow, pyarrow.parquet
+        pa, pq = pyarrow, pyarrow.parquet
+    return pa, pq
+
+FORMATS = ("csv", "parquet")
+FORMAT = os.getenv("TABLE_FORMAT", "csv").lower()
+if FORMAT not in FORMATS:
+    print(f"[table_io] TABLE_FORMAT={FORMAT} tidak dikenal, pakai csv")
+    FORMAT = "csv"
+elif FORMAT == "parquet" and not have_arrow():
+    print("[table_io] pyarrow tidak terpasang, pakai csv")
+    FORMAT = "csv"
+
+COMPRESSION = os.getenv("PARQUET_COMPRESSION", "zstd")
+BATCH_ROWS = 100_000
+
+
+# ====== PATH ======
+def _stem(path):
+    base, ext = os.path.splitext(str(path))
+    return base if ext.lower() in (".csv", ".parquet") else str(path)
+
+def fmt_of(path):
+    return "parquet" if str(path).lower().endswith(".parquet") else "csv"
+
+def table_path(path, fmt=None):
+    """Path tabel untuk format fmt (default FORMAT): x/bugs_clean.csv → x/bugs_clean.parquet."""
+    return _stem(path) + "." + (fmt or FORMAT)
+
+def tmp_path(path):
+    """Path sementara dengan ekstensi yang sama (tulis dulu, lalu os.replace)."""
+    base, ext = os.path.splitext(str(path))
+    return base + ".tmp" + ext
+
+def find_table(path):
+    """File tabel yang ada untuk path (format aktif dulu, lalu format lain); None kalau tidak ada."""
+    for fmt in (FORMAT,) + tuple(f for f in FORMATS if f != FORMAT):
+        p = table_path(path, fmt)
+        if os.path.exists(p):
+            return p
+    return None
+
+def _need_arrow(path):
+    if not have_arrow():
+        raise RuntimeError(f"{path}: file Parquet butuh pyarrow (pip install pyarrow)")
+    arrow()
+
+
+# ====== READ ======
+def columns_of(path):
+    if fmt_of(path) == "parquet":
+        _need_arrow(path)
+        return pq.ParquetFile(path).schema_arrow.names
+    import pandas as pd
+    return list(pd.read_csv(path, nrows=0).columns)
+
+def _project(path, columns):
+    if columns is None:
+        return None
+    have = set(columns_of(path))
+    return [c for c in columns if c in have]
+
+def read_table(path, columns=None):
+    """
+    DataFrame dari .csv / .parquet. columns → hanya kolom itu yang dibaca (yang tidak ada dilewati).
+    Parquet dibaca memory-mapped; kolom list → array per sel.
+    """
+    import pandas as pd
+    cols = _project(path, columns)
+    if fmt_of(path) == "parquet":
+        _need_arrow(path)
+        return pq.read_table(path, columns=cols, memory_map=True).to_pandas()
+    return pd.read_csv(path, usecols=cols)
+
+def iter_table(path, batch_rows=BATCH_ROWS, columns=None):
+    """Yield DataFrame per batch_rows baris (pengganti pd.read_csv(chunksize=...))."""
+    import pandas as pd
+    cols = _project(path, columns)
+    if fmt_of(path) == "parquet":
+        _need_arrow(path)
+        pf = pq.ParquetFile(path, memory_map=True)
+        for batch in pf.iter_batches(batch_size=batch_rows, columns=cols):
+            yield batch.to_pandas()
+        return
+    yield from pd.read_csv(path, usecols=cols, chunksize=batch_rows)
+
+
+# ====== WRITE ======
+# kinds: {"kolom": "int" | "float" | "str" | "list"} → schema Arrow tetap antar chunk
+_ARROW_KIND = {
+    "int": lambda: pa.int64(), "float": lambda: pa.float64(),
+    "str": lambda: pa.string(), "list": lambda: pa.list_(pa.string()),
+}
+
+def _is_null(v):
+    return v is None or (isinstance(v, float) and v != v)
+
+def _norm(kind, v):
+    if _is_null(v):
+        return None
+    if kind == "list":
+        if isinstance(v, str):
+            return [v]
+        try:
+            return [None if _is_null(x) else str(x) for x in v]
+        except TypeError:
+            return [str(v)]
+    if kind == "str":
+        return v if isinstance(v, str) else str(v)
+    if kind == "int":
+        return int(v)
+    return float(v)
+
+def to_arrow(df, kinds=None):
+    """DataFrame → pyarrow.Table. Kolom di kinds dinormalisasi ke tipe tetap, sisanya diinfer."""
+    if not kinds:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    arrays, names = [], []
+    for c in df.columns:
+        kind = kinds.get(c)
+        if kind is None:
+            arrays.append(pa.Array.from_pandas(df[c]))
+        else:
+            arrays.append(pa.array([_norm(kind, v) for v in df[c].tolist()], type=_ARROW_KIND[kind]()))
+        names.append(c)
+    return pa.Table.from_arrays(arrays, names=names)
+
+def write_table(df, path, kinds=None):
+    """Tulis DataFrame ke .csv / .parquet (sesuai ekstensi path)."""
+    if fmt_of(path) == "parquet":
+        _need_arrow(path)
+        pq.write_table(to_arrow(df, kinds), path, compression=COMPRESSION)
+    else:
+        df.to_csv(path, index=False)
+
+class TableWriter:
+    """Append DataFrame per chunk ke satu tabel (CSV: header sekali; Parquet: 1 row group per chunk)."""
+    def __init__(self, path, kinds=None):
+        self.path = str(path)
+        self.kinds = kinds
+        self.fmt = fmt_of(self.path)
+        self.writer = None
+        self.rows = 0
+        if self.fmt == "parquet":
+            _need_arrow(self.path)
+
+    def write(self, df):
+        if self.fmt == "parquet":
+            tbl = to_arrow(df, self.kinds)
+            if self.writer is None:
+                self.writer = pq.ParquetWriter(self.path, tbl.schema, compression=COMPRESSION)
+            self.writer.write_table(tbl.cast(self.writer.schema))
+        else:
+            first = self.writer is None
+            df.to_csv(self.path, mode="w" if first else "a", header=first, index=False)
+            self.writer = "csv"
+        self.rows += len(df)
+
+    def close(self, columns=None):
+        """columns → tabel kosong tetap ditulis dengan header / schema kalau belum ada chunk."""
+        if self.writer is None and columns is not None:
+            import pandas as pd
+            self.write(pd.DataFrame({c: [] for c in columns}))
+        if self.fmt == "parquet" and self.writer is not None:
+            self.writer.close()
+
+class RowWriter:
+    """
+    Tabel relasi baris per baris (export 02_lda_topics).
+    CSV: baris 'a,b,c' ditulis apa adanya (format lama, tanpa quoting), csv_fmt per kolom opsional.
+    Parquet: kolom bertipe (kinds), row group per batch_rows baris.
+    """
+    def __init__(self, path, columns, kinds, csv_fmt=None, batch_rows=BATCH_ROWS):
+        self.path = str(path)
+        self.columns = list(columns)
+        self.kinds = dict(zip(self.columns, kinds))
+        self.csv_fmt = csv_fmt or {}
+        self.batch_rows = batch_rows
+        self.fmt = fmt_of(self.path)
+        self.buf = []
+        self.rows = 0
+        if self.fmt == "parquet":
+            _need_arrow(self.path)
+            schema = pa.schema([(c, _ARROW_KIND[self.kinds[c]]()) for c in self.columns])
+            self.writer = pq.ParquetWriter(self.path, schema, compression=COMPRESSION)
+        else:
+            self.writer = None
+            with open(self.path, "w", encoding="utf-8") as f:
+                f.write(",".join(self.columns) + "\n")
+            self._fmts = [self.csv_fmt.get(c, str) for c in self.columns]
+
+    def add(self, *row):
+        self.buf.append(row)
+        if len(self.buf) >= self.batch_rows:
+            self.flush()
+
+    def flush(self):
+        if not self.buf:
+            return
+        if self.fmt == "parquet":
+            cols = list(zip(*self.buf))
+            arrays = [pa.array([_norm(self.kinds[c], v) for v in vals], type=_ARROW_KIND[self.kinds[c]]())
+                      for c, vals in zip(self.columns, cols)]
+            self.writer.write_table(pa.Table.from_arrays(arrays, names=self.columns))
+        else:
+            fmts = self._fmts
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("\n".join(",".join(fm(v) for fm, v in zip(fmts, row)) for row in self.buf) + "\n")
+        self.rows += len(self.buf)
+        self.buf = []
+
+    def close(self):
+        self.flush()
+        if self.writer is not None:
+            self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
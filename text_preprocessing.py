@@ -1,13 +1,22 @@
 import json, re, string
 import pandas as pd
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
 
-stop_words = set(stopwords.words("english"))
+# NLTK (~2s import) baru dimuat saat clean_text pertama kali dipanggil
+stop_words = None
+word_tokenize = None
+
+def _load_nltk():
+    global stop_words, word_tokenize
+    from nltk.corpus import stopwords
+    from nltk.tokenize import word_tokenize as tok
+    stop_words = set(stopwords.words("english"))
+    word_tokenize = tok
 
 def clean_text(text):
     if not isinstance(text, str):
         return ""
+    if stop_words is None:
+        _load_nltk()
     text = text.lower()
     text = re.sub(r"http\S+", "", text)          # hapus URL
     text = re.sub(r"[^a-z\s]", "", text)         # hanya huruf